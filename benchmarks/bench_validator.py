@@ -0,0 +1,58 @@
+"""
+Microbenchmark: số lần validate schema mỗi giây, trước và sau khi cache validator.
+
+    PYTHONPATH=src python benchmarks/bench_validator.py [-n 2000]
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+from jsonschema import Draft7Validator
+
+from bmms_changelet.validator import load_schema, validate_schema_instance
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+
+def uncached_validate(changeset, schema):
+    # hành vi cũ: compile validator mới ở mỗi lần gọi
+    validator = Draft7Validator(schema)
+    errors = sorted(validator.iter_errors(changeset), key=lambda e: e.path)
+    if errors:
+        return False, [f"{'/'.join(map(str, e.path))}: {e.message}" for e in errors]
+    return True, []
+
+
+def rate(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return n / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    schema = load_schema()
+    with open(BASE_DIR / "tests" / "changesets" / "test1.json", encoding="utf-8") as f:
+        valid = json.load(f)
+    invalid = dict(valid, id="bad id", changes=[{"action": "explode"}])
+
+    cases = {
+        "valid/uncached": lambda: uncached_validate(valid, schema),
+        "valid/cached": lambda: validate_schema_instance(valid, schema),
+        "invalid/uncached": lambda: uncached_validate(invalid, schema),
+        "invalid/cached": lambda: validate_schema_instance(invalid, schema),
+        "invalid/cached-first-error": lambda: validate_schema_instance(
+            invalid, schema, first_error_only=True
+        ),
+    }
+    for name, fn in cases.items():
+        print(f"{name:28s} {rate(fn, args.n):>12,.0f} validations/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+So sánh hai file kết quả của benchmarks/run.py.
+
+    python benchmarks/compare.py before.json after.json [--threshold 0.10]
+
+Exit code 1 nếu có case chậm hơn quá ngưỡng.
+"""
+import argparse
+import json
+import sys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=0.10, help="tỉ lệ chậm hơn tối đa cho phép")
+    args = parser.parse_args(argv)
+
+    with open(args.before, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(args.after, encoding="utf-8") as f:
+        after = json.load(f)
+
+    print(f"{'case':28s} {before.get('commit') or 'before':>12s} {after.get('commit') or 'after':>12s}   change")
+    regressions = []
+    for name, new in after["results"].items():
+        old = before["results"].get(name)
+        if old is None:
+            print(f"{name:28s} {'-':>12s} {new['median_s'] * 1000:10.3f}ms   (new)")
+            continue
+        ratio = new["median_s"] / old["median_s"] - 1
+        flag = ""
+        if ratio > args.threshold:
+            regressions.append(name)
+            flag = "  ⚠️ regression"
+        print(f"{name:28s} {old['median_s'] * 1000:10.3f}ms {new['median_s'] * 1000:10.3f}ms {ratio:+8.1%}{flag}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
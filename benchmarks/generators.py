@@ -0,0 +1,73 @@
+"""
+Sinh dữ liệu tổng hợp cho benchmark: catalogue, mapping, ChangeSet, raw LLM output.
+Dùng random.Random(seed) nên cùng tham số luôn cho cùng dữ liệu.
+"""
+import random
+
+ACTIONS = ("update", "scale", "enable", "disable")
+
+
+def service_id(i):
+    return f"svc-{i:05d}"
+
+
+def make_catalogue(n_services=10000, max_deps=3, n_features=10, seed=0):
+    rng = random.Random(seed)
+    services = []
+    for i in range(n_services):
+        deps = sorted({service_id(rng.randrange(i)) for _ in range(rng.randint(0, max_deps))}) if i else []
+        services.append({
+            "name": service_id(i),
+            "id": service_id(i),
+            "display_name": f"Service {i}",
+            "basePath": f"/{service_id(i)}/api/v1",
+            "version": "v1.0.0",
+            "dependencies": deps,
+            "resources": {"cpu": f"{rng.choice((100, 200, 500))}m", "memory": f"{rng.choice((128, 256, 512))}Mi"},
+            "scalable": True,
+            "allowed_features": [{"name": f"f{j}"} for j in range(n_features)],
+        })
+    return {"services": services}
+
+
+def make_mapping(n_paths=10000, features_per_service=10):
+    mappings = {}
+    for p in range(n_paths):
+        svc = service_id(p // features_per_service)
+        j = p % features_per_service
+        mappings.setdefault(svc, {})[f"f{j}"] = f"{svc}.group{j % 3}.f{j}"
+    return {"mappings": mappings}
+
+
+def make_changeset(n_changes=1000, n_services=10000, features_per_change=3, seed=0):
+    rng = random.Random(seed)
+    changes = []
+    for _ in range(n_changes):
+        svc = service_id(rng.randrange(n_services))
+        action = rng.choice(ACTIONS)
+        config = {f"f{rng.randrange(10)}": rng.randint(1, 100) for _ in range(features_per_change)}
+        if action == "scale":
+            config["replicas"] = rng.randint(1, 5)
+        changes.append({"action": action, "service": svc, "config": config})
+    return {
+        "id": f"chg-bench-{seed}",
+        "intent": "bench_update",
+        "timestamp": "2025-09-14T12:00:00Z",
+        "request_context": {"tenant_id": "tenant-bench", "requested_by": "bench", "role": "admin"},
+        "changes": changes,
+        "impacted_services": [],
+        "metadata": {"confidence": 0.9, "risk": "low"},
+    }
+
+
+def make_raw_llm_output(n_features=50, seed=0):
+    rng = random.Random(seed)
+    return {
+        "proposal_text": "Benchmark proposal",
+        "changeset": {
+            "model": rng.choice(("product_catalog", "order_service", "billing_service")),
+            "features": [{"key": f"f{j}", "value": rng.randint(1, 100)} for j in range(n_features)],
+            "impacted_services": [],
+        },
+        "metadata": {"intent": "update_config", "confidence": 0.9, "risk": "low"},
+    }
@@ -0,0 +1,220 @@
+"""
+Benchmark suite cho normalize / validate_changeset / convert / unflatten_dict
+và các endpoint DRF (qua Django test client).
+
+    PYTHONPATH=src python benchmarks/run.py                  # kích thước đầy đủ
+    PYTHONPATH=src python benchmarks/run.py --quick          # chạy nhanh khi dev
+    PYTHONPATH=src python benchmarks/run.py -o before.json
+    python benchmarks/compare.py before.json after.json
+
+Kết quả JSON gồm commit git, môi trường và (min, median, ops/s) cho mỗi case.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR / "src"))
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "benchmarks"))
+
+from generators import make_catalogue, make_changeset, make_mapping, make_raw_llm_output  # noqa: E402
+
+from bmms_changelet.catalogue_index import CatalogueIndex  # noqa: E402
+from bmms_changelet.convert_to_helm import CompiledMapping, compile_mapping, convert, unflatten_dict  # noqa: E402
+from bmms_changelet.model import ChangeSet  # noqa: E402
+from bmms_changelet.normalize_input import normalize  # noqa: E402
+from bmms_changelet.validator import load_schema, validate_changeset  # noqa: E402
+
+SIZES = {
+    "full": {"services": 10000, "changes": 1000, "paths": 10000, "features": 50, "repeat": 15},
+    "quick": {"services": 1000, "changes": 100, "paths": 1000, "features": 10, "repeat": 5},
+}
+
+
+def measure(fn, repeat, number=1):
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    median = statistics.median(samples)
+    return {"min_s": min(samples), "median_s": median, "ops_per_s": 1 / median if median else None}
+
+
+def core_cases(size):
+    schema = load_schema()
+    catalogue = make_catalogue(size["services"])
+    index = CatalogueIndex(catalogue)
+    index.graph  # dựng sẵn, không tính vào thời gian validate
+    index.resolver
+    fuzzy_name = index.services[size["services"] // 2]["id"][:-1] + "x"
+    mapping = make_mapping(size["paths"])
+    compiled = compile_mapping(mapping)
+    changeset = make_changeset(size["changes"], size["services"])
+    typed = ChangeSet.from_dict(changeset)
+    raw = make_raw_llm_output(size["features"])
+    flat = {
+        ".".join(path[1] + (path[2],)): 1
+        for features in compiled.paths.values()
+        for path in features.values()
+    }
+
+    return {
+        "normalize": lambda: normalize(raw, index),
+        "resolve_service/fuzzy": lambda: index.resolver.resolve(fuzzy_name),
+        "validate_changeset/index": lambda: validate_changeset(changeset, index, schema),
+        "validate_changeset/dict": lambda: validate_changeset(changeset, catalogue, schema),
+        "validate_changeset/typed": lambda: validate_changeset(typed, index, schema),
+        "convert/compiled": lambda: convert(changeset, compiled),
+        "convert/typed": lambda: convert(typed, compiled),
+        # dict đã compile sẵn trong cache của compile_mapping → đo thêm chi phí tra cache
+        "convert/dict": lambda: convert(changeset, mapping),
+        # compile thật, không qua cache (compile_mapping(mapping) chỉ là cache hit)
+        "compile_mapping": lambda: CompiledMapping(mapping),
+        "unflatten_dict": lambda: unflatten_dict(flat),
+    }
+
+
+def traced_bytes(build):
+    """Số byte còn giữ sau khi build() xong (tracemalloc), kèm kết quả để nó chưa bị thu hồi."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        return tracemalloc.get_traced_memory()[0] - before, kept
+    finally:
+        tracemalloc.stop()
+
+
+def memory_report(size):
+    """Bộ nhớ giữ một batch ChangeSet: dict từ json.loads so với model.ChangeSet."""
+    count = size["changes"]
+    body = json.dumps(make_changeset(20, size["services"]))
+    dict_bytes, _ = traced_bytes(lambda: [json.loads(body) for _ in range(count)])
+    typed_bytes, _ = traced_bytes(lambda: [ChangeSet.from_dict(json.loads(body)) for _ in range(count)])
+    return {
+        "changesets": count,
+        "changes_per_changeset": 20,
+        "dict_bytes_per_changeset": dict_bytes / count,
+        "typed_bytes_per_changeset": typed_bytes / count,
+        "saving": 1 - typed_bytes / dict_bytes,
+    }
+
+
+def http_cases(size):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bmms_api.settings")
+    import django
+    from django.conf import settings
+
+    # chỉ đo endpoint: tắt trước django.setup() các phần có state chạy nền hoặc tích lũy
+    # qua các lần lặp (rate limit, ghi DB, job thread, dedupe, metrics, reload config)
+    settings.BMMS_CONFIG_RELOAD_INTERVAL = 0
+    settings.BMMS_ADMISSION = {"ENABLED": False}
+    settings.BMMS_STORE = {"ENABLED": False}
+    settings.BMMS_JOBS = {"ENABLED": False}
+    settings.BMMS_NORMALIZE_DEDUPE = {"ENABLED": False}
+    settings.BMMS_METRICS_ENABLED = False
+    django.setup()
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+    from changeset_api.config import ADMISSION, JOBS, RECORDER, RESULT_CACHE
+
+    assert ADMISSION is None and JOBS is None and RECORDER is None
+
+    client = Client()
+    with open(BASE_DIR / "tests" / "changesets" / "test1.json", encoding="utf-8") as f:
+        changeset = json.load(f)
+    with open(BASE_DIR / "tests" / "llm_output" / "test1_raw.json", encoding="utf-8") as f:
+        raw = json.load(f)
+    body_cs = json.dumps(changeset)
+    body_raw = json.dumps(raw)
+
+    def post(url, body, clear_cache=False):
+        def run():
+            if clear_cache and RESULT_CACHE is not None:
+                RESULT_CACHE.clear()
+            response = client.post(url, data=body, content_type="application/json")
+            assert response.status_code == 200, response.content
+        return run
+
+    return {
+        "http/normalize": post("/api/normalize/", body_raw),
+        "http/validate": post("/api/validate/", body_cs, clear_cache=True),
+        "http/validate/cached": post("/api/validate/", body_cs),
+        "http/convert": post("/api/convert/", body_cs, clear_cache=True),
+        "http/pipeline": post("/api/pipeline/", body_raw),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quick", action="store_true", help="dữ liệu nhỏ, ít lần lặp")
+    parser.add_argument("--no-http", action="store_true", help="bỏ qua các endpoint Django")
+    parser.add_argument("-k", "--filter", default="", help="chỉ chạy case có tên chứa chuỗi này")
+    parser.add_argument("-o", "--output", help="file JSON kết quả (mặc định: benchmarks/results/<commit>.json)")
+    args = parser.parse_args(argv)
+
+    size = SIZES["quick" if args.quick else "full"]
+    cases = core_cases(size)
+    if not args.no_http:
+        cases.update(http_cases(size))
+
+    results = {}
+    for name, fn in cases.items():
+        if args.filter not in name:
+            continue
+        number = 50 if name.startswith("http/") or name == "normalize" else 1
+        results[name] = measure(fn, size["repeat"], number=number)
+        r = results[name]
+        print(f"{name:28s} median {r['median_s'] * 1000:10.3f} ms   {r['ops_per_s']:>12,.1f} ops/s")
+
+    memory = None
+    if args.filter in "memory/changeset":
+        memory = memory_report(size)
+        print(
+            f"{'memory/changeset':28s} dict {memory['dict_bytes_per_changeset']:,.0f} B   "
+            f"typed {memory['typed_bytes_per_changeset']:,.0f} B   ({memory['saving']:.1%} less)"
+        )
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": size,
+        "results": results,
+        "memory": memory,
+    }
+    out = Path(args.output) if args.output else BASE_DIR / "benchmarks" / "results" / f"{commit or 'local'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"✅ Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,3 +22,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bmms_api.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if (getattr(settings, "BMMS_OPENAPI_CACHE", None) or {}).get("PREGENERATE"):
+    from changeset_api.openapi import pregenerate_openapi
+
+    pregenerate_openapi()
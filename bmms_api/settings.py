@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'changeset_api.metrics.metrics_middleware',
+    'changeset_api.admission.admission_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -119,6 +122,109 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# BMMS: chu kỳ (giây) kiểm tra thay đổi của catalogue/schema/mapping, 0 = tắt hot-reload
+BMMS_CONFIG_RELOAD_INTERVAL = 5
+
+# BMMS: async endpoints (/api/async/...). Payload lớn hơn INLINE_MAX_BYTES được đẩy
+# sang executor EXECUTOR_WORKERS thread, tối đa MAX_PENDING việc đang chờ.
+BMMS_ASYNC_EXECUTOR_WORKERS = 4
+BMMS_ASYNC_MAX_PENDING = 64
+BMMS_ASYNC_INLINE_MAX_BYTES = 64 * 1024
+
+# BMMS: cache kết quả validate/convert. BACKEND: "memory" (mỗi worker một cache),
+# "sqlite" (dùng chung giữa các worker trên cùng máy, cần PATH) hoặc None để tắt.
+BMMS_RESULT_CACHE = {
+    "BACKEND": "memory",
+    "MAX_BYTES": 32 * 1024 * 1024,
+    "TTL": 300,
+    "PATH": BASE_DIR / "result_cache.sqlite3",
+}
+
+# BMMS: re-validate theo patch (/api/validate/delta/). HISTORY_SIZE: số ChangeSet gần nhất
+# giữ theo id; MAX_CHANGES: số verdict của từng change được cache.
+BMMS_DELTA = {
+    "HISTORY_SIZE": 1000,
+    "MAX_CHANGES": 10000,
+}
+
+# BMMS: lưu ChangeSet, kết quả validate và values xuống DB (bảng changeset_api_*),
+# ghi theo lô BATCH_SIZE record hoặc sau MAX_DELAY giây; truy vấn qua GET /api/changesets/.
+BMMS_STORE = {
+    "ENABLED": True,
+    "BATCH_SIZE": 200,
+    "MAX_DELAY": 1.0,
+}
+
+# BMMS: job validate/convert/pipeline chạy nền (/api/jobs/). WORKERS thread xử lý job,
+# PROCESSES > 0 để chạy từng chunk trong process pool cục bộ, tối đa MAX_QUEUED job chờ
+# (đầy → 503), kết quả giữ RESULT_TTL giây sau khi job kết thúc.
+BMMS_JOBS = {
+    "ENABLED": True,
+    "WORKERS": 2,
+    "PROCESSES": 0,
+    "MAX_QUEUED": 32,
+    "RESULT_TTL": 900,
+    "CHUNK_SIZE": 64,
+}
+
+# BMMS: normalize/pipeline gặp lại đúng raw payload trong TTL giây (LLM/gateway retry) thì
+# trả ChangeSet đã sinh (cùng id). BACKEND: "memory" hoặc "sqlite" (dùng chung giữa worker, cần PATH).
+BMMS_NORMALIZE_DEDUPE = {
+    "ENABLED": False,
+    "BACKEND": "memory",
+    "TTL": 60,
+    "MAX_BYTES": 8 * 1024 * 1024,
+    "PATH": BASE_DIR / "normalize_dedupe.sqlite3",
+}
+
+# BMMS: admission control theo tenant cho /api/: token bucket RATE request/giây (burst BURST)
+# + tối đa CONCURRENCY request đồng thời; vượt → 429 + Retry-After. TENANTS ghi đè theo tenant,
+# vd. {"tenant-big": {"RATE": 500, "CONCURRENCY": 64}}. BACKEND "sqlite" (cần PATH) để các worker
+# trên cùng máy dùng chung bộ đếm; LEASE: giây tối đa giữ chỗ của một request (worker chết).
+# Request không có tenant được tính theo địa chỉ client. Số bucket giới hạn bởi MAX_TENANTS (memory,
+# LRU) / IDLE giây không dùng (sqlite); metrics chỉ gắn nhãn tenant trong TENANTS, còn lại "other".
+BMMS_ADMISSION = {
+    "ENABLED": False,
+    "BACKEND": "memory",
+    "PATH": BASE_DIR / "admission.sqlite3",
+    "LEASE": 300,
+    "IDLE": 3600,
+    "MAX_TENANTS": 10000,
+    "RATE": 100,
+    "BURST": 200,
+    "CONCURRENCY": 32,
+    "TENANTS": {},
+    "TENANT_HEADER": "X-Tenant-ID",
+}
+
+# BMMS: metrics theo từng bước + /metrics (Prometheus). False = mọi timer là no-op.
+BMMS_METRICS_ENABLED = True
+
+# BMMS: cache spec OpenAPI (/swagger/?format=openapi, /redoc/...) theo DEPLOY_VERSION +
+# config version, kèm ETag. DIR: lưu thêm ra đĩa (nên đặt DEPLOY_VERSION khi dùng);
+# PREGENERATE: sinh sẵn khi wsgi/asgi khởi động.
+BMMS_OPENAPI_CACHE = {
+    "ENABLED": True,
+    "DEPLOY_VERSION": os.environ.get("BMMS_DEPLOY_VERSION", ""),
+    "DIR": None,
+    "PREGENERATE": True,
+}
+
+# BMMS: backend JSON cho API: "auto" (orjson nếu cài, không thì json stdlib), "orjson", "stdlib"
+BMMS_JSON_BACKEND = "auto"
+
+REST_FRAMEWORK = {
+    "DEFAULT_PARSER_CLASSES": [
+        "changeset_api.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "changeset_api.parsers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
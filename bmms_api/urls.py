@@ -20,7 +20,12 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
-schema_view = get_schema_view(
+from changeset_api.metrics import metrics_view
+from changeset_api.openapi import OPENAPI_CACHE, cached_schema_view
+
+# spec sinh một lần cho mỗi deploy/config version (xem BMMS_OPENAPI_CACHE);
+# url="" → spec không ghi host/scheme, UI dùng host đang phục vụ
+schema_view = cached_schema_view(get_schema_view(
    openapi.Info(
       title="BMMS ChangeSet API",
       default_version='v1',
@@ -28,11 +33,13 @@ schema_view = get_schema_view(
    ),
    public=True,
    permission_classes=(permissions.AllowAny,),
-)
+   url="",
+), OPENAPI_CACHE)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('changeset_api.urls')),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('metrics', metrics_view, name='metrics'),
 ]
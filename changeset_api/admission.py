@@ -0,0 +1,132 @@
+"""
+Middleware admission control theo tenant (token bucket + giới hạn đồng thời)
+cho các endpoint /api/. Vượt giới hạn → 429 kèm Retry-After.
+
+Tenant lấy từ header X-Tenant-ID; không có thì lấy `tenant_id` đầu tiên trong
+body JSON nhỏ (không parse cả body, không đọc body lớn / stream batch); không có
+nữa thì mỗi địa chỉ client là một tenant riêng ("anonymous:<ip>"), để một client
+không gắn nhãn không chặn các client khác.
+
+Metrics chỉ gắn nhãn tenant khai báo trong TENANTS, còn lại là "other".
+"""
+import re
+from asyncio import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.decorators import sync_and_async_middleware
+
+from bmms_changelet.admission import MemoryAdmissionStore
+
+from .config import ADMISSION
+from .metrics import ADMITTED_TOTAL, REJECTED_TOTAL
+
+_OPTIONS = getattr(settings, "BMMS_ADMISSION", None) or {}
+TENANT_HEADER = _OPTIONS.get("TENANT_HEADER", "X-Tenant-ID")
+PATH_PREFIXES = tuple(_OPTIONS.get("PATHS", ("/api/",)))
+PEEK_MAX_BYTES = _OPTIONS.get("PEEK_MAX_BYTES", 64 * 1024)
+DEFAULT_TENANT = "anonymous"
+
+_TENANT_ID = re.compile(rb'"tenant_id"\s*:\s*"([^"\\]{1,200})"')
+
+
+def tenant_of(request):
+    tenant = request.headers.get(TENANT_HEADER)
+    if tenant:
+        return tenant[:200]
+    if request.method in ("POST", "PUT", "PATCH") and "json" in (request.content_type or ""):
+        try:
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            length = 0
+        if 0 < length <= PEEK_MAX_BYTES:
+            match = _TENANT_ID.search(request.body)
+            if match:
+                return match.group(1).decode("utf-8", "replace")
+    return f"{DEFAULT_TENANT}:{request.META.get('REMOTE_ADDR') or '-'}"
+
+
+def _admit(request):
+    """→ (tenant, ticket, response 429 | None)."""
+    tenant = tenant_of(request)
+    ticket, reason, retry_after = ADMISSION.acquire(tenant)
+    label = ADMISSION.label(tenant)
+    if ticket is None:
+        REJECTED_TOTAL.inc(tenant=label, reason=reason)
+        response = JsonResponse(
+            {"detail": f"Too many requests for tenant '{tenant}' ({reason} limit)", "reason": reason},
+            status=429,
+        )
+        response["Retry-After"] = str(retry_after)
+        return tenant, None, response
+    ADMITTED_TOTAL.inc(tenant=label)
+    return tenant, ticket, None
+
+
+def _release_on_close(response, tenant, ticket):
+    # body stream còn chạy sau khi view trả về → nhả chỗ khi server gọi response.close()
+    close = response.close
+    released = []
+
+    def close_and_release():
+        try:
+            close()
+        finally:
+            if not released:
+                released.append(True)
+                ADMISSION.release(tenant, ticket)
+
+    response.close = close_and_release
+    return response
+
+
+@sync_and_async_middleware
+def admission_middleware(get_response):
+    def applies(request):
+        return ADMISSION is not None and request.path.startswith(PATH_PREFIXES)
+
+    if iscoroutinefunction(get_response):
+        # store sqlite là I/O chặn → chạy ngoài event loop; store memory chỉ lấy lock
+        if ADMISSION is not None and not isinstance(ADMISSION.store, MemoryAdmissionStore):
+            admit = sync_to_async(_admit, thread_sensitive=False)
+            release = sync_to_async(ADMISSION.release, thread_sensitive=False)
+        else:
+            async def admit(request):
+                return _admit(request)
+
+            async def release(tenant, ticket):
+                ADMISSION.release(tenant, ticket)
+
+        async def middleware(request):
+            if not applies(request):
+                return await get_response(request)
+            tenant, ticket, rejected = await admit(request)
+            if rejected is not None:
+                return rejected
+            try:
+                response = await get_response(request)
+            except BaseException:
+                await release(tenant, ticket)
+                raise
+            if response.streaming:
+                return _release_on_close(response, tenant, ticket)
+            await release(tenant, ticket)
+            return response
+    else:
+        def middleware(request):
+            if not applies(request):
+                return get_response(request)
+            tenant, ticket, rejected = _admit(request)
+            if rejected is not None:
+                return rejected
+            try:
+                response = get_response(request)
+            except BaseException:
+                ADMISSION.release(tenant, ticket)
+                raise
+            if response.streaming:
+                return _release_on_close(response, tenant, ticket)
+            ADMISSION.release(tenant, ticket)
+            return response
+    return middleware
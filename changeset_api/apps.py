@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ChangesetApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'changeset_api'
+
+    def ready(self):
+        from django.core.signals import request_finished
+        from bmms_changelet.metrics import set_enabled
+        from .config import CONFIG, RECORDER
+
+        set_enabled(getattr(settings, "BMMS_METRICS_ENABLED", False))
+
+        # ghi ChangeSet xuống DB sau khi response đã gửi, theo lô
+        if RECORDER is not None:
+            request_finished.connect(RECORDER.flush_if_due, dispatch_uid="bmms-store-flush")
+
+        interval = getattr(settings, "BMMS_CONFIG_RELOAD_INTERVAL", 0)
+        if interval:
+            CONFIG.start(interval)
@@ -0,0 +1,203 @@
+"""
+Async (ASGI) versions of normalize / validate / convert.
+
+Chạy trực tiếp trên event loop của uvicorn thay vì threadpool của DRF.
+Chỉ việc thuần CPU trên payload nhỏ (≤ BMMS_ASYNC_INLINE_MAX_BYTES) chạy
+inline; payload lớn, hoặc khi result cache / dedupe dùng backend sqlite (I/O
+chặn), được đẩy sang executor có giới hạn (BMMS_ASYNC_EXECUTOR_WORKERS thread,
+tối đa BMMS_ASYNC_MAX_PENDING việc chờ) để không chặn event loop. Batch được
+đọc + parse + validate từng chunk trong executor.
+"""
+import asyncio
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+
+from django.conf import settings
+import yaml
+from django.http import HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse
+
+from bmms_changelet.normalize_input import normalize
+from bmms_changelet.batch import iter_json_items, validate_item
+from bmms_changelet.result_cache import MemoryBackend
+
+from .config import CONFIG, NORMALIZE_DEDUPE, RESULT_CACHE, record_changeset
+from .parsers import YAMLRenderer, dumps, loads
+from .metrics import PARSE_SECONDS, RENDER_SECONDS, endpoint_of, record_verdict
+from .serializers import RawLLMSerializer
+from .views import record_batch_item, run_convert, run_validate, with_cache_status, with_config_version
+
+BATCH_CHUNK_SIZE = 64
+
+_EXECUTOR = ThreadPoolExecutor(
+    max_workers=getattr(settings, "BMMS_ASYNC_EXECUTOR_WORKERS", 4),
+    thread_name_prefix="bmms-async",
+)
+# Semaphore gắn với event loop, nên giữ một cái cho mỗi loop
+_PENDING = weakref.WeakKeyDictionary()
+
+
+def _pending_slots():
+    loop = asyncio.get_running_loop()
+    slots = _PENDING.get(loop)
+    if slots is None:
+        slots = _PENDING[loop] = asyncio.Semaphore(
+            getattr(settings, "BMMS_ASYNC_MAX_PENDING", 64)
+        )
+    return slots
+
+
+async def run_cpu(func, *args):
+    """Chạy func trong executor có giới hạn; chờ (backpressure) khi đầy."""
+    async with _pending_slots():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_EXECUTOR, partial(func, *args))
+
+
+def _in_memory(component):
+    """Result cache / dedupe tắt hoặc nằm trong bộ nhớ → không có I/O chặn."""
+    return component is None or isinstance(component.backend, MemoryBackend)
+
+
+def _is_heavy(request):
+    return len(request.body) > getattr(settings, "BMMS_ASYNC_INLINE_MAX_BYTES", 64 * 1024)
+
+
+async def _maybe_offload(request, components, func, *args):
+    """components: result cache / dedupe mà func dùng (recorder chỉ ghi buffer trong bộ nhớ)."""
+    if _is_heavy(request) or not all(_in_memory(c) for c in components):
+        return await run_cpu(func, *args)
+    return func(*args)
+
+
+def _wants_yaml(request):
+    # thương lượng theo q-value: "application/json, application/yaml;q=0.1" → JSON
+    preferred = request.get_preferred_type(["application/json", YAMLRenderer.media_type])
+    return preferred == YAMLRenderer.media_type
+
+
+def async_endpoint(view):
+    """POST-only, không kiểm tra CSRF (giống @api_view của DRF)."""
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "POST":
+            return HttpResponseNotAllowed(["POST"])
+        return await view(request, *args, **kwargs)
+
+    wrapper.csrf_exempt = True
+    wrapper.__name__ = view.__name__
+    wrapper.__doc__ = view.__doc__
+    return wrapper
+
+
+def _json_response(request, data, cfg, status=200):
+    with RENDER_SECONDS.time(endpoint=endpoint_of(request)):
+        response = HttpResponse(dumps(data), status=status, content_type="application/json")
+    return with_config_version(response, cfg)
+
+# ----------------------------
+# Parse + validate input (sync, chạy inline hoặc trong executor)
+# ----------------------------
+def _parse(body, endpoint):
+    try:
+        with PARSE_SECONDS.time(endpoint=endpoint):
+            return loads(body), None
+    except (UnicodeDecodeError, ValueError) as exc:
+        return None, {"detail": f"JSON parse error - {exc}"}
+
+
+def _normalize(body, cfg, endpoint):
+    data, errors = _parse(body, endpoint)
+    if errors is not None:
+        return None, errors
+    serializer = RawLLMSerializer(data=data)
+    if not serializer.is_valid():
+        return None, serializer.errors
+    normalized = normalize(serializer.validated_data, cfg.catalogue, dedupe=NORMALIZE_DEDUPE)
+    record_changeset("normalize", normalized, cfg)
+    return normalized, None
+
+
+def _validate(body, cfg, endpoint):
+    data, errors = _parse(body, endpoint)
+    if errors is not None:
+        return (400, errors), False
+    result, hit = run_validate(data, cfg)
+    record_verdict(endpoint, result["status"])
+    return (200, result), hit
+
+
+def _convert(body, cfg, endpoint):
+    data, errors = _parse(body, endpoint)
+    if errors is not None:
+        return (400, errors), False
+    return run_convert(data, cfg)
+
+# ----------------------------
+# Endpoints
+# ----------------------------
+@async_endpoint
+async def normalize_async_view(request):
+    cfg = CONFIG.current()
+    result, errors = await _maybe_offload(
+        request, (NORMALIZE_DEDUPE,), _normalize, request.body, cfg, endpoint_of(request)
+    )
+    if errors is not None:
+        return _json_response(request, errors, cfg, status=400)
+    return _json_response(request, result, cfg)
+
+
+@async_endpoint
+async def validate_async_view(request):
+    cfg = CONFIG.current()
+    (status, body), hit = await _maybe_offload(
+        request, (RESULT_CACHE,), _validate, request.body, cfg, endpoint_of(request)
+    )
+    return with_cache_status(_json_response(request, body, cfg, status=status), hit)
+
+
+@async_endpoint
+async def convert_async_view(request):
+    cfg = CONFIG.current()
+    (status, body), hit = await _maybe_offload(
+        request, (RESULT_CACHE,), _convert, request.body, cfg, endpoint_of(request)
+    )
+    if status == 200 and _wants_yaml(request):
+        with RENDER_SECONDS.time(endpoint=endpoint_of(request)):
+            content = yaml.safe_dump(body["values_json"], sort_keys=False, allow_unicode=True)
+        response = HttpResponse(content, content_type=YAMLRenderer.media_type)
+        return with_cache_status(with_config_version(response, cfg), hit)
+    return with_cache_status(_json_response(request, body, cfg, status=status), hit)
+
+
+def _validate_chunk(items, cfg, endpoint):
+    """Đọc + parse tối đa BATCH_CHUNK_SIZE item tiếp theo rồi validate; None khi hết."""
+    chunk = list(islice(items, BATCH_CHUNK_SIZE))
+    if not chunk:
+        return None
+    lines = []
+    for index, item in chunk:
+        res = validate_item(index, item, cfg.catalogue, cfg.schema)
+        record_batch_item(item, res, cfg)
+        record_verdict(endpoint, res["status"])
+        lines.append(dumps(res))
+    return b"\n".join(lines) + b"\n"
+
+
+@async_endpoint
+async def validate_batch_async_view(request):
+    """Giống /api/validate/batch/ nhưng validate từng chunk trong executor."""
+    cfg = CONFIG.current()
+    endpoint = endpoint_of(request)
+
+    async def results():
+        # đọc body cũng là I/O → generator chỉ được chạy trong executor, lần lượt từng chunk
+        items = iter_json_items(request)
+        while True:
+            lines = await run_cpu(_validate_chunk, items, cfg, endpoint)
+            if lines is None:
+                return
+            yield lines
+
+    response = StreamingHttpResponse(results(), content_type="application/x-ndjson")
+    return with_config_version(response, cfg)
@@ -0,0 +1,64 @@
+import threading
+
+from django.conf import settings
+
+from bmms_changelet.admission import build_admission_controller
+from bmms_changelet.config_store import ConfigStore
+from bmms_changelet.delta import ChangesetHistory, DeltaValidator
+from bmms_changelet.jobs import build_job_queue
+from bmms_changelet.normalize_input import build_dedupe_window
+from bmms_changelet.result_cache import build_result_cache
+
+from .store import build_recorder
+
+# Catalogue/schema/mapping dùng chung cho các view; reload nền trong apps.ready()
+CONFIG = ConfigStore()
+
+# Cache kết quả validate/convert theo nội dung changeset + config version (None = tắt)
+RESULT_CACHE = build_result_cache(getattr(settings, "BMMS_RESULT_CACHE", None))
+
+# Rate limit + giới hạn đồng thời theo tenant cho /api/ (None = tắt), xem admission.py
+ADMISSION = build_admission_controller(getattr(settings, "BMMS_ADMISSION", None))
+
+# Cùng raw payload gửi lại trong cửa sổ TTL → normalize trả ChangeSet cũ (None = tắt)
+NORMALIZE_DEDUPE = build_dedupe_window(getattr(settings, "BMMS_NORMALIZE_DEDUPE", None))
+
+# Lưu ChangeSet / kết quả xuống DB theo lô (None = tắt), xem store.py
+RECORDER = build_recorder(getattr(settings, "BMMS_STORE", None))
+
+
+def record_changeset(kind, changeset, cfg, validation=None, values=None):
+    if RECORDER is not None:
+        RECORDER.record(
+            kind, changeset, validation=validation, values=values,
+            catalogue=cfg.catalogue, config_version=cfg.version,
+        )
+
+# ----------------------------
+# Delta re-validation (/api/validate/delta/)
+# ----------------------------
+_DELTA_OPTIONS = getattr(settings, "BMMS_DELTA", None) or {}
+
+# ChangeSet đã validate, tra theo id để client gửi patch thay vì cả ChangeSet
+HISTORY = ChangesetHistory(max_size=_DELTA_OPTIONS.get("HISTORY_SIZE", 1000))
+
+_delta_lock = threading.Lock()
+_delta = (None, None)
+
+
+def delta_validator(cfg):
+    """DeltaValidator của config version hiện tại; config reload → dựng lại (cache verdict cũ bỏ đi)."""
+    global _delta
+    version, validator = _delta
+    if version == cfg.version:
+        return validator
+    with _delta_lock:
+        if _delta[0] != cfg.version:
+            _delta = (cfg.version, DeltaValidator(
+                cfg.catalogue, cfg.schema, max_entries=_DELTA_OPTIONS.get("MAX_CHANGES", 10000)
+            ))
+        return _delta[1]
+
+
+# Hàng đợi job cho batch lớn (/api/jobs/), None = tắt
+JOBS = build_job_queue(getattr(settings, "BMMS_JOBS", None), config_paths=CONFIG.paths)
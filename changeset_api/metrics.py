@@ -0,0 +1,163 @@
+"""
+HTTP metrics + endpoint /metrics (Prometheus text format).
+
+Số liệu giữ trong bộ nhớ của từng process (mỗi worker gunicorn/uvicorn
+một registry riêng). Khi BMMS_METRICS_ENABLED = False mọi timer/counter
+là no-op và /metrics trả 404.
+"""
+from asyncio import iscoroutinefunction
+from time import perf_counter
+
+from django.http import Http404, HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.decorators import sync_and_async_middleware
+
+from bmms_changelet.metrics import REGISTRY, is_enabled
+
+from .config import ADMISSION, CONFIG, JOBS, RESULT_CACHE
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "bmms_http_request_seconds",
+    "Thời gian xử lý request (tới khi có response, không gồm phần body stream).",
+    ("endpoint", "method", "code"),
+)
+PARSE_SECONDS = REGISTRY.histogram(
+    "bmms_http_parse_seconds",
+    "Thời gian parse body request.",
+    ("endpoint",),
+)
+RENDER_SECONDS = REGISTRY.histogram(
+    "bmms_http_render_seconds",
+    "Thời gian render body response.",
+    ("endpoint",),
+)
+VERDICTS_TOTAL = REGISTRY.counter(
+    "bmms_verdicts_total",
+    "Kết quả validate trả về cho client, theo endpoint (gồm cả cache hit).",
+    ("endpoint", "status"),
+)
+
+ADMITTED_TOTAL = REGISTRY.counter(
+    "bmms_admission_admitted_total",
+    "Request được nhận theo tenant (tenant ngoài TENANTS → \"other\").",
+    ("tenant",),
+)
+REJECTED_TOTAL = REGISTRY.counter(
+    "bmms_admission_rejected_total",
+    "Request bị từ chối (429) theo tenant và lý do (rate | concurrency).",
+    ("tenant", "reason"),
+)
+
+
+def endpoint_of(request):
+    if request is None:
+        return "unknown"
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        # response có trước khi URL được resolve (vd. 429 của admission) → tự resolve path
+        try:
+            match = resolve(request.path_info, getattr(request, "urlconf", None))
+        except Resolver404:
+            return "unknown"
+    return match.url_name or "unknown"
+
+
+def record_verdict(endpoint, status):
+    VERDICTS_TOTAL.inc(endpoint=endpoint, status=status)
+
+
+def count_verdicts(endpoint, results):
+    """Bọc iterator kết quả batch, đếm status từng item khi stream ra."""
+    for res in results:
+        record_verdict(endpoint, res["status"])
+        yield res
+
+
+def _observe(request, response, start):
+    REQUEST_SECONDS.observe(
+        perf_counter() - start,
+        endpoint=endpoint_of(request),
+        method=request.method,
+        code=str(response.status_code),
+    )
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not is_enabled():
+                return await get_response(request)
+            start = perf_counter()
+            response = await get_response(request)
+            _observe(request, response, start)
+            return response
+    else:
+        def middleware(request):
+            if not is_enabled():
+                return get_response(request)
+            start = perf_counter()
+            response = get_response(request)
+            _observe(request, response, start)
+            return response
+    return middleware
+
+
+# ----------------------------
+# Số liệu đọc lúc scrape
+# ----------------------------
+def _collect_config():
+    yield (
+        "bmms_config_info", "gauge", "Version catalogue/schema/mapping đang dùng.",
+        [({"version": CONFIG.version}, 1)],
+    )
+
+
+def _collect_result_cache():
+    stats = RESULT_CACHE.stats()
+    for key in ("hits", "misses", "bypassed"):
+        yield (
+            f"bmms_result_cache_{key}_total", "counter", f"Result cache: số lần {key}.",
+            [({}, stats[key])],
+        )
+    for key in ("entries", "size_bytes"):
+        yield (
+            f"bmms_result_cache_{key}", "gauge", f"Result cache: {key} hiện tại.",
+            [({}, stats[key])],
+        )
+
+
+def _collect_jobs():
+    yield (
+        "bmms_jobs", "gauge", "Số job trong hàng đợi /api/jobs/ theo trạng thái.",
+        [({"status": status}, count) for status, count in JOBS.stats().items()],
+    )
+
+
+def _collect_admission():
+    # tenant ngoài TENANTS gộp vào "other" (tenant do client tự đặt, không để số series tăng vô hạn)
+    counts = {}
+    for tenant, count in ADMISSION.inflight().items():
+        label = ADMISSION.label(tenant)
+        counts[label] = counts.get(label, 0) + count
+    yield (
+        "bmms_admission_inflight", "gauge", "Số request đang xử lý theo tenant.",
+        [({"tenant": label}, count) for label, count in sorted(counts.items())],
+    )
+
+
+REGISTRY.register_collector(_collect_config)
+if RESULT_CACHE is not None:
+    REGISTRY.register_collector(_collect_result_cache)
+if JOBS is not None:
+    REGISTRY.register_collector(_collect_jobs)
+if ADMISSION is not None:
+    REGISTRY.register_collector(_collect_admission)
+
+
+def metrics_view(request):
+    if not is_enabled():
+        raise Http404("Metrics are disabled")
+    return HttpResponse(REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
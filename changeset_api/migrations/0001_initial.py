@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangesetRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('changeset_id', models.CharField(blank=True, max_length=200)),
+                ('kind', models.CharField(max_length=16)),
+                ('tenant_id', models.CharField(blank=True, max_length=200)),
+                ('requested_by', models.CharField(blank=True, max_length=200)),
+                ('role', models.CharField(blank=True, max_length=64)),
+                ('intent', models.CharField(blank=True, max_length=200)),
+                ('status', models.CharField(blank=True, max_length=16)),
+                ('risk', models.CharField(blank=True, max_length=16)),
+                ('confidence', models.FloatField(null=True)),
+                ('timestamp', models.DateTimeField(null=True)),
+                ('created_at', models.DateTimeField()),
+                ('config_version', models.CharField(blank=True, max_length=64)),
+                ('changeset', models.JSONField()),
+                ('validation', models.JSONField(null=True)),
+                ('values', models.JSONField(null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tenant_id', 'status', '-id'], name='chg_tenant_status_idx'), models.Index(fields=['tenant_id', '-id'], name='chg_tenant_idx'), models.Index(fields=['status', '-id'], name='chg_status_idx'), models.Index(fields=['changeset_id', '-id'], name='chg_changeset_id_idx'), models.Index(fields=['timestamp'], name='chg_timestamp_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChangesetService',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('service', models.CharField(max_length=200)),
+                ('tenant_id', models.CharField(blank=True, max_length=200)),
+                ('status', models.CharField(blank=True, max_length=16)),
+                ('record', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='services', to='changeset_api.changesetrecord')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tenant_id', 'service', 'status', '-record'], name='chg_svc_tenant_idx'), models.Index(fields=['service', 'status', '-record'], name='chg_svc_status_idx'), models.Index(fields=['service', '-record'], name='chg_svc_idx')],
+            },
+        ),
+    ]
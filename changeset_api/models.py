@@ -1,3 +1,68 @@
 from django.db import models
 
-# Create your models here.
+
+class ChangesetRecord(models.Model):
+    """
+    Một ChangeSet đi qua API (normalize / validate / convert / pipeline / delta),
+    kèm kết quả validate và values đã sinh. Ghi theo lô (xem store.py), chỉ thêm
+    không sửa: cùng một ChangeSet gửi nhiều lần là nhiều record.
+
+    Phân trang keyset theo `id` giảm dần (mới nhất trước).
+    """
+
+    KINDS = ("normalize", "validate", "convert", "pipeline", "delta", "batch")
+
+    changeset_id = models.CharField(max_length=200, blank=True)
+    kind = models.CharField(max_length=16)
+    tenant_id = models.CharField(max_length=200, blank=True)
+    requested_by = models.CharField(max_length=200, blank=True)
+    role = models.CharField(max_length=64, blank=True)
+    intent = models.CharField(max_length=200, blank=True)
+    # validator status; rỗng nếu chưa validate (normalize, convert)
+    status = models.CharField(max_length=16, blank=True)
+    risk = models.CharField(max_length=16, blank=True)
+    confidence = models.FloatField(null=True)
+    # timestamp trong ChangeSet (null nếu thiếu / sai định dạng)
+    timestamp = models.DateTimeField(null=True)
+    created_at = models.DateTimeField()
+    config_version = models.CharField(max_length=64, blank=True)
+
+    changeset = models.JSONField()
+    validation = models.JSONField(null=True)
+    values = models.JSONField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["tenant_id", "status", "-id"], name="chg_tenant_status_idx"),
+            models.Index(fields=["tenant_id", "-id"], name="chg_tenant_idx"),
+            models.Index(fields=["status", "-id"], name="chg_status_idx"),
+            models.Index(fields=["changeset_id", "-id"], name="chg_changeset_id_idx"),
+            models.Index(fields=["timestamp"], name="chg_timestamp_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.changeset_id} ({self.kind}, {self.status or '-'})"
+
+
+class ChangesetService(models.Model):
+    """
+    Service mà một record tác động tới (từ `changes[].service`, theo id trong
+    catalogue nếu có), mỗi service một dòng cho mỗi record. Chép lại
+    tenant/status để truy vấn kiểu "requires_human của tenant X đụng tới
+    billing" chỉ quét một index.
+    """
+
+    record = models.ForeignKey(ChangesetRecord, on_delete=models.CASCADE, related_name="services")
+    service = models.CharField(max_length=200)
+    tenant_id = models.CharField(max_length=200, blank=True)
+    status = models.CharField(max_length=16, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["tenant_id", "service", "status", "-record"], name="chg_svc_tenant_idx"),
+            models.Index(fields=["service", "status", "-record"], name="chg_svc_status_idx"),
+            models.Index(fields=["service", "-record"], name="chg_svc_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.record_id}:{self.service}"
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from drf_yasg import openapi
+from drf_yasg.renderers import OpenAPIRenderer, SwaggerJSONRenderer, SwaggerYAMLRenderer
+
+from .config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+# renderer sinh spec (cache được); Swagger UI / ReDoc thì render như thường
+SPEC_RENDERERS = (OpenAPIRenderer, SwaggerJSONRenderer, SwaggerYAMLRenderer)
+
+# JSON Schema keyword → tham số của openapi.Schema (extra được đổi sang camelCase)
+_PASSTHROUGH = {
+    "title": "title",
+    "description": "description",
+    "format": "format",
+    "enum": "enum",
+    "pattern": "pattern",
+    "default": "default",
+    "minimum": "minimum",
+    "maximum": "maximum",
+    "minLength": "min_length",
+    "maxLength": "max_length",
+    "minItems": "min_items",
+    "maxItems": "max_items",
+}
+
+
+def json_schema_to_openapi(schema):
+    """
+    Chuyển JSON Schema (draft-07, tập con dùng trong changeset.schema.json)
+    thành openapi.Schema cho drf_yasg, để Swagger sinh thẳng từ schema.
+    """
+    kwargs = {"type": schema.get("type", openapi.TYPE_OBJECT)}
+    for key, arg in _PASSTHROUGH.items():
+        if key in schema:
+            kwargs[arg] = schema[key]
+    if "properties" in schema:
+        kwargs["properties"] = {
+            name: json_schema_to_openapi(sub) for name, sub in schema["properties"].items()
+        }
+    if "required" in schema:
+        kwargs["required"] = list(schema["required"])
+    if "items" in schema:
+        kwargs["items"] = json_schema_to_openapi(schema["items"])
+    additional = schema.get("additionalProperties")
+    if isinstance(additional, dict):
+        kwargs["additional_properties"] = json_schema_to_openapi(additional)
+    elif additional is not None:
+        kwargs["additional_properties"] = additional
+    return openapi.Schema(**kwargs)
+
+
+# Schema ChangeSet trong docs (@swagger_auto_schema ở views.py). Decorator giữ
+# tham chiếu tới object này từ lúc import, nên khi config reload nội dung được
+# thay tại chỗ (trước khi sinh spec) thay vì tạo object mới.
+CHANGESET_SCHEMA_DOC = openapi.Schema(type=openapi.TYPE_OBJECT)
+_doc_lock = threading.Lock()
+_doc_version = None
+
+
+def refresh_changeset_schema_doc(cfg=None):
+    global _doc_version
+    cfg = cfg or CONFIG.current()
+    if _doc_version == cfg.version:
+        return CHANGESET_SCHEMA_DOC
+    with _doc_lock:
+        if _doc_version != cfg.version:
+            fresh = json_schema_to_openapi(cfg.schema)
+            CHANGESET_SCHEMA_DOC.clear()
+            CHANGESET_SCHEMA_DOC.update(fresh)
+            _doc_version = cfg.version
+    return CHANGESET_SCHEMA_DOC
+
+
+refresh_changeset_schema_doc()
+
+
+# ----------------------------
+# Cache tài liệu OpenAPI đã render
+# ----------------------------
+class CachedSpec:
+    __slots__ = ("content", "etag")
+
+    def __init__(self, content):
+        self.content = content
+        self.etag = '"' + hashlib.sha256(content).hexdigest()[:32] + '"'
+
+
+class OpenAPICache:
+    """
+    Giữ spec đã render (bytes + ETag) theo (deploy version, config version,
+    format). Đổi version → bỏ các bản cũ. `directory` (tùy chọn) lưu thêm ra
+    đĩa để worker khác / lần khởi động sau dùng lại.
+    """
+
+    def __init__(self, deploy_version="", directory=None):
+        self.deploy_version = deploy_version
+        self.directory = Path(directory) if directory else None
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _file(self, key):
+        digest = hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()[:24]
+        return self.directory / f"openapi-{digest}"
+
+    def get_or_render(self, fmt, render, config_version=None):
+        key = [self.deploy_version, CONFIG.version if config_version is None else config_version, fmt]
+        spec = self._entries.get(tuple(key))
+        if spec is not None:
+            return spec
+        with self._lock:
+            spec = self._entries.get(tuple(key))
+            if spec is not None:
+                return spec
+            path = self._file(key) if self.directory else None
+            if path is not None and path.exists():
+                content = path.read_bytes()
+            else:
+                content = render()
+                if path is not None:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    tmp = path.with_name(path.name + f".tmp{os.getpid()}")
+                    tmp.write_bytes(content)
+                    os.replace(tmp, path)
+            spec = CachedSpec(content)
+            self._entries = {
+                k: v for k, v in self._entries.items() if list(k[:2]) == key[:2]
+            }
+            self._entries[tuple(key)] = spec
+            return spec
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+
+def build_openapi_cache(options):
+    """options: settings.BMMS_OPENAPI_CACHE ({"ENABLED", "DEPLOY_VERSION", "DIR"}); None = tắt."""
+    if not options or not options.get("ENABLED", True):
+        return None
+    return OpenAPICache(options.get("DEPLOY_VERSION", ""), options.get("DIR"))
+
+
+OPENAPI_CACHE = build_openapi_cache(getattr(settings, "BMMS_OPENAPI_CACHE", None))
+
+
+def cached_schema_view(schema_view, cache):
+    """
+    Bọc SchemaView của drf_yasg: spec JSON/YAML chỉ sinh một lần cho mỗi
+    version, các lần sau trả bytes đã render kèm ETag (304 nếu If-None-Match
+    khớp). Trang UI (swagger/redoc HTML) vẫn render như cũ, nó chỉ tải spec.
+    Spec luôn sinh từ schema ChangeSet của config hiện tại (kể cả khi tắt cache).
+    """
+    if cache is None:
+        class FreshSchemaView(schema_view):
+            def get(self, request, version="", format=None):
+                refresh_changeset_schema_doc()
+                return super().get(request, version, format)
+
+        return FreshSchemaView
+
+    class CachedSchemaView(schema_view):
+        def get(self, request, version="", format=None):
+            renderer = request.accepted_renderer
+            if not isinstance(renderer, SPEC_RENDERERS):
+                return super().get(request, version, format)
+            cfg = CONFIG.current()
+
+            def render():
+                refresh_changeset_schema_doc(cfg)
+                response = super(CachedSchemaView, self).get(request, version, format)
+                return renderer.render(
+                    response.data, request.accepted_media_type, self.get_renderer_context()
+                )
+
+            fmt = f"{request.version or version}:{renderer.format}"
+            spec = cache.get_or_render(fmt, render, cfg.version)
+            if spec.etag in request.headers.get("If-None-Match", ""):
+                response = HttpResponseNotModified()
+            else:
+                content_type = request.accepted_media_type
+                if renderer.charset:
+                    content_type += f"; charset={renderer.charset}"
+                response = HttpResponse(spec.content, content_type=content_type)
+            response["ETag"] = spec.etag
+            # cho phép client giữ bản cũ nhưng phải hỏi lại (If-None-Match)
+            response["Cache-Control"] = "no-cache"
+            return response
+
+    return CachedSchemaView
+
+
+def pregenerate_openapi(path="/swagger/"):
+    """
+    Sinh sẵn spec JSON lúc khởi động (wsgi/asgi) để request đầu không phải chờ.
+    Lỗi chỉ được log: worker vẫn khởi động, spec sẽ sinh ở request đầu tiên.
+    """
+    from django.test import RequestFactory
+    from django.urls import resolve
+
+    try:
+        host = next(
+            (h.lstrip(".") for h in settings.ALLOWED_HOSTS if h not in ("*", "")), "localhost"
+        )
+        request = RequestFactory().get(path, {"format": "openapi"}, HTTP_HOST=host)
+        return resolve(path).func(request)
+    except Exception:
+        logger.exception("Failed to pregenerate OpenAPI spec at %s", path)
+        return None
@@ -0,0 +1,102 @@
+"""
+Parser/renderer JSON (và YAML) cho DRF.
+
+Backend JSON chọn theo settings.BMMS_JSON_BACKEND: "orjson" nếu cài được
+(nhanh hơn json của stdlib nhiều lần), "stdlib", hoặc "auto" (mặc định:
+orjson nếu có, không thì stdlib). Parse/render đều ghi thời gian vào metrics.
+"""
+import json
+
+import yaml
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .metrics import PARSE_SECONDS, RENDER_SECONDS, endpoint_of
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson là optional
+    orjson = None
+
+
+def _backend():
+    name = getattr(settings, "BMMS_JSON_BACKEND", "auto")
+    if name == "auto":
+        return "orjson" if orjson is not None else "stdlib"
+    if name == "orjson" and orjson is None:
+        raise ImportError("BMMS_JSON_BACKEND = 'orjson' but orjson is not installed")
+    return name
+
+
+JSON_BACKEND = _backend()
+
+# ----------------------------
+# loads / dumps dùng chung (DRF views, async views)
+# ----------------------------
+# Kiểu orjson không tự serialize (Decimal, lazy string, ...) → encoder của DRF
+_fallback_default = JSONEncoder().default
+
+if JSON_BACKEND == "orjson":
+    def loads(data):
+        return orjson.loads(data)
+
+    def dumps(data):
+        """→ bytes UTF-8 (không escape non-ASCII)."""
+        return orjson.dumps(data, default=_fallback_default, option=orjson.OPT_NON_STR_KEYS)
+else:
+    def loads(data):
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data).decode("utf-8")
+        return json.loads(data)
+
+    def dumps(data):
+        return json.dumps(
+            data, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+
+
+def _timer(histogram, context):
+    # no-op khi metrics tắt
+    return histogram.time(endpoint=endpoint_of((context or {}).get("request")))
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser dùng backend nhanh; ghi thời gian vào bmms_http_parse_seconds."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        with _timer(PARSE_SECONDS, parser_context):
+            try:
+                return loads(stream.read())
+            except (ValueError, UnicodeDecodeError) as exc:
+                raise ParseError(f"JSON parse error - {exc}")
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer dùng backend nhanh; ghi thời gian vào bmms_http_render_seconds."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with _timer(RENDER_SECONDS, renderer_context):
+            if data is None:
+                return b""
+            # client xin indent (Accept: application/json; indent=4) → để DRF lo
+            if self.get_indent(accepted_media_type or "", renderer_context or {}):
+                return super().render(data, accepted_media_type, renderer_context)
+            return dumps(data)
+
+
+class YAMLRenderer(BaseRenderer):
+    """Render response dạng YAML (Accept: application/yaml)."""
+
+    media_type = "application/yaml"
+    format = "yaml"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with _timer(RENDER_SECONDS, renderer_context):
+            if data is None:
+                return b""
+            return yaml.safe_dump(data, sort_keys=False, allow_unicode=True).encode("utf-8")
+
@@ -0,0 +1,258 @@
+"""
+Lưu ChangeSet, kết quả validate và values đã sinh xuống DB (models.py).
+
+View chỉ đẩy record vào buffer trong bộ nhớ (không chạm DB trên đường xử lý
+request, dùng được cả từ async view). Buffer được ghi bằng bulk_create theo lô
+khi request kết thúc (signal request_finished, sau khi response đã gửi) nếu đủ
+BATCH_SIZE record hoặc record cũ nhất đã chờ quá MAX_DELAY giây, và khi process
+thoát. Endpoint truy vấn flush trước khi đọc.
+"""
+import atexit
+import logging
+import threading
+import time
+from datetime import timezone as dt_timezone
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ChangesetRecord, ChangesetService
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 500
+
+
+def _text(value, max_length=200):
+    return value[:max_length] if isinstance(value, str) else ""
+
+
+def _number(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+def parse_timestamp(value):
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        return None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def touched_services(changeset, catalogue=None):
+    """Service trong changes[] (theo id catalogue nếu tra được), không trùng, giữ thứ tự."""
+    changes = changeset.get("changes") if isinstance(changeset, dict) else None
+    out = []
+    for ch in changes if isinstance(changes, list) else ():
+        svc = ch.get("service") if isinstance(ch, dict) else None
+        if not isinstance(svc, str):
+            continue
+        found = catalogue.get(svc) if catalogue is not None else None
+        svc = _text(found["id"] if found is not None else svc)
+        if svc not in out:
+            out.append(svc)
+    return out
+
+
+def build_record(kind, changeset, validation=None, values=None, catalogue=None, config_version=""):
+    """→ (ChangesetRecord chưa lưu, list tên service)."""
+    data = changeset if isinstance(changeset, dict) else {}
+    ctx = data.get("request_context")
+    ctx = ctx if isinstance(ctx, dict) else {}
+    meta = data.get("metadata")
+    meta = meta if isinstance(meta, dict) else {}
+    status = validation.get("status") if isinstance(validation, dict) else None
+    record = ChangesetRecord(
+        changeset_id=_text(data.get("id")),
+        kind=kind,
+        tenant_id=_text(ctx.get("tenant_id")),
+        requested_by=_text(ctx.get("requested_by")),
+        role=_text(ctx.get("role"), 64),
+        intent=_text(data.get("intent")),
+        status=_text(status, 16),
+        risk=_text(meta.get("risk"), 16),
+        confidence=_number(meta.get("confidence")),
+        timestamp=parse_timestamp(data.get("timestamp")),
+        created_at=timezone.now(),
+        config_version=_text(config_version, 64),
+        # body `null` → {} (cột NOT NULL); giá trị không phải dict khác được giữ nguyên
+        changeset=changeset if changeset is not None else {},
+        validation=validation,
+        values=values,
+    )
+    return record, touched_services(changeset, catalogue)
+
+# ----------------------------
+# Ghi theo lô
+# ----------------------------
+class ChangesetRecorder:
+    def __init__(self, batch_size=200, max_delay=1.0):
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._pending = []
+        self._oldest = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def record(self, kind, changeset, validation=None, values=None, catalogue=None, config_version=""):
+        entry = build_record(kind, changeset, validation, values, catalogue, config_version)
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append(entry)
+
+    def due(self):
+        with self._lock:
+            return bool(self._pending) and (
+                len(self._pending) >= self.batch_size
+                or time.monotonic() - self._oldest >= self.max_delay
+            )
+
+    def flush_if_due(self, **kwargs):
+        # receiver của request_finished
+        if self.due():
+            self.flush()
+
+    def flush(self):
+        """
+        Ghi mọi record đang chờ; trả về số record đã ghi. Lô lỗi được ghi lại
+        từng record một, nên một record hỏng không làm mất cả lô; lỗi chỉ được log.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        written = 0
+        for start in range(0, len(pending), self.batch_size):
+            written += self._write(pending[start:start + self.batch_size])
+        return written
+
+    def _write(self, entries):
+        try:
+            self._insert(entries)
+        except Exception:
+            logger.warning("Batch insert of %d changeset records failed, retrying one by one", len(entries))
+        else:
+            return len(entries)
+        written = 0
+        for entry in entries:
+            entry[0].pk = None  # lô bị rollback
+            try:
+                self._insert([entry])
+            except Exception:
+                logger.exception("Failed to persist changeset record %r", entry[0].changeset_id)
+            else:
+                written += 1
+        return written
+
+    @staticmethod
+    def _insert(entries):
+        with transaction.atomic():
+            ChangesetRecord.objects.bulk_create([record for record, _ in entries])
+            ChangesetService.objects.bulk_create([
+                ChangesetService(
+                    record=record, service=service,
+                    tenant_id=record.tenant_id, status=record.status,
+                )
+                for record, services in entries
+                for service in services
+            ])
+
+
+def build_recorder(options):
+    """options (dict, thường từ settings.BMMS_STORE): ENABLED, BATCH_SIZE, MAX_DELAY."""
+    options = options or {}
+    if not options.get("ENABLED", False):
+        return None
+    recorder = ChangesetRecorder(
+        batch_size=options.get("BATCH_SIZE", 200), max_delay=options.get("MAX_DELAY", 1.0)
+    )
+    atexit.register(recorder.flush)
+    return recorder
+
+# ----------------------------
+# Truy vấn (keyset theo id giảm dần)
+# ----------------------------
+def query_records(tenant=None, service=None, status=None, changeset_id=None, kind=None,
+                  since=None, until=None, cursor=None, limit=50):
+    """
+    Trả về (list ChangesetRecord, cursor trang sau | None). cursor là id của
+    record cuối trang trước: mỗi trang là một lần quét index từ vị trí đó,
+    không OFFSET, nên trang thứ n nhanh như trang đầu.
+    """
+    record_filters = {}
+    if changeset_id:
+        record_filters["changeset_id"] = changeset_id
+    if kind:
+        record_filters["kind"] = kind
+    if since is not None:
+        record_filters["timestamp__gte"] = since
+    if until is not None:
+        record_filters["timestamp__lt"] = until
+
+    if service:
+        # đi qua bảng service: (tenant_id, service, status, record) nằm trong một index
+        qs = ChangesetService.objects.filter(service=service)
+        if tenant:
+            qs = qs.filter(tenant_id=tenant)
+        if status is not None:
+            qs = qs.filter(status=status)
+        if cursor is not None:
+            qs = qs.filter(record_id__lt=cursor)
+        if record_filters:
+            qs = qs.filter(**{f"record__{k}": v for k, v in record_filters.items()})
+        ids = list(qs.order_by("-record_id").values_list("record_id", flat=True)[:limit + 1])
+        page = ChangesetRecord.objects.filter(id__in=ids[:limit]).order_by("-id")
+        records, more = list(page.prefetch_related("services")), len(ids) > limit
+    else:
+        qs = ChangesetRecord.objects.filter(**record_filters)
+        if tenant:
+            qs = qs.filter(tenant_id=tenant)
+        if status is not None:
+            qs = qs.filter(status=status)
+        if cursor is not None:
+            qs = qs.filter(id__lt=cursor)
+        records = list(qs.order_by("-id").prefetch_related("services")[:limit + 1])
+        records, more = records[:limit], len(records) > limit
+    return records, (records[-1].id if more and records else None)
+
+
+# status của ChangeSet đã qua validate, dùng được làm base cho delta
+BASE_STATUSES = ("validated", "requires_human")
+
+
+def latest_changeset(changeset_id):
+    """
+    ChangeSet mới nhất đã validate thành công với id này (None nếu không có).
+    Record của normalize/convert (status rỗng, kể cả payload convert đã từ chối)
+    không được dùng làm base.
+    """
+    record = (
+        ChangesetRecord.objects.filter(changeset_id=changeset_id, status__in=BASE_STATUSES)
+        .order_by("-id").only("changeset").first()
+    )
+    return None if record is None else record.changeset
+
+
+def serialize_record(record):
+    return {
+        "id": record.id,
+        "changeset_id": record.changeset_id,
+        "kind": record.kind,
+        "tenant_id": record.tenant_id,
+        "status": record.status,
+        "services": [s.service for s in record.services.all()],
+        "timestamp": record.timestamp.isoformat() if record.timestamp else None,
+        "created_at": record.created_at.isoformat(),
+        "config_version": record.config_version,
+        "changeset": record.changeset,
+        "validation": record.validation,
+        "values": record.values,
+    }
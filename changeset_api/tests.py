@@ -1,3 +1,505 @@
+import json
+from pathlib import Path
+
 from django.test import TestCase
 
-# Create your tests here.
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def load_changeset(name="test1.json"):
+    with open(BASE_DIR / "tests" / "changesets" / name, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def tearDownModule():
+    # record còn trong buffer phải vào DB test, không để atexit ghi vào db.sqlite3 thật
+    from .config import RECORDER
+
+    if RECORDER is not None:
+        RECORDER.flush()
+
+
+def read_ndjson(response):
+    body = b"".join(response.streaming_content).decode("utf-8")
+    return [json.loads(line) for line in body.splitlines()]
+
+
+class ValidateBatchTests(TestCase):
+    def test_ndjson_batch_keeps_index_of_bad_lines(self):
+        good = load_changeset()
+        body = "\n".join([json.dumps(good), "{not json", json.dumps({"id": "x"})])
+        response = self.client.post(
+            "/api/validate/batch/", data=body, content_type="application/x-ndjson"
+        )
+        self.assertEqual(response.status_code, 200)
+        results = read_ndjson(response)
+        self.assertEqual([r["index"] for r in results], [0, 1, 2])
+        self.assertEqual(results[0]["status"], "validated")
+        self.assertEqual(results[1]["status"], "rejected")
+        self.assertEqual(results[2]["status"], "rejected")
+
+    def test_json_array_batch(self):
+        good = load_changeset()
+        response = self.client.post(
+            "/api/validate/batch/", data=json.dumps([good, good]), content_type="application/json"
+        )
+        results = read_ndjson(response)
+        self.assertEqual([r["status"] for r in results], ["validated", "validated"])
+
+
+class ConfigVersionTests(TestCase):
+    def test_validate_exposes_config_version(self):
+        from .config import CONFIG
+
+        response = self.client.post(
+            "/api/validate/", data=load_changeset(), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Config-Version"], CONFIG.version)
+
+
+class AsyncEndpointTests(TestCase):
+    async def test_async_validate_matches_sync(self):
+        changeset = load_changeset()
+        sync = await self.async_client.post(
+            "/api/validate/", data=changeset, content_type="application/json"
+        )
+        response = await self.async_client.post(
+            "/api/async/validate/", data=changeset, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), sync.json())
+        self.assertIn("X-Config-Version", response)
+
+    async def test_async_convert_rejects_bad_payload(self):
+        response = await self.async_client.post(
+            "/api/async/convert/", data={"intent": "x"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(any("'changes' is a required property" in e for e in response.json()["errors"]))
+
+    async def test_async_batch_offloads_to_executor(self):
+        changeset = load_changeset()
+        response = await self.async_client.post(
+            "/api/async/validate/batch/",
+            data=json.dumps([changeset] * 100),
+            content_type="application/json",
+        )
+        chunks = [chunk async for chunk in response.streaming_content]
+        results = [json.loads(line) for line in b"".join(chunks).decode("utf-8").splitlines()]
+        self.assertEqual([r["index"] for r in results], list(range(100)))
+
+    async def test_sqlite_backed_cache_is_never_used_inline(self):
+        from unittest import mock
+
+        from bmms_changelet.result_cache import ResultCache, SQLiteBackend
+
+        from . import async_views
+
+        cache = ResultCache(SQLiteBackend(":memory:"))
+        offloaded = []
+
+        async def run_cpu(func, *args):
+            offloaded.append(func.__name__)
+            return func(*args)
+
+        with mock.patch.object(async_views, "RESULT_CACHE", cache), \
+                mock.patch.object(async_views, "run_cpu", run_cpu):
+            await self.async_client.post(
+                "/api/async/validate/", data=load_changeset(), content_type="application/json"
+            )
+        self.assertEqual(offloaded, ["_validate"])
+
+
+class PipelineTests(TestCase):
+    def load_raw(self):
+        with open(BASE_DIR / "tests" / "llm_output" / "test1_raw.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_pipeline_returns_all_stages(self):
+        response = self.client.post("/api/pipeline/", data=self.load_raw(), content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["changeset"]["changes"][0]["service"], "catalogue")
+        self.assertEqual(body["validation"]["status"], "validated")
+        self.assertEqual(body["values"]["catalogue"]["subscription_type"], "monthly")
+
+    def test_pipeline_skips_convert_when_rejected(self):
+        raw = self.load_raw()
+        raw["changeset"]["model"] = "does_not_exist"
+        response = self.client.post("/api/pipeline/", data=raw, content_type="application/json")
+        body = response.json()
+        self.assertEqual(body["validation"]["status"], "rejected")
+        self.assertIsNone(body["values"])
+
+
+class SchemaFastPathTests(TestCase):
+    def test_validate_reports_schema_errors_without_serializer(self):
+        changeset = load_changeset()
+        changeset["unexpected"] = True
+        del changeset["intent"]
+        response = self.client.post("/api/validate/", data=changeset, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["status"], "rejected")
+        self.assertEqual(len(body["errors"]), 2)
+
+    def test_convert_returns_400_on_schema_errors(self):
+        response = self.client.post("/api/convert/", data={"intent": "x"}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json()["errors"])
+
+    def test_swagger_request_body_comes_from_json_schema(self):
+        response = self.client.get("/swagger/?format=openapi")
+        self.assertEqual(response.status_code, 200)
+        spec = response.json()
+        body = next(p for p in spec["paths"]["/validate/"]["post"]["parameters"] if p["in"] == "body")
+        self.assertEqual(body["schema"]["properties"]["metadata"]["properties"]["risk"]["enum"],
+                         ["low", "medium", "high", "critical"])
+        self.assertEqual(body["schema"]["properties"]["changes"]["minItems"], 1)
+
+
+class ResultCacheTests(TestCase):
+    def test_retry_with_new_id_hits_cache(self):
+        from .config import RESULT_CACHE
+
+        RESULT_CACHE.clear()
+        changeset = load_changeset()
+        first = self.client.post("/api/validate/", data=changeset, content_type="application/json")
+        changeset["id"] = "chg-retry-2"
+        changeset["timestamp"] = "2025-09-18T00:00:00Z"
+        second = self.client.post("/api/validate/", data=changeset, content_type="application/json")
+        self.assertEqual(first["X-Result-Cache"], "miss")
+        self.assertEqual(second["X-Result-Cache"], "hit")
+        self.assertEqual(first.json(), second.json())
+
+
+class MetricsTests(TestCase):
+    def test_metrics_endpoint_exposes_stages_and_verdicts(self):
+        self.client.post(
+            "/api/validate/", data=json.dumps(load_changeset()), content_type="application/json"
+        )
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        text = response.content.decode("utf-8")
+        self.assertIn('bmms_verdicts_total{endpoint="validate",status="validated"}', text)
+        self.assertIn('bmms_http_request_seconds_count{endpoint="validate",method="POST",code="200"}', text)
+        self.assertIn('bmms_http_parse_seconds_count{endpoint="validate"}', text)
+        self.assertIn('bmms_http_render_seconds_count{endpoint="validate"}', text)
+        self.assertIn("bmms_config_info{version=", text)
+        self.assertIn("bmms_result_cache_misses_total", text)
+
+
+class OpenAPICacheTests(TestCase):
+    def test_spec_is_cached_with_etag(self):
+        from .openapi import OPENAPI_CACHE
+
+        OPENAPI_CACHE.clear()
+        first = self.client.get("/swagger/?format=openapi")
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+        second = self.client.get("/redoc/?format=openapi")
+        self.assertEqual(second["ETag"], etag)
+        self.assertEqual(second.content, first.content)
+
+        not_modified = self.client.get("/swagger/?format=openapi", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b"")
+        # spec không gắn host → dùng được cho mọi host phục vụ nó
+        self.assertNotIn("host", json.loads(first.content))
+
+    def test_ui_page_still_renders(self):
+        self.assertEqual(self.client.get("/swagger/").status_code, 200)
+
+    def test_config_reload_regenerates_schema_doc(self):
+        import copy
+        from unittest import mock
+
+        from bmms_changelet.config_store import ConfigSnapshot
+
+        from .config import CONFIG
+        from .openapi import OPENAPI_CACHE, pregenerate_openapi, refresh_changeset_schema_doc
+
+        OPENAPI_CACHE.clear()
+        old = CONFIG.current()
+        first = self.client.get("/swagger/?format=openapi")
+        schema = copy.deepcopy(old.schema)
+        schema["properties"]["rollout_window"] = {"type": "string"}
+        new = ConfigSnapshot(old.version + "-new", old.catalogue, schema, old.mapping, old.file_hashes)
+        try:
+            with mock.patch.object(type(CONFIG), "version", property(lambda self: new.version)), \
+                    mock.patch.object(CONFIG, "current", return_value=new):
+                second = self.client.get("/swagger/?format=openapi")
+        finally:
+            refresh_changeset_schema_doc(old)
+            OPENAPI_CACHE.clear()
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertNotIn(b"rollout_window", first.content)
+        self.assertIn(b"rollout_window", second.content)
+
+        with mock.patch("django.urls.resolve", side_effect=RuntimeError("boom")), \
+                self.assertLogs("changeset_api.openapi", level="ERROR"):
+            self.assertIsNone(pregenerate_openapi())
+
+
+class ConvertNegotiationTests(TestCase):
+    def test_json_by_default(self):
+        response = self.client.post(
+            "/api/convert/", data=load_changeset(), content_type="application/json"
+        )
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(list(response.json()), ["values_json"])
+
+    def test_yaml_when_requested(self):
+        import yaml
+
+        response = self.client.post(
+            "/api/convert/", data=load_changeset(), content_type="application/json",
+            HTTP_ACCEPT="application/yaml",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("application/yaml"))
+        json_response = self.client.post(
+            "/api/convert/", data=load_changeset(), content_type="application/json"
+        )
+        self.assertEqual(yaml.safe_load(response.content), json_response.json()["values_json"])
+
+    async def test_async_convert_negotiates_too(self):
+        response = await self.async_client.post(
+            "/api/async/convert/", data=load_changeset(), content_type="application/json",
+            headers={"Accept": "application/yaml"},
+        )
+        self.assertEqual(response["Content-Type"], "application/yaml")
+        response = await self.async_client.post(
+            "/api/async/convert/", data=load_changeset(), content_type="application/json",
+            headers={"Accept": "application/json, application/yaml;q=0.1"},
+        )
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertIn("values_json", response.json())
+
+
+class DeltaValidateTests(TestCase):
+    def post(self, url, data):
+        return self.client.post(url, data=data, content_type="application/json")
+
+    def test_patch_revalidates_previous_changeset(self):
+        changeset = load_changeset()
+        changeset["id"] = "chg-delta-api"
+        changeset["changes"].append({"action": "enable", "service": "order"})
+        first = self.post("/api/validate/", changeset).json()
+        self.assertEqual(first["status"], "requires_human")
+
+        response = self.post("/api/validate/delta/", {
+            "base_id": "chg-delta-api",
+            "patch": [{"op": "replace", "path": "/changes/1/action", "value": "scale"}],
+        })
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["reused_changes"], 1)
+        self.assertEqual(body["changeset"]["changes"][1]["action"], "scale")
+        full = self.post("/api/validate/", body["changeset"]).json()
+        self.assertEqual(body["validation"], full)
+        self.assertEqual(body["validation"]["status"], "validated")
+
+    def test_unknown_base_and_bad_patch(self):
+        response = self.post("/api/validate/delta/", {"base_id": "chg-missing", "patch": []})
+        self.assertEqual(response.status_code, 404)
+
+        self.post("/api/validate/", load_changeset())
+        response = self.post("/api/validate/delta/", {
+            "base_id": load_changeset()["id"],
+            "patch": [{"op": "remove", "path": "/changes/7"}],
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("errors", response.json())
+
+    def test_rejected_payload_does_not_replace_base(self):
+        changeset = load_changeset()
+        changeset["id"] = "chg-delta-keep"
+        self.post("/api/validate/", changeset)
+        bad = {"id": "chg-delta-keep", "changes": "nope"}
+        self.assertEqual(self.post("/api/validate/", bad).json()["status"], "rejected")
+
+        response = self.post("/api/validate/delta/", {"base_id": "chg-delta-keep", "patch": []})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["changeset"], changeset)
+
+        from .config import HISTORY
+
+        HISTORY._items.pop("chg-delta-keep")  # fallback sang DB cũng bỏ qua bản rejected
+        response = self.post("/api/validate/delta/", {"base_id": "chg-delta-keep", "patch": []})
+        self.assertEqual(response.json()["changeset"], changeset)
+
+    def test_converted_payload_is_not_a_base(self):
+        bad = load_changeset()
+        bad["id"] = "chg-delta-convert"
+        bad["changes"][0]["config"] = None
+        self.assertEqual(self.post("/api/convert/", bad).status_code, 400)
+
+        response = self.post("/api/validate/delta/", {"base_id": "chg-delta-convert", "patch": []})
+        self.assertEqual(response.status_code, 404)
+
+
+class ChangesetStoreTests(TestCase):
+    def setUp(self):
+        from .config import RECORDER
+
+        RECORDER.flush()
+
+    def submit(self, tenant, services, risk="low"):
+        changeset = load_changeset()
+        changeset["id"] = f"chg-{tenant}-{'-'.join(services)}-{risk}"
+        changeset["request_context"]["tenant_id"] = tenant
+        changeset["metadata"]["risk"] = risk
+        changeset["changes"] = [{"action": "update", "service": s} for s in services]
+        return self.client.post("/api/validate/", data=changeset, content_type="application/json").json()
+
+    def test_query_by_tenant_service_status_with_keyset_pages(self):
+        from .models import ChangesetRecord, ChangesetService
+
+        self.submit("acme", ["billing", "order"], risk="high")
+        self.submit("acme", ["billing"], risk="critical")
+        self.submit("acme", ["billing"])
+        self.submit("other", ["billing"], risk="high")
+        self.submit("acme", ["payment"], risk="high")
+
+        response = self.client.get(
+            "/api/changesets/", {"tenant": "acme", "service": "billing", "status": "requires_human", "limit": 1}
+        )
+        page = response.json()
+        self.assertEqual(ChangesetRecord.objects.count(), 5)
+        self.assertEqual(ChangesetService.objects.filter(service="billing").count(), 4)
+        self.assertEqual([r["changeset_id"] for r in page["results"]], ["chg-acme-billing-critical"])
+        self.assertEqual(page["results"][0]["services"], ["billing"])
+        self.assertEqual(page["results"][0]["validation"]["status"], "requires_human")
+
+        second = self.client.get(page["next"]).json()
+        self.assertEqual([r["changeset_id"] for r in second["results"]], ["chg-acme-billing-order-high"])
+        self.assertIsNone(second["next"])
+
+        tenant_only = self.client.get("/api/changesets/", {"tenant": "acme"}).json()
+        self.assertEqual(len(tenant_only["results"]), 4)
+        self.assertIsNone(tenant_only["next"])
+
+    def test_pipeline_stores_values_and_bad_params_are_rejected(self):
+        raw = json.loads((BASE_DIR / "tests" / "llm_output" / "test1_raw.json").read_text(encoding="utf-8"))
+        result = self.client.post("/api/pipeline/", data=raw, content_type="application/json").json()
+        stored = self.client.get("/api/changesets/", {"kind": "pipeline"}).json()["results"]
+        self.assertEqual(stored[0]["values"], result["values"])
+        self.assertEqual(stored[0]["changeset"], result["changeset"])
+
+        self.assertEqual(self.client.get("/api/changesets/", {"limit": 0}).status_code, 400)
+        self.assertEqual(self.client.get("/api/changesets/", {"since": "yesterday"}).status_code, 400)
+
+    def test_null_body_and_bad_records_do_not_drop_the_batch(self):
+        from .config import RECORDER
+        from .models import ChangesetRecord
+        from .store import ChangesetRecorder
+
+        before = ChangesetRecord.objects.count()
+        self.client.post("/api/validate/", data="null", content_type="application/json")
+        self.submit("acme", ["billing"])
+        RECORDER.flush()
+        self.assertEqual(ChangesetRecord.objects.count(), before + 2)
+
+        recorder = ChangesetRecorder(batch_size=10)
+        recorder.record("validate", load_changeset())
+        recorder.record("validate", load_changeset())
+        recorder._pending[0][0].changeset = None  # record hỏng → lô lỗi, ghi lại từng record
+        with self.assertLogs("changeset_api.store", level="WARNING"):
+            self.assertEqual(recorder.flush(), 1)
+        self.assertEqual(ChangesetRecord.objects.count(), before + 3)
+
+
+class JobTests(TestCase):
+    def test_submit_poll_and_stream(self):
+        items = [load_changeset(), {"id": "bad"}]
+        response = self.client.post(
+            "/api/jobs/", data={"kind": "validate", "items": items}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["job_id"]
+        self.assertTrue(response["Location"].endswith(f"/api/jobs/{job_id}/"))
+
+        stream = read_ndjson(self.client.get(f"/api/jobs/{job_id}/stream/"))
+        self.assertEqual([line.get("index") for line in stream[:-1]], [0, 1])
+        self.assertEqual(stream[-1]["job"]["status"], "succeeded")
+
+        polled = self.client.get(f"/api/jobs/{job_id}/", {"offset": 1}).json()
+        self.assertEqual(polled["done"], 2)
+        self.assertEqual(polled["results"], stream[1:-1])
+
+    def test_bad_requests_and_unknown_jobs(self):
+        response = self.client.post(
+            "/api/jobs/", data={"kind": "explode", "items": []}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get("/api/jobs/job-missing/").status_code, 404)
+        self.assertEqual(self.client.delete("/api/jobs/job-missing/").status_code, 404)
+
+
+class AdmissionTests(TestCase):
+    def test_rate_limit_returns_429_with_retry_after(self):
+        from unittest import mock
+
+        from bmms_changelet.admission import AdmissionController
+
+        changeset = load_changeset()
+        tenant = changeset["request_context"]["tenant_id"]
+        controller = AdmissionController(rate=0.5, burst=1, concurrency=4, tenants={tenant: {}})
+        with mock.patch("changeset_api.admission.ADMISSION", controller):
+            first = self.client.post("/api/validate/", data=changeset, content_type="application/json")
+            second = self.client.post("/api/validate/", data=changeset, content_type="application/json")
+            other = self.client.post(
+                "/api/validate/", data=changeset, content_type="application/json",
+                headers={"X-Tenant-ID": "tenant-other"},
+            )
+            again = self.client.post(
+                "/api/validate/", data=changeset, content_type="application/json",
+                headers={"X-Tenant-ID": "tenant-other"},
+            )
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 429)
+        self.assertEqual(second["Retry-After"], "2")
+        self.assertEqual(second.json()["reason"], "rate")
+        self.assertEqual(other.status_code, 200)
+        self.assertEqual(again.status_code, 429)
+        self.assertEqual(controller.inflight(), {})
+
+        text = self.client.get("/metrics").content.decode("utf-8")
+        self.assertIn(f'bmms_admission_rejected_total{{tenant="{tenant}",reason="rate"}}', text)
+        # tenant không khai báo → nhãn "other"
+        self.assertIn('bmms_admission_rejected_total{tenant="other",reason="rate"}', text)
+        self.assertNotIn('tenant="tenant-other"', text)
+        # 429 trả trước khi URL được resolve vẫn có nhãn endpoint
+        self.assertIn('bmms_http_request_seconds_count{endpoint="validate",method="POST",code="429"} 2', text)
+
+    def test_unlabeled_clients_get_separate_buckets(self):
+        from unittest import mock
+
+        from bmms_changelet.admission import AdmissionController
+
+        controller = AdmissionController(rate=0.5, burst=1, concurrency=4)
+        with mock.patch("changeset_api.admission.ADMISSION", controller):
+            codes = [
+                self.client.get("/api/changesets/", REMOTE_ADDR=addr).status_code
+                for addr in ("10.0.0.1", "10.0.0.2", "10.0.0.1")
+            ]
+        self.assertEqual(codes, [200, 200, 429])
+
+    def test_streaming_response_releases_slot_on_close(self):
+        from unittest import mock
+
+        from bmms_changelet.admission import AdmissionController
+
+        controller = AdmissionController(rate=0, concurrency=1)
+        body = "\n".join(json.dumps(load_changeset()) for _ in range(3))
+        with mock.patch("changeset_api.admission.ADMISSION", controller):
+            response = self.client.post(
+                "/api/validate/batch/", data=body, content_type="application/x-ndjson",
+                headers={"X-Tenant-ID": "t1"},
+            )
+            self.assertEqual(len(read_ndjson(response)), 3)
+            response.close()
+            self.assertEqual(controller.inflight(), {})
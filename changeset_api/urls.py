@@ -1,8 +1,21 @@
 from django.urls import path
-from . import views
+from . import views, async_views
 
 urlpatterns = [
     path('normalize/', views.normalize_view, name='normalize'),
     path('validate/', views.validate_view, name='validate'),
+    path('validate/delta/', views.validate_delta_view, name='validate-delta'),
+    path('validate/batch/', views.validate_batch_view, name='validate-batch'),
     path('convert/', views.convert_view, name='convert'),
+    path('pipeline/', views.pipeline_view, name='pipeline'),
+    path('changesets/', views.changesets_view, name='changesets'),
+    path('jobs/', views.jobs_view, name='jobs'),
+    path('jobs/<str:job_id>/', views.job_detail_view, name='job-detail'),
+    path('jobs/<str:job_id>/stream/', views.job_stream_view, name='job-stream'),
+
+    # async (ASGI) endpoints, chạy trên event loop của uvicorn
+    path('async/normalize/', async_views.normalize_async_view, name='normalize-async'),
+    path('async/validate/', async_views.validate_async_view, name='validate-async'),
+    path('async/validate/batch/', async_views.validate_batch_async_view, name='validate-batch-async'),
+    path('async/convert/', async_views.convert_async_view, name='convert-async'),
 ]
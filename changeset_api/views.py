@@ -1,21 +1,109 @@
-from rest_framework.decorators import api_view
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import api_view, renderer_classes
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-import yaml
 
 # import serializers
-from .serializers import RawLLMSerializer, ChangeSetSerializer
+from .serializers import RawLLMSerializer
+from .openapi import CHANGESET_SCHEMA_DOC
+from .parsers import YAMLRenderer, dumps
 
 # import core logic từ src/bmms_changelet
 from bmms_changelet.normalize_input import normalize
-from bmms_changelet.validator import validate_changeset, load_catalogue, load_schema
-from bmms_changelet.convert_to_helm import convert, load_mapping
+from bmms_changelet.validator import validate_schema_instance
+from bmms_changelet.convert_to_helm import convert
+from bmms_changelet.batch import ItemError, iter_json_items, iter_ndjson_lines, validate_item
+from bmms_changelet.pipeline import process_raw
+from bmms_changelet.json_patch import JsonPatchError
+from bmms_changelet.jobs import JOB_KINDS, QueueFull
 
-# preload schema & catalogue
-CATALOGUE = load_catalogue()
-SCHEMA = load_schema()
-MAPPING = load_mapping()
+# catalogue/schema/mapping được reload nền, xem changeset_api/config.py
+from .config import (
+    CONFIG, HISTORY, JOBS, NORMALIZE_DEDUPE, RECORDER, RESULT_CACHE, delta_validator, record_changeset,
+)
+from .store import MAX_PAGE_SIZE, latest_changeset, parse_timestamp, query_records, serialize_record
+from .metrics import count_verdicts, endpoint_of, record_verdict
+
+CONFIG_VERSION_HEADER = "X-Config-Version"
+RESULT_CACHE_HEADER = "X-Result-Cache"
+
+
+def with_config_version(response, cfg):
+    response[CONFIG_VERSION_HEADER] = cfg.version
+    return response
+
+
+def with_cache_status(response, hit):
+    if RESULT_CACHE is not None:
+        response[RESULT_CACHE_HEADER] = "hit" if hit else "miss"
+    return response
+
+
+def _cached(kind, data, cfg, compute):
+    if RESULT_CACHE is None:
+        return compute(), False
+    return RESULT_CACHE.get_or_compute(kind, data, cfg.schema, cfg.version, compute)
+
+
+def run_validate(data, cfg):
+    """
+    validate_changeset qua result cache. Trả về (result, cache_hit).
+    Validate qua DeltaValidator (cùng kết quả) để verdict từng change được
+    cache sẵn cho /api/validate/delta/; ChangeSet không bị rejected được lưu
+    theo id làm base cho delta.
+    """
+    result, hit = _cached(
+        "validate", data, cfg, lambda: delta_validator(cfg).validate(data)[0]
+    )
+    remember_base(data, result)
+    record_changeset("validate", data, cfg, validation=result)
+    return result, hit
+
+
+def remember_base(changeset, result):
+    # payload bị rejected không được ghi đè base tốt cùng id (id do client tự đặt).
+    # request data không bị sửa sau bước này → HISTORY giữ luôn object, không deepcopy
+    if result.get("status") != "rejected":
+        HISTORY.put(changeset, copy_data=False)
+
+
+def run_convert(data, cfg):
+    """
+    Schema check + convert qua result cache.
+    Trả về ((http_status, body), cache_hit); body = {"values_json": values}.
+    Chưa render gì ở đây: view render đúng một định dạng client yêu cầu.
+    """
+    def compute():
+        ok, errors = validate_schema_instance(data, cfg.schema)
+        if not ok:
+            return 400, {"errors": errors}
+        return 200, {"values_json": convert(data, cfg.mapping)}
+
+    (status, body), hit = _cached("convert", data, cfg, compute)
+    record_changeset("convert", data, cfg, values=body.get("values_json"))
+    return (status, body), hit
+
+
+def record_batch_item(item, res, cfg):
+    """Lưu một item của batch validate (bỏ qua dòng không parse được)."""
+    if not isinstance(item, ItemError):
+        validation = {k: v for k, v in res.items() if k not in ("index", "id")}
+        record_changeset("batch", item, cfg, validation=validation)
+
+
+def iter_validate_recorded(items, cfg):
+    for index, item in items:
+        res = validate_item(index, item, cfg.catalogue, cfg.schema)
+        record_batch_item(item, res, cfg)
+        yield res
+
+
+# JSON Schema là nguồn sự thật duy nhất cho ChangeSet: request validate/convert
+# không đi qua serializer DRF, docs Swagger cũng sinh từ schema (CHANGESET_SCHEMA_DOC,
+# cập nhật theo config hiện tại mỗi lần sinh spec, xem openapi.py)
 
 
 # ----------------------------
@@ -24,15 +112,17 @@ MAPPING = load_mapping()
 @swagger_auto_schema(
     method="post",
     request_body=RawLLMSerializer,
-    responses={200: ChangeSetSerializer},
+    responses={200: CHANGESET_SCHEMA_DOC},
     operation_description="Nhận output từ LLM, chuẩn hóa thành ChangeSet hợp lệ."
 )
 @api_view(["POST"])
 def normalize_view(request):
     serializer = RawLLMSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    normalized = normalize(serializer.validated_data)
-    return Response(normalized)
+    cfg = CONFIG.current()
+    normalized = normalize(serializer.validated_data, cfg.catalogue, dedupe=NORMALIZE_DEDUPE)
+    record_changeset("normalize", normalized, cfg)
+    return with_config_version(Response(normalized), cfg)
 
 
 # ----------------------------
@@ -40,16 +130,106 @@ def normalize_view(request):
 # ----------------------------
 @swagger_auto_schema(
     method="post",
-    request_body=ChangeSetSerializer,
-    responses={200: openapi.Response("Validation result")},
+    request_body=CHANGESET_SCHEMA_DOC,
+    responses={200: openapi.Response(
+        "{status, errors, warnings}; kèm impacted_services nếu status khác rejected"
+    )},
     operation_description="Kiểm tra ChangeSet dựa trên schema, catalogue, và policy."
 )
 @api_view(["POST"])
 def validate_view(request):
-    serializer = ChangeSetSerializer(data=request.data)
-    serializer.is_valid(raise_exception=True)
-    result = validate_changeset(serializer.validated_data, CATALOGUE, SCHEMA)
-    return Response(result)
+    cfg = CONFIG.current()
+    # validate_changeset kiểm tra schema trước tiên → payload sai trả về "rejected"
+    result, hit = run_validate(request.data, cfg)
+    record_verdict(endpoint_of(request), result["status"])
+    return with_cache_status(with_config_version(Response(result), cfg), hit)
+
+
+# ----------------------------
+# Delta validate endpoint (ChangeSet trước đó + JSON Patch)
+# ----------------------------
+DELTA_REQUEST_DOC = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    required=["base_id", "patch"],
+    properties={
+        "base_id": openapi.Schema(type=openapi.TYPE_STRING, description="id của ChangeSet đã gửi validate trước đó"),
+        "patch": openapi.Schema(
+            type=openapi.TYPE_ARRAY,
+            items=openapi.Schema(type=openapi.TYPE_OBJECT),
+            description="JSON Patch (RFC 6902), vd. [{\"op\": \"replace\", \"path\": \"/changes/3/action\", \"value\": \"update\"}]",
+        ),
+    },
+)
+
+
+@swagger_auto_schema(
+    method="post",
+    request_body=DELTA_REQUEST_DOC,
+    responses={
+        200: openapi.Response("{changeset, validation, reused_changes}"),
+        400: openapi.Response("Patch không hợp lệ: {errors: [...]}"),
+        404: openapi.Response("Không tìm thấy ChangeSet base_id"),
+    },
+    operation_description=(
+        "Áp patch lên ChangeSet đã validate trước đó và chỉ kiểm tra lại các change bị sửa "
+        "cùng các policy mức ChangeSet. Kết quả giống hệt validate cả ChangeSet."
+    ),
+)
+@api_view(["POST"])
+def validate_delta_view(request):
+    cfg = CONFIG.current()
+    data = request.data
+    base_id = data.get("base_id") if isinstance(data, dict) else None
+    if not isinstance(base_id, str) or "patch" not in data:
+        return with_config_version(
+            Response({"errors": ["'base_id' (string) and 'patch' are required"]}, status=400), cfg
+        )
+    previous = HISTORY.get(base_id)
+    if previous is None and RECORDER is not None:
+        # không còn trong bộ nhớ (worker khác / đã restart) → lấy bản đã lưu
+        RECORDER.flush()
+        previous = latest_changeset(base_id)
+    if previous is None:
+        return with_config_version(
+            Response({"errors": [f"Unknown changeset: {base_id}"]}, status=404), cfg
+        )
+    try:
+        changeset, result, reused = delta_validator(cfg).revalidate(previous, data["patch"])
+    except JsonPatchError as exc:
+        return with_config_version(Response({"errors": [str(exc)]}, status=400), cfg)
+    remember_base(changeset, result)
+    record_changeset("delta", changeset, cfg, validation=result)
+    record_verdict(endpoint_of(request), result["status"])
+    body = {"changeset": changeset, "validation": result, "reused_changes": reused}
+    return with_config_version(Response(body), cfg)
+
+
+# ----------------------------
+# Batch validate endpoint (JSON array hoặc NDJSON → NDJSON stream)
+# ----------------------------
+@swagger_auto_schema(
+    method="post",
+    request_body=openapi.Schema(
+        type=openapi.TYPE_ARRAY,
+        items=openapi.Schema(type=openapi.TYPE_OBJECT),
+        description="JSON array các ChangeSet, hoặc NDJSON (mỗi dòng một ChangeSet).",
+    ),
+    responses={200: openapi.Response(
+        "NDJSON: mỗi dòng {index, id, status, errors, warnings}, kèm impacted_services nếu không bị rejected"
+    )},
+    operation_description="Validate nhiều ChangeSet một lần, trả kết quả dạng stream theo từng dòng."
+)
+@api_view(["POST"])
+def validate_batch_view(request):
+    # đọc thẳng từ request stream, không qua request.data để không load cả body
+    # cả batch dùng chung một snapshot config
+    cfg = CONFIG.current()
+    items = iter_json_items(request.stream)
+    results = count_verdicts(endpoint_of(request), iter_validate_recorded(items, cfg))
+    response = StreamingHttpResponse(
+        iter_ndjson_lines(results), content_type="application/x-ndjson"
+    )
+    return with_config_version(response, cfg)
 
 
 # ----------------------------
@@ -57,17 +237,211 @@ def validate_view(request):
 # ----------------------------
 @swagger_auto_schema(
     method="post",
-    request_body=ChangeSetSerializer,
-    responses={200: openapi.Response("Helm values YAML + JSON")},
-    operation_description="Chuyển ChangeSet thành Helm values (YAML & JSON)."
+    request_body=CHANGESET_SCHEMA_DOC,
+    responses={
+        200: openapi.Response("JSON: {values_json: {...}}; Accept: application/yaml → nội dung values.yaml"),
+        400: openapi.Response("ChangeSet không đúng schema: {errors: [...]}"),
+    },
+    operation_description="Chuyển ChangeSet thành Helm values (JSON hoặc YAML theo header Accept)."
 )
 @api_view(["POST"])
+@renderer_classes([*api_settings.DEFAULT_RENDERER_CLASSES, YAMLRenderer])
 def convert_view(request):
-    serializer = ChangeSetSerializer(data=request.data)
+    cfg = CONFIG.current()
+    (status, body), hit = run_convert(request.data, cfg)
+    if status == 200 and request.accepted_renderer.format == YAMLRenderer.format:
+        body = body["values_json"]
+    return with_cache_status(with_config_version(Response(body, status=status), cfg), hit)
+
+
+# ----------------------------
+# Pipeline endpoint (normalize → validate → convert trong một request)
+# ----------------------------
+@swagger_auto_schema(
+    method="post",
+    request_body=RawLLMSerializer,
+    responses={200: openapi.Response("{changeset, validation, values}; values = null nếu bị rejected")},
+    operation_description="Chạy cả pipeline trên output của LLM: chuẩn hóa, kiểm tra và chuyển thành Helm values."
+)
+@api_view(["POST"])
+def pipeline_view(request):
+    serializer = RawLLMSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    values = convert(serializer.validated_data, MAPPING)
+    cfg = CONFIG.current()
+    # dữ liệu đi giữa các bước trong bộ nhớ, không serialize lại
+    result = process_raw(
+        serializer.validated_data, cfg.catalogue, cfg.schema, cfg.mapping, dedupe=NORMALIZE_DEDUPE
+    )
+    remember_base(result["changeset"], result["validation"])
+    record_changeset(
+        "pipeline", result["changeset"], cfg,
+        validation=result["validation"], values=result["values"],
+    )
+    record_verdict(endpoint_of(request), result["validation"]["status"])
+    return with_config_version(Response(result), cfg)
+
+
+# ----------------------------
+# Truy vấn ChangeSet đã lưu (phân trang keyset)
+# ----------------------------
+def _query_param(name, description, type_=openapi.TYPE_STRING):
+    return openapi.Parameter(name, openapi.IN_QUERY, description=description, type=type_)
+
+
+@swagger_auto_schema(
+    method="get",
+    manual_parameters=[
+        _query_param("tenant", "request_context.tenant_id"),
+        _query_param("service", "service trong changes[] (id trong catalogue)"),
+        _query_param("status", "validated | rejected | requires_human ('' = chưa validate)"),
+        _query_param("changeset_id", "id của ChangeSet"),
+        _query_param("kind", "normalize | validate | convert | pipeline | delta | batch"),
+        _query_param("since", "timestamp của ChangeSet >= (ISO 8601)"),
+        _query_param("until", "timestamp của ChangeSet < (ISO 8601)"),
+        _query_param("limit", f"số record mỗi trang (1..{MAX_PAGE_SIZE}, mặc định 50)", openapi.TYPE_INTEGER),
+        _query_param("cursor", "lấy từ `next` của trang trước"),
+    ],
+    responses={200: openapi.Response("{results: [...], next: url | null}, mới nhất trước")},
+    operation_description="Truy vấn ChangeSet, kết quả validate và values đã lưu.",
+)
+@api_view(["GET"])
+def changesets_view(request):
+    if RECORDER is None:
+        return Response({"errors": ["Changeset store is disabled (BMMS_STORE)"]}, status=404)
+    params = request.query_params
+    errors = []
+    try:
+        limit = int(params.get("limit", 50))
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError
+    except ValueError:
+        errors.append(f"limit must be an integer in 1..{MAX_PAGE_SIZE}")
+    cursor = params.get("cursor")
+    if cursor is not None:
+        try:
+            cursor = int(cursor)
+        except ValueError:
+            errors.append("Invalid cursor")
+    bounds = {}
+    for name in ("since", "until"):
+        if name in params:
+            bounds[name] = parse_timestamp(params[name])
+            if bounds[name] is None:
+                errors.append(f"{name} must be an ISO 8601 datetime")
+    if errors:
+        return Response({"errors": errors}, status=400)
+
+    RECORDER.flush()
+    records, next_cursor = query_records(
+        tenant=params.get("tenant"), service=params.get("service"), status=params.get("status"),
+        changeset_id=params.get("changeset_id"), kind=params.get("kind"),
+        cursor=cursor, limit=limit, **bounds,
+    )
+    next_url = None
+    if next_cursor is not None:
+        next_url = replace_query_param(request.build_absolute_uri(), "cursor", next_cursor)
+    return Response({"results": [serialize_record(r) for r in records], "next": next_url})
+
+
+# ----------------------------
+# Job chạy nền cho batch lớn (submit → poll / stream)
+# ----------------------------
+JOB_RETRY_AFTER_SECONDS = 5
+
+
+def _job_body(job, offset=0):
+    return {**job.summary(), "results": job.results[offset:]}
+
+
+@swagger_auto_schema(
+    method="post",
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        required=["kind", "items"],
+        properties={
+            "kind": openapi.Schema(type=openapi.TYPE_STRING, enum=list(JOB_KINDS)),
+            "items": openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                items=openapi.Schema(type=openapi.TYPE_OBJECT),
+                description="ChangeSet (validate, convert) hoặc output thô của LLM (pipeline)",
+            ),
+        },
+    ),
+    responses={
+        202: openapi.Response("{job_id, status, total, ...}; header Location"),
+        400: openapi.Response("Body không hợp lệ"),
+        503: openapi.Response("Hàng đợi đầy, thử lại sau Retry-After giây"),
+    },
+    operation_description="Đưa một batch lớn vào hàng đợi, trả về job id ngay để poll hoặc stream kết quả.",
+)
+@api_view(["POST"])
+def jobs_view(request):
+    if JOBS is None:
+        return Response({"errors": ["Job queue is disabled (BMMS_JOBS)"]}, status=404)
+    data = request.data
+    kind = data.get("kind") if isinstance(data, dict) else None
+    items = data.get("items") if isinstance(data, dict) else None
+    if kind not in JOB_KINDS or not isinstance(items, list):
+        return Response(
+            {"errors": [f"'kind' ({' | '.join(JOB_KINDS)}) and 'items' (array) are required"]},
+            status=400,
+        )
+    cfg = CONFIG.current()
+    try:
+        job = JOBS.submit(kind, items, cfg)
+    except QueueFull as exc:
+        response = Response({"errors": [str(exc)]}, status=503)
+        response["Retry-After"] = str(JOB_RETRY_AFTER_SECONDS)
+        return response
+    response = Response(job.summary(), status=202)
+    response["Location"] = request.build_absolute_uri(f"{job.id}/")
+    return with_config_version(response, cfg)
+
+
+@swagger_auto_schema(
+    method="get",
+    manual_parameters=[
+        _query_param("offset", "chỉ trả kết quả từ vị trí này (poll tăng dần)", openapi.TYPE_INTEGER),
+    ],
+    responses={200: openapi.Response("{job_id, status, total, done, results, ...}")},
+    operation_description="Trạng thái, tiến độ và kết quả (theo thứ tự item) của job.",
+)
+@swagger_auto_schema(
+    method="delete",
+    responses={200: openapi.Response("Job sau khi hủy")},
+    operation_description="Hủy job: job đang chờ bị hủy ngay, job đang chạy dừng sau chunk hiện tại.",
+)
+@api_view(["GET", "DELETE"])
+def job_detail_view(request, job_id):
+    if JOBS is None:
+        return Response({"errors": ["Job queue is disabled (BMMS_JOBS)"]}, status=404)
+    if request.method == "DELETE":
+        job = JOBS.cancel(job_id)
+    else:
+        job = JOBS.get(job_id)
+    if job is None:
+        return Response({"errors": [f"Unknown or expired job: {job_id}"]}, status=404)
+    try:
+        offset = max(int(request.query_params.get("offset", 0)), 0)
+    except ValueError:
+        return Response({"errors": ["offset must be an integer"]}, status=400)
+    return Response(_job_body(job, offset))
+
+
+@swagger_auto_schema(
+    method="get",
+    responses={200: openapi.Response("NDJSON: mỗi dòng một kết quả khi nó xong, dòng cuối {job: {...}}")},
+    operation_description="Stream kết quả của job tới khi job kết thúc.",
+)
+@api_view(["GET"])
+def job_stream_view(request, job_id):
+    job = JOBS.get(job_id) if JOBS is not None else None
+    if job is None:
+        return Response({"errors": [f"Unknown or expired job: {job_id}"]}, status=404)
+
+    def lines():
+        for res in job.iter_results():
+            yield dumps(res) + b"\n"
+        yield dumps({"job": job.summary()}) + b"\n"
 
-    return Response({
-        "values_yaml": yaml.safe_dump(values, sort_keys=False, allow_unicode=True),
-        "values_json": values
-    })
+    return StreamingHttpResponse(lines(), content_type="application/x-ndjson")
@@ -0,0 +1,229 @@
+"""
+Admission control theo tenant: token bucket (số request/giây, cho phép burst)
++ giới hạn số request đang xử lý đồng thời.
+
+State nằm trong một store:
+- MemoryAdmissionStore: trong process (mỗi worker một bộ đếm riêng)
+- SQLiteAdmissionStore: file sqlite cục bộ dùng chung giữa các worker trên
+  cùng máy. Mỗi request đang chạy là một dòng có hạn `lease` giây, nên worker
+  chết giữa chừng cũng không giữ chỗ mãi.
+
+Tenant do client gửi lên nên số bucket bị chặn: store memory giữ tối đa
+`max_tenants` bucket (LRU), store sqlite xóa bucket không dùng quá `idle` giây.
+"""
+import math
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# ------------------------------
+# Stores
+# ------------------------------
+def _refill(tokens, updated, now, rate, burst):
+    return min(burst, tokens + max(0.0, now - updated) * rate)
+
+
+def _decide(tokens, inflight, rate, burst, concurrency):
+    """→ (reason | None, retry_after, tokens còn lại). reason: "concurrency" | "rate"."""
+    if concurrency and inflight >= concurrency:
+        return "concurrency", 1, tokens
+    if rate:
+        if tokens < 1:
+            return "rate", max(1, math.ceil((1 - tokens) / rate)), tokens
+        tokens -= 1
+    return None, 0, tokens
+
+
+class MemoryAdmissionStore:
+    def __init__(self, max_tenants=10000):
+        self.max_tenants = max_tenants
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # tenant -> [tokens, updated], cũ nhất ở đầu
+        self._inflight = {}            # tenant -> số request đang chạy (tự xóa khi về 0)
+
+    def acquire(self, tenant, rate, burst, concurrency):
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(tenant)
+            tokens = burst if bucket is None else _refill(bucket[0], bucket[1], now, rate, burst)
+            inflight = self._inflight.get(tenant, 0)
+            reason, retry_after, tokens = _decide(tokens, inflight, rate, burst, concurrency)
+            self._buckets[tenant] = [tokens, now]
+            self._buckets.move_to_end(tenant)
+            while len(self._buckets) > self.max_tenants:
+                self._buckets.popitem(last=False)
+            if reason is not None:
+                return None, reason, retry_after
+            self._inflight[tenant] = inflight + 1
+        return tenant, None, 0
+
+    def release(self, tenant, ticket):
+        with self._lock:
+            count = self._inflight.get(tenant, 0) - 1
+            if count > 0:
+                self._inflight[tenant] = count
+            else:
+                self._inflight.pop(tenant, None)
+
+    def inflight(self):
+        with self._lock:
+            return dict(self._inflight)
+
+
+class SQLiteAdmissionStore:
+    """Dùng chung giữa các worker; mỗi thread một connection, cập nhật trong BEGIN IMMEDIATE."""
+
+    # số lần acquire giữa hai lần dọn bucket / lease hết hạn
+    SWEEP_EVERY = 256
+
+    def __init__(self, path, lease=300, idle=3600):
+        self.path = str(path)
+        self.lease = lease
+        self.idle = idle
+        self._acquires = 0
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS admission_bucket ("
+            " tenant TEXT PRIMARY KEY, tokens REAL, updated REAL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS admission_inflight ("
+            " ticket TEXT PRIMARY KEY, tenant TEXT, expires REAL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS admission_inflight_tenant ON admission_inflight(tenant, expires)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS admission_bucket_updated ON admission_bucket(updated)"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, tenant, rate, burst, concurrency):
+        conn = self._conn()
+        now = time.time()
+        self._acquires += 1
+        if self._acquires % self.SWEEP_EVERY == 0:
+            self.sweep(now)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM admission_bucket WHERE tenant = ?", (tenant,)
+            ).fetchone()
+            tokens = burst if row is None else _refill(row[0], row[1], now, rate, burst)
+            inflight = 0
+            if concurrency:
+                inflight = conn.execute(
+                    "SELECT COUNT(*) FROM admission_inflight WHERE tenant = ? AND expires > ?",
+                    (tenant, now),
+                ).fetchone()[0]
+            reason, retry_after, tokens = _decide(tokens, inflight, rate, burst, concurrency)
+            conn.execute(
+                "INSERT OR REPLACE INTO admission_bucket (tenant, tokens, updated) VALUES (?, ?, ?)",
+                (tenant, tokens, now),
+            )
+            ticket = None
+            if reason is None:
+                ticket = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO admission_inflight (ticket, tenant, expires) VALUES (?, ?, ?)",
+                    (ticket, tenant, now + self.lease),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return ticket, reason, retry_after
+
+    def release(self, tenant, ticket):
+        self._conn().execute("DELETE FROM admission_inflight WHERE ticket = ?", (ticket,))
+
+    def sweep(self, now=None):
+        """Xóa lease hết hạn (worker chết khi đang xử lý) và bucket không dùng quá `idle` giây."""
+        now = time.time() if now is None else now
+        conn = self._conn()
+        conn.execute("DELETE FROM admission_inflight WHERE expires < ?", (now,))
+        conn.execute("DELETE FROM admission_bucket WHERE updated < ?", (now - self.idle,))
+
+    def inflight(self):
+        rows = self._conn().execute(
+            "SELECT tenant, COUNT(*) FROM admission_inflight WHERE expires > ? GROUP BY tenant",
+            (time.time(),),
+        ).fetchall()
+        return dict(rows)
+
+# ------------------------------
+# Controller
+# ------------------------------
+class AdmissionController:
+    """
+    rate: token/giây (0 = không giới hạn), burst: số token tối đa,
+    concurrency: số request đồng thời tối đa (0 = không giới hạn).
+    tenants: {tenant_id: {"RATE": ..., "BURST": ..., "CONCURRENCY": ...}} ghi đè mặc định.
+    """
+
+    def __init__(self, store=None, rate=100.0, burst=200, concurrency=32, tenants=None):
+        self.store = store if store is not None else MemoryAdmissionStore()
+        self.default = (rate, burst, concurrency)
+        self.tenants = {
+            tenant: (
+                limits.get("RATE", rate), limits.get("BURST", burst),
+                limits.get("CONCURRENCY", concurrency),
+            )
+            for tenant, limits in (tenants or {}).items()
+        }
+
+    def limits(self, tenant):
+        return self.tenants.get(tenant, self.default)
+
+    def label(self, tenant):
+        """Nhãn metrics: chỉ tenant khai báo trong `tenants`, còn lại gộp thành "other"."""
+        return tenant if tenant in self.tenants else "other"
+
+    def acquire(self, tenant):
+        """→ (ticket | None, reason | None, retry_after giây). ticket None = bị từ chối."""
+        rate, burst, concurrency = self.limits(tenant)
+        return self.store.acquire(tenant, rate, burst, concurrency)
+
+    def release(self, tenant, ticket):
+        self.store.release(tenant, ticket)
+
+    def inflight(self):
+        return self.store.inflight()
+
+
+def build_admission_controller(options):
+    """
+    options (dict, thường từ settings.BMMS_ADMISSION): ENABLED, BACKEND
+    ("memory" | "sqlite"), PATH, LEASE, IDLE, MAX_TENANTS, RATE, BURST,
+    CONCURRENCY, TENANTS.
+    """
+    options = options or {}
+    if not options.get("ENABLED", False):
+        return None
+    backend = options.get("BACKEND", "memory")
+    if backend == "memory":
+        store = MemoryAdmissionStore(max_tenants=options.get("MAX_TENANTS", 10000))
+    elif backend == "sqlite":
+        store = SQLiteAdmissionStore(
+            options["PATH"], lease=options.get("LEASE", 300), idle=options.get("IDLE", 3600)
+        )
+    else:
+        raise ValueError(f"Unknown admission backend: {backend}")
+    return AdmissionController(
+        store,
+        rate=options.get("RATE", 100.0),
+        burst=options.get("BURST", 200),
+        concurrency=options.get("CONCURRENCY", 32),
+        tenants=options.get("TENANTS"),
+    )
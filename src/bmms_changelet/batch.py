@@ -0,0 +1,206 @@
+import codecs
+import json
+
+from .catalogue_index import CatalogueIndex
+from .validator import validate_changeset
+
+# ------------------------------
+# Đọc batch: JSON array hoặc NDJSON, từng item một
+# ------------------------------
+CHUNK_SIZE = 64 * 1024
+# một item (phần tử array / dòng NDJSON) lớn hơn → báo lỗi và dừng, không đọc tiếp vào bộ nhớ
+MAX_ITEM_SIZE = 16 * 1024 * 1024
+_WHITESPACE = " \t\r\n"
+_LITERALS = ("true", "false", "null", "NaN", "Infinity", "-Infinity")
+_NUMBER_CHARS = frozenset("0123456789+-.eE")
+
+
+class ItemError:
+    """Item không parse được; giữ lại index và message để báo cho client."""
+
+    __slots__ = ("message",)
+
+    def __init__(self, message):
+        self.message = message
+
+
+def _iter_chunks(stream, chunk_size=CHUNK_SIZE):
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+            return
+        if isinstance(chunk, str):
+            yield chunk
+        else:
+            yield decoder.decode(chunk)
+
+
+def _truncated(exc, buf):
+    """Lỗi parse do item bị cắt ở cuối buffer (cần đọc thêm) chứ không phải JSON sai."""
+    rest = buf[exc.pos:]
+    if exc.msg.startswith("Unterminated string"):
+        return True  # strict mode: chỉ xảy ra khi hết buffer trước dấu " đóng
+    if exc.msg.startswith("Invalid \\uXXXX escape"):
+        return len(rest) < 6
+    if not rest.strip(_WHITESPACE):
+        return True
+    if _NUMBER_CHARS.issuperset(rest):
+        return True  # số bị cắt giữa chừng: "0." / "-1." / "1e" / "-"
+    if exc.msg == "Expecting value":
+        return any(literal.startswith(rest) for literal in _LITERALS)
+    return False
+
+
+def _iter_json_array(first_chunk, chunks, max_item_size=MAX_ITEM_SIZE):
+    """
+    Parse incremental một JSON array: chỉ giữ trong bộ nhớ item đang đọc.
+    Phần tử lỗi cú pháp không thể đồng bộ lại → báo lỗi và dừng.
+    """
+    decoder = json.JSONDecoder()
+    buf = first_chunk[first_chunk.index("[") + 1:]
+    pos = 0
+    index = 0
+    exhausted = False
+
+    def more():
+        nonlocal buf, pos, exhausted
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    expect_item = True
+    while True:
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        if pos >= len(buf):
+            if exhausted or not more():
+                yield index, ItemError("Unexpected end of JSON array")
+                return
+            continue
+
+        ch = buf[pos]
+        if ch == "]" and (index == 0 or not expect_item):
+            return
+        if not expect_item:
+            if ch != ",":
+                yield index, ItemError(f"Expected ',' or ']' at item {index}")
+                return
+            pos += 1
+            expect_item = True
+            continue
+
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as exc:
+            if exhausted or not _truncated(exc, buf):
+                yield index, ItemError(f"Invalid JSON: {exc.msg}")
+                return
+            if len(buf) - pos > max_item_size:
+                yield index, ItemError(f"Item {index} exceeds {max_item_size} characters")
+                return
+            # đọc tới khi phần đang chờ gấp đôi rồi mới parse lại (không parse lại sau mỗi chunk)
+            need = 2 * (len(buf) - pos)
+            while more() and len(buf) < need:
+                pass
+            continue
+        if not exhausted and _NUMBER_CHARS.issuperset(buf[end:]):
+            # số/literal có thể bị cắt ngang giữa hai chunk ("-3.5e" → -3.5 + "e")
+            if more():
+                continue
+        pos = end
+        yield index, item
+        index += 1
+        expect_item = False
+
+
+def _iter_ndjson(first_chunk, chunks, max_item_size=MAX_ITEM_SIZE):
+    index = 0
+    pending = first_chunk
+    pos = 0
+    while True:
+        nl = pending.find("\n", pos)
+        if nl < 0:
+            if len(pending) - pos > max_item_size:
+                yield index, ItemError(f"Line {index} exceeds {max_item_size} characters")
+                return
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            pending = pending[pos:] + chunk
+            pos = 0
+            continue
+        line = pending[pos:nl]
+        pos = nl + 1
+        if line.strip():
+            yield index, _parse_line(line)
+            index += 1
+    tail = pending[pos:]
+    if tail.strip():
+        yield index, _parse_line(tail)
+
+
+def _parse_line(line):
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as exc:
+        return ItemError(f"Invalid JSON: {exc.msg} (column {exc.colno})")
+
+
+def iter_json_items(stream, chunk_size=CHUNK_SIZE, max_item_size=MAX_ITEM_SIZE):
+    """
+    Đọc stream (bytes hoặc text) chứa JSON array hoặc NDJSON.
+    Yield (index, item); item lỗi parse là ItemError. Item lớn hơn
+    max_item_size ký tự → ItemError rồi dừng.
+    """
+    if stream is None:
+        return
+    chunks = _iter_chunks(stream, chunk_size)
+    first = ""
+    for chunk in chunks:
+        first += chunk
+        if first.strip():
+            break
+    stripped = first.lstrip()
+    if not stripped:
+        return
+    if stripped[0] == "[":
+        yield from _iter_json_array(stripped, chunks, max_item_size)
+    else:
+        yield from _iter_ndjson(first, chunks, max_item_size)
+
+# ------------------------------
+# Validate batch
+# ------------------------------
+def validate_item(index, item, catalogue, schema):
+    if isinstance(item, ItemError):
+        return {"index": index, "id": None, "status": "rejected",
+                "errors": [item.message], "warnings": []}
+    try:
+        res = validate_changeset(item, catalogue, schema)
+    except Exception as exc:  # một item lỗi không được làm hỏng cả batch
+        res = {"status": "rejected", "errors": [f"Validation failed: {exc}"], "warnings": []}
+    changeset_id = item.get("id") if isinstance(item, dict) else None
+    return {"index": index, "id": changeset_id, **res}
+
+
+def iter_validate(items, catalogue, schema):
+    """
+    Validate lần lượt từng (index, item), yield kết quả ngay để
+    bộ nhớ không phụ thuộc kích thước batch.
+    """
+    catalogue = CatalogueIndex.from_catalogue(catalogue)
+    for index, item in items:
+        yield validate_item(index, item, catalogue, schema)
+
+
+def iter_ndjson_lines(results):
+    for res in results:
+        yield json.dumps(res, ensure_ascii=False) + "\n"
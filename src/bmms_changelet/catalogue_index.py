@@ -0,0 +1,89 @@
+from types import MappingProxyType
+
+
+class CatalogueIndex:
+    """
+    Index bất biến dựng một lần từ service_catalogue.yaml.
+
+    - Lookup O(1) theo `id` hoặc `name`
+    - allowed_features: frozenset tên feature của từng service
+    - dependencies: tuple các service phụ thuộc
+    """
+
+    __slots__ = ("catalogue", "services", "_by_key", "_allowed_features", "_dependencies", "_graph", "_resolver")
+
+    def __init__(self, catalogue):
+        services = tuple(catalogue.get("services", []))
+        by_key = {}
+        allowed = {}
+        deps = {}
+        # duyệt ngược để service xuất hiện trước thắng khi trùng key,
+        # giống hành vi của find_service tuyến tính cũ
+        for s in reversed(services):
+            by_key[s["name"]] = s
+            by_key[s["id"]] = s
+        for s in services:
+            allowed[s["id"]] = frozenset(
+                f["name"] if isinstance(f, dict) else f
+                for f in s.get("allowed_features", [])
+            )
+            deps[s["id"]] = tuple(s.get("dependencies", []))
+
+        object.__setattr__(self, "catalogue", catalogue)
+        object.__setattr__(self, "services", services)
+        object.__setattr__(self, "_by_key", MappingProxyType(by_key))
+        object.__setattr__(self, "_allowed_features", MappingProxyType(allowed))
+        object.__setattr__(self, "_dependencies", MappingProxyType(deps))
+        object.__setattr__(self, "_graph", None)
+        object.__setattr__(self, "_resolver", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CatalogueIndex is immutable")
+
+    @classmethod
+    def from_catalogue(cls, catalogue):
+        if isinstance(catalogue, cls):
+            return catalogue
+        return cls(catalogue)
+
+    def get(self, service_name):
+        return self._by_key.get(service_name)
+
+    def __contains__(self, service_name):
+        return service_name in self._by_key
+
+    def __len__(self):
+        return len(self.services)
+
+    def __iter__(self):
+        return iter(self.services)
+
+    def allowed_features(self, service_name):
+        svc = self.get(service_name)
+        if svc is None:
+            return frozenset()
+        return self._allowed_features[svc["id"]]
+
+    @property
+    def graph(self):
+        """DependencyGraph (bao đóng bắc cầu, thứ tự enable, vòng phụ thuộc), dựng lần đầu khi dùng."""
+        if self._graph is None:
+            from .dependency_graph import DependencyGraph
+
+            object.__setattr__(self, "_graph", DependencyGraph(self))
+        return self._graph
+
+    @property
+    def resolver(self):
+        """ServiceResolver (tên LLM → id service + điểm), dựng lần đầu khi dùng."""
+        if self._resolver is None:
+            from .service_resolver import ServiceResolver
+
+            object.__setattr__(self, "_resolver", ServiceResolver(self))
+        return self._resolver
+
+    def dependencies(self, service_name):
+        svc = self.get(service_name)
+        if svc is None:
+            return ()
+        return self._dependencies[svc["id"]]
@@ -0,0 +1,142 @@
+import argparse
+import json
+import sys
+
+from .pipeline import iter_lines, run_pipeline
+from .values_merge import ValuesMerger
+from .quota import ResourceLedger
+from .config_snapshot import SNAPSHOT_PATH, build_snapshot, load_config_files
+from .validator import CATALOG_PATH, SCHEMA_PATH, load_catalogue_index
+from .convert_to_helm import MAPPING_PATH, load_mapping
+
+
+def cmd_pipeline(args):
+    src = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for line in run_pipeline(
+            src,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            catalogue_path=args.catalogue,
+            schema_path=args.schema,
+            mapping_path=args.mapping,
+        ):
+            dst.write(line)
+            dst.write("\n")
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    return 0
+
+
+def cmd_merge(args):
+    merger = ValuesMerger.from_file(args.base, mapping=load_mapping(args.mapping))
+    src = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    try:
+        for index, line in iter_lines(src):
+            diff = merger.apply(json.loads(line))
+            # diff từng bước ra stdout (JSONL), chỉ gồm các path thay đổi
+            sys.stdout.write(json.dumps({"index": index, **diff}, ensure_ascii=False) + "\n")
+    finally:
+        if src is not sys.stdin:
+            src.close()
+    with open(args.output, "w", encoding="utf-8") as f:
+        merger.dump(f)
+    print(f"✅ Merged {len(merger.steps)} ChangeSets into {args.output}", file=sys.stderr)
+    return 0
+
+
+def _parse_replicas(items):
+    replicas = {}
+    for item in items or []:
+        name, _, count = item.partition("=")
+        replicas[name] = int(count)
+    return replicas
+
+
+def cmd_quota(args):
+    ledger = ResourceLedger(load_catalogue_index(args.catalogue), replicas=_parse_replicas(args.replicas))
+    src = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    try:
+        changesets = (json.loads(line) for _, line in iter_lines(src))
+        for index, res in enumerate(ledger.check_batch(changesets)):
+            sys.stdout.write(json.dumps({"index": index, **res}, ensure_ascii=False) + "\n")
+    finally:
+        if src is not sys.stdin:
+            src.close()
+    return 0
+
+
+def cmd_snapshot(args):
+    paths = {"catalogue_path": args.catalogue, "schema_path": args.schema, "mapping_path": args.mapping}
+    *_, before = load_config_files(None, **paths)
+    build_snapshot(args.output, **paths)
+    *_, after = load_config_files(args.output, **paths)
+    print(
+        f"✅ Snapshot written to {args.output} "
+        f"(load: yaml {before['seconds'] * 1000:.1f} ms, {after['source']} {after['seconds'] * 1000:.1f} ms)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="bmms-changelet")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser(
+        "pipeline",
+        help="normalize → validate → convert cho file JSONL các raw LLM output",
+    )
+    p.add_argument("input", nargs="?", default="-", help="file JSONL input (mặc định: stdin)")
+    p.add_argument("-o", "--output", default="-", help="file JSONL output (mặc định: stdout)")
+    p.add_argument("-w", "--workers", type=int, default=None,
+                   help="số process worker (0 = chạy tuần tự, mặc định = số CPU)")
+    p.add_argument("--chunk-size", type=int, default=64, help="số dòng gửi cho worker mỗi lần")
+    p.add_argument("--catalogue", default=str(CATALOG_PATH))
+    p.add_argument("--schema", default=str(SCHEMA_PATH))
+    p.add_argument("--mapping", default=str(MAPPING_PATH))
+    p.set_defaults(func=cmd_pipeline)
+
+    p = sub.add_parser(
+        "merge",
+        help="áp lần lượt các ChangeSet (JSONL) lên một values.yaml gốc",
+    )
+    p.add_argument("input", nargs="?", default="-", help="file JSONL các ChangeSet (mặc định: stdin)")
+    p.add_argument("--base", default="charts/demo/values.yaml", help="values.yaml gốc")
+    p.add_argument("-o", "--output", default="values.yaml", help="values.yaml sau khi merge")
+    p.add_argument("--mapping", default=str(MAPPING_PATH))
+    p.set_defaults(func=cmd_merge)
+
+    p = sub.add_parser(
+        "quota",
+        help="kiểm tra các ChangeSet ứng viên (JSONL) có vừa CLUSTER_QUOTA không",
+    )
+    p.add_argument("input", nargs="?", default="-", help="file JSONL các ChangeSet (mặc định: stdin)")
+    p.add_argument("--replicas", nargs="*", metavar="SERVICE=N",
+                   help="số replica hiện tại (mặc định 1 cho mỗi service)")
+    p.add_argument("--catalogue", default=str(CATALOG_PATH))
+    p.set_defaults(func=cmd_quota)
+
+    p = sub.add_parser(
+        "snapshot",
+        help="compile catalogue/schema/mapping thành một file snapshot để khởi động nhanh",
+    )
+    p.add_argument("-o", "--output", default=str(SNAPSHOT_PATH))
+    p.add_argument("--catalogue", default=str(CATALOG_PATH))
+    p.add_argument("--schema", default=str(SCHEMA_PATH))
+    p.add_argument("--mapping", default=str(MAPPING_PATH))
+    p.set_defaults(func=cmd_snapshot)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+"""
+Snapshot nhị phân của catalogue/schema/mapping đã parse + compile.
+
+Parse YAML là phần đắt nhất khi khởi động (CLI, mỗi worker Django).
+`bmms-changelet snapshot` parse một lần và ghi ra một file:
+
+    MAGIC (8 byte) | độ dài header (4 byte, big-endian) | header JSON | payload pickle
+
+Header ghi format, phiên bản Python/pickle và sha256 + mtime/size của từng
+file nguồn. Khi load, file được mmap; nếu header không khớp file nguồn hiện
+tại (snapshot cũ) thì loader quay về parse YAML như thường. Snapshot không
+unpickle được (hỏng, class đã đổi tên) cũng quay về YAML và được ghi lại.
+
+Snapshot là artifact build cục bộ (pickle): chỉ load file do chính mình tạo.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import pickle
+import struct
+import sys
+import time
+from pathlib import Path
+
+from .catalogue_index import CatalogueIndex
+from .validator import BASE_DIR, CATALOG_PATH, SCHEMA_PATH, get_validator, load_yaml
+from .convert_to_helm import MAPPING_PATH, compile_mapping
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PATH = BASE_DIR / "schema" / "config.snapshot"
+MAGIC = b"BMMSCFG\x00"
+FORMAT_VERSION = 1
+_LENGTH = struct.Struct(">I")
+
+SOURCE_NAMES = ("catalogue", "schema", "mapping")
+
+
+def _compat():
+    return {
+        "format": FORMAT_VERSION,
+        "python": list(sys.version_info[:2]),
+        "pickle_protocol": pickle.HIGHEST_PROTOCOL,
+    }
+
+
+def source_paths(catalogue_path=CATALOG_PATH, schema_path=SCHEMA_PATH, mapping_path=MAPPING_PATH):
+    return {
+        "catalogue": Path(catalogue_path),
+        "schema": Path(schema_path),
+        "mapping": Path(mapping_path),
+    }
+
+
+def _stat(path):
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _read(path):
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def hash_sources(raw):
+    """raw: {name: bytes | None} → {name: sha256 hex} (file thiếu = hash của b"")."""
+    return {name: hashlib.sha256(data or b"").hexdigest() for name, data in raw.items()}
+
+# ------------------------------
+# Parse + compile từ nguồn
+# ------------------------------
+def parse_sources(raw):
+    """
+    raw: {name: bytes | None} → (catalogue dict, schema dict, CompiledMapping).
+    Mapping thiếu → mapping rỗng (giống load_mapping).
+    """
+    for name in ("catalogue", "schema"):
+        if raw[name] is None:
+            raise FileNotFoundError(f"Missing config source: {name}")
+    catalogue = load_yaml(raw["catalogue"])
+    schema = json.loads(raw["schema"])
+    mapping = load_yaml(raw["mapping"]) if raw["mapping"] is not None else None
+    return catalogue, schema, compile_mapping(mapping or {"mappings": {}})
+
+# ------------------------------
+# Build
+# ------------------------------
+def build_snapshot(out_path=SNAPSHOT_PATH, **paths):
+    """
+    Parse + kiểm tra (schema hợp lệ, mapping không xung đột, catalogue dựng được
+    index) rồi ghi snapshot. Trả về header.
+    """
+    paths = source_paths(**paths)
+    stats = {name: _stat(path) for name, path in paths.items()}
+    raw = {name: _read(path) for name, path in paths.items()}
+    catalogue, schema, mapping = parse_sources(raw)
+    get_validator(schema)
+    CatalogueIndex(catalogue).graph
+
+    return write_snapshot(out_path, raw, {"catalogue": catalogue, "schema": schema, "mapping": mapping}, stats)
+
+
+def write_snapshot(out_path, raw, data, stats):
+    """
+    Ghi snapshot từ nguồn đã parse (data = {"catalogue", "schema", "mapping"}).
+    Ghi ra file tạm rồi os.replace để reader không bao giờ thấy file ghi dở.
+    """
+    hashes = hash_sources(raw)
+    header = dict(_compat())
+    header["created_at"] = time.time()
+    header["sources"] = {
+        name: {"sha256": hashes[name], "stat": stats[name]} for name in SOURCE_NAMES
+    }
+    payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+    header_bytes = json.dumps(header, sort_keys=True).encode("utf-8")
+
+    out_path = Path(out_path)
+    tmp_path = out_path.with_name(out_path.name + f".tmp{os.getpid()}")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(_LENGTH.pack(len(header_bytes)))
+        f.write(header_bytes)
+        f.write(payload)
+    os.replace(tmp_path, out_path)
+    return header
+
+# ------------------------------
+# Load
+# ------------------------------
+def _is_fresh(header, paths=None, hashes=None):
+    if any(header.get(k) != v for k, v in _compat().items()):
+        return False
+    sources = header.get("sources") or {}
+    if hashes is not None:
+        return all(sources.get(n, {}).get("sha256") == hashes[n] for n in SOURCE_NAMES)
+    # fast path: mtime/size không đổi → coi như nội dung không đổi
+    if all(sources.get(n, {}).get("stat") == _stat(paths[n]) for n in SOURCE_NAMES):
+        return True
+    # mtime đổi (checkout lại, copy) nhưng nội dung có thể vẫn như cũ
+    hashes = hash_sources({n: _read(paths[n]) for n in SOURCE_NAMES})
+    return all(sources.get(n, {}).get("sha256") == hashes[n] for n in SOURCE_NAMES)
+
+
+def read_header(path=SNAPSHOT_PATH):
+    with open(path, "rb") as f:
+        head = f.read(len(MAGIC) + _LENGTH.size)
+        if len(head) < len(MAGIC) + _LENGTH.size or head[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a config snapshot: {path}")
+        (length,) = _LENGTH.unpack_from(head, len(MAGIC))
+        return json.loads(f.read(length))
+
+
+# payload pickle trỏ tới module / class đã đổi tên hoặc dữ liệu hỏng: pickle có thể
+# ném gần như bất kỳ exception nào trong số này
+_PAYLOAD_ERRORS = (
+    pickle.UnpicklingError, EOFError, AttributeError, ImportError,
+    IndexError, KeyError, TypeError, ValueError,
+)
+
+
+def _load_snapshot(path, paths, hashes):
+    """Trả về (data | None, status) với status là "ok" / "missing" / "stale" / "broken"."""
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:len(MAGIC)] != MAGIC:
+                return None, "broken"
+            (length,) = _LENGTH.unpack_from(mm, len(MAGIC))
+            start = len(MAGIC) + _LENGTH.size
+            header = json.loads(mm[start:start + length])
+            if not _is_fresh(header, paths=paths, hashes=hashes):
+                return None, "stale"
+            with memoryview(mm) as view:
+                data = pickle.loads(view[start + length:])
+            return (data["catalogue"], data["schema"], data["mapping"]), "ok"
+    except FileNotFoundError:
+        return None, "missing"
+    except (OSError, struct.error) + _PAYLOAD_ERRORS:
+        logger.warning("Ignoring unreadable config snapshot %s", path, exc_info=True)
+        return None, "broken"
+
+
+def load_snapshot(path=SNAPSHOT_PATH, paths=None, hashes=None):
+    """
+    Trả về (catalogue, schema, CompiledMapping) nếu snapshot còn khớp nguồn,
+    None nếu không có / cũ / hỏng. Kiểm tra theo `hashes` (đã tính sẵn, vd. từ
+    ConfigStore) hoặc theo `paths` (mtime/size rồi sha256).
+    """
+    if paths is None and hashes is None:
+        paths = source_paths()
+    return _load_snapshot(path, paths, hashes)[0]
+
+
+def load_or_parse(raw, paths, snapshot_path=SNAPSHOT_PATH, hashes=None):
+    """
+    Dùng snapshot nếu còn mới, không thì parse `raw`. Snapshot hỏng (không đọc /
+    unpickle được, vd. sau khi đổi tên module) được ghi lại từ nguồn vừa parse;
+    snapshot cũ thì để nguyên cho `bmms-changelet snapshot`.
+    Trả về ((catalogue, schema, CompiledMapping), "snapshot" | "yaml").
+    """
+    status = "missing"
+    if snapshot_path is not None:
+        loaded, status = _load_snapshot(snapshot_path, paths if hashes is None else None, hashes)
+        if loaded is not None:
+            return loaded, "snapshot"
+    loaded = parse_sources(raw)
+    if status == "broken":
+        catalogue, schema, mapping = loaded
+        try:
+            write_snapshot(
+                snapshot_path, raw,
+                {"catalogue": catalogue, "schema": schema, "mapping": mapping},
+                {name: _stat(path) for name, path in paths.items()},
+            )
+            logger.info("Rewrote config snapshot %s", snapshot_path)
+        except (OSError, pickle.PicklingError):
+            logger.warning("Could not rewrite config snapshot %s", snapshot_path, exc_info=True)
+    return loaded, "yaml"
+
+
+def load_config_files(snapshot_path=SNAPSHOT_PATH, **paths):
+    """
+    Load catalogue/schema/mapping: dùng snapshot nếu còn mới, không thì parse
+    nguồn (libyaml nếu có). Trả về (CatalogueIndex, schema, CompiledMapping, info)
+    với info = {"source": "snapshot" | "yaml", "seconds": ...}.
+    """
+    start = time.perf_counter()
+    paths = source_paths(**paths)
+    raw = {name: _read(path) for name, path in paths.items()}
+    loaded, source = load_or_parse(raw, paths, snapshot_path)
+    catalogue, schema, mapping = loaded
+    index = CatalogueIndex(catalogue)
+    info = {"source": source, "seconds": time.perf_counter() - start}
+    logger.info("Config loaded from %s in %.1f ms", source, info["seconds"] * 1000)
+    return index, schema, mapping, info
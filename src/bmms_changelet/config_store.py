@@ -0,0 +1,155 @@
+import hashlib
+import logging
+import threading
+import time
+from pathlib import Path
+
+from .catalogue_index import CatalogueIndex
+from .config_snapshot import SNAPSHOT_PATH, hash_sources, load_or_parse
+from .validator import CATALOG_PATH, SCHEMA_PATH, get_validator
+from .convert_to_helm import MAPPING_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigSnapshot:
+    """
+    Một phiên bản bất biến của catalogue/schema/mapping cùng các index dẫn xuất.
+    Request lấy snapshot một lần và dùng nó đến hết, nên không bao giờ thấy
+    trạng thái nửa cũ nửa mới.
+    """
+
+    __slots__ = ("version", "catalogue", "schema", "mapping", "loaded_at", "file_hashes")
+
+    def __init__(self, version, catalogue, schema, mapping, file_hashes):
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "catalogue", catalogue)
+        object.__setattr__(self, "schema", schema)
+        object.__setattr__(self, "mapping", mapping)
+        object.__setattr__(self, "file_hashes", file_hashes)
+        object.__setattr__(self, "loaded_at", time.time())
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ConfigSnapshot is immutable")
+
+
+def _stat(path):
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _read(path):
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+class ConfigStore:
+    """
+    Giữ ConfigSnapshot hiện tại và reload khi file thay đổi.
+
+    - reload(): so mtime/size, nếu khác thì so hash nội dung; chỉ dựng lại
+      khi nội dung thật sự đổi. Dựng xong mới swap reference (atomic).
+    - start(interval): thread nền poll file theo chu kỳ.
+    - File lỗi (YAML/JSON hỏng) → giữ snapshot cũ, log lỗi.
+    - Có config.snapshot khớp nội dung file (xem config_snapshot.py) thì
+      dùng nó thay vì parse YAML; `last_load` ghi nguồn + thời gian load.
+    """
+
+    def __init__(self, catalogue_path=CATALOG_PATH, schema_path=SCHEMA_PATH, mapping_path=MAPPING_PATH,
+                 snapshot_path=SNAPSHOT_PATH):
+        self.paths = {
+            "catalogue": Path(catalogue_path),
+            "schema": Path(schema_path),
+            "mapping": Path(mapping_path),
+        }
+        self.snapshot_path = snapshot_path
+        self.last_load = None
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._snapshot = None
+        self._thread = None
+        self._stop = threading.Event()
+        self.reload(force=True)
+
+    # ---- snapshot ----
+    def current(self):
+        return self._snapshot
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def _build(self, raw, file_hashes):
+        start = time.perf_counter()
+        loaded, source = load_or_parse(raw, self.paths, self.snapshot_path, hashes=file_hashes)
+        catalogue, schema, mapping = loaded
+        # compile trước validator + dependency graph + resolver để request đầu tiên không phải trả giá
+        get_validator(schema)
+        index = CatalogueIndex(catalogue)
+        index.resolver
+        for cycle in index.graph.cycles:
+            logger.warning("Dependency cycle in catalogue: %s", " -> ".join(cycle + cycle[:1]))
+        self.last_load = {"source": source, "seconds": time.perf_counter() - start}
+        logger.info("Config loaded from %s in %.1f ms", source, self.last_load["seconds"] * 1000)
+        return index, schema, mapping
+
+    def reload(self, force=False):
+        """Trả về True nếu đã swap sang snapshot mới."""
+        with self._lock:
+            stats = {name: _stat(path) for name, path in self.paths.items()}
+            if not force and stats == self._stats:
+                return False
+
+            raw = {name: _read(path) for name, path in self.paths.items()}
+            file_hashes = hash_sources(raw)
+            current = self._snapshot
+            if not force and current is not None and file_hashes == current.file_hashes:
+                # chỉ mtime đổi (touch, checkout lại) → không cần dựng lại
+                self._stats = stats
+                return False
+
+            try:
+                catalogue, schema, mapping = self._build(raw, file_hashes)
+            except Exception:
+                if current is None:
+                    raise
+                logger.exception("Config reload failed; keeping version %s", current.version)
+                self._stats = stats
+                return False
+
+            combined = hashlib.sha256(
+                "".join(file_hashes[name] for name in sorted(file_hashes)).encode("ascii")
+            ).hexdigest()
+            self._snapshot = ConfigSnapshot(combined[:12], catalogue, schema, mapping, file_hashes)
+            self._stats = stats
+            if current is not None:
+                logger.info("Config reloaded: %s -> %s", current.version, self._snapshot.version)
+            return True
+
+    # ---- watcher ----
+    def start(self, interval=5.0):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._watch, args=(interval,), name="bmms-config-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.reload()
+            except Exception:
+                logger.exception("Config watcher error")
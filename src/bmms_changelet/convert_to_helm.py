@@ -1,19 +1,26 @@
 import yaml
 import sys
+import threading
+from collections import OrderedDict
 from pathlib import Path
 
+from .metrics import timed
+from .model import ChangeSet
+from .validator import load_yaml
+
 BASE_DIR = Path(__file__).resolve().parents[2]  # repo root
 MAPPING_PATH = BASE_DIR / "schema" / "mapping.yaml"
 
-def load_mapping():
+def load_mapping(path=MAPPING_PATH):
     """
     Load mapping.yaml. Nếu không tồn tại thì trả về rỗng.
     """
-    if not MAPPING_PATH.exists():
-        print(f"⚠️ mapping.yaml not found at {MAPPING_PATH}")
+    path = Path(path)
+    if not path.exists():
+        print(f"⚠️ mapping.yaml not found at {path}", file=sys.stderr)
         return {"mappings": {}}
-    with open(MAPPING_PATH, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+    with open(path, "r", encoding="utf-8") as f:
+        return load_yaml(f)
 
 
 def unflatten_dict(flat_dict):
@@ -30,26 +37,162 @@ def unflatten_dict(flat_dict):
         d[keys[-1]] = v
     return result
 
-def convert(changeset, mapping=None):
+# ------------------------------
+# Compiled mapping
+# ------------------------------
+class MappingConflictError(ValueError):
+    """Hai feature ghi vào cùng Helm path, hoặc path này là tiền tố của path kia."""
+
+
+class CompiledMapping:
     """
-    Convert ChangeSet -> Helm values dựa trên mapping.yaml.
+    mapping.yaml đã compile: mỗi (service, feature) → (slot, parents, leaf)
+    với path đã tách sẵn, để convert() không phải split chuỗi ở mỗi lần gọi.
+    `slot` đánh số các node cha dùng chung; convert() cache node theo slot
+    nên mỗi node cha chỉ phải đi xuống một lần cho mỗi changeset.
+    """
+
+    __slots__ = ("source", "paths", "slot_count")
+
+    def __init__(self, mapping):
+        self.source = mapping
+        self.paths = {}
+        owners = []
+        slots = {}
+        for svc, feature_map in (mapping.get("mappings") or {}).items():
+            compiled = {}
+            for feature, helm_path in (feature_map or {}).items():
+                parts = tuple(str(helm_path).split("."))
+                parents = parts[:-1]
+                slot = slots.setdefault(parents, len(slots))
+                compiled[feature] = (slot, parents, parts[-1])
+                owners.append((parts, f"{svc}.{feature}"))
+            self.paths[svc] = compiled
+        self.slot_count = len(slots)
+        check_path_conflicts(owners)
+
+    def features(self, service):
+        return self.paths.get(service, {})
+
+
+def check_path_conflicts(owners):
+    """
+    owners: list (path tuple, tên feature). Raise MappingConflictError nếu
+    có path trùng nhau hoặc path là tiền tố của path khác (a.b vs a.b.c).
+    """
+    conflicts = []
+    ordered = sorted(owners)
+    # sau khi sort, mọi path có tiền tố p nằm liền sau p
+    for i, (path, owner) in enumerate(ordered):
+        for j in range(i + 1, len(ordered)):
+            other, other_owner = ordered[j]
+            if other[:len(path)] != path:
+                break
+            kind = "same path" if other == path else "overlapping paths"
+            conflicts.append(
+                f"{owner} -> {'.'.join(path)} and {other_owner} -> {'.'.join(other)} ({kind})"
+            )
+    if conflicts:
+        raise MappingConflictError("Conflicting Helm paths in mapping: " + "; ".join(conflicts))
+
+
+class _CompiledCache:
+    """
+    CompiledMapping theo id() của mapping dict (LRU, giữ tham chiếu để id không
+    bị tái sử dụng). Giống ValidatorRegistry: mapping dict được coi là bất biến
+    sau khi compile.
     """
-    if mapping is None:
-        mapping = load_mapping()
 
-    flat_output = {}
-    for ch in changeset.get("changes", []):
-        svc = ch["service"]
-        config = ch.get("config", {})
+    def __init__(self, max_size=16):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
 
-        if svc in mapping.get("mappings", {}):
-            feature_map = mapping["mappings"][svc]
-            for key, value in config.items():
-                if key in feature_map:
-                    helm_path = feature_map[key]
-                    flat_output[helm_path] = value
+    def get(self, mapping):
+        key = id(mapping)
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None and entry[0] is mapping:
+                self._items.move_to_end(key)
+                return entry[1]
+        compiled = CompiledMapping(mapping)
+        with self._lock:
+            self._items[key] = (mapping, compiled)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        return compiled
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+_COMPILED = _CompiledCache()
+
+
+def compile_mapping(mapping):
+    if isinstance(mapping, CompiledMapping):
+        return mapping
+    return _COMPILED.get(mapping)
+
+
+_default_lock = threading.Lock()
+_default = (None, None)
+
+
+def default_mapping(path=MAPPING_PATH):
+    """CompiledMapping của mapping.yaml mặc định; chỉ đọc + compile lại khi file đổi (mtime/size)."""
+    global _default
+    try:
+        st = Path(path).stat()
+        stamp = (str(path), st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = (str(path), None, None)
+    if _default[0] == stamp:
+        return _default[1]
+    with _default_lock:
+        if _default[0] != stamp:
+            _default = (stamp, CompiledMapping(load_mapping(path)))
+        return _default[1]
+
+
+@timed("convert", "total")
+def convert(changeset, mapping=None):
+    """
+    Convert ChangeSet -> Helm values dựa trên mapping.yaml.
+    mapping: dict từ mapping.yaml hoặc CompiledMapping; dict được compile một lần
+    rồi dùng lại (theo object), None → mapping.yaml mặc định (cache theo mtime).
+    changeset: dict hoặc model.ChangeSet.
+    """
+    compiled = default_mapping() if mapping is None else compile_mapping(mapping)
+    paths = compiled.paths
 
-    return unflatten_dict(flat_output)
+    values = {}
+    nodes = [None] * compiled.slot_count
+    if isinstance(changeset, ChangeSet):
+        changes = ((ch.service, ch.config) for ch in changeset.get("changes", []))
+    else:
+        changes = ((ch["service"], ch.get("config")) for ch in changeset.get("changes", []))
+    for service, config in changes:
+        feature_map = paths.get(service)
+        if not feature_map:
+            continue
+        for key, value in (config or {}).items():
+            target = feature_map.get(key)
+            if target is None:
+                continue
+            slot, parents, leaf = target
+            node = nodes[slot]
+            if node is None:
+                node = values
+                for part in parents:
+                    child = node.get(part)
+                    if child is None:
+                        child = node[part] = {}
+                    node = child
+                nodes[slot] = node
+            node[leaf] = value
+    return values
 
 def export_to_file(changeset, out_path="values.yaml"):
     values = convert(changeset)
@@ -63,7 +206,7 @@ if __name__ == "__main__":
     import sys
 
     if len(sys.argv) < 2:
-        print("Usage: convert_to_helm.py changeset.json [output.yaml]")
+        print("Usage: python -m bmms_changelet.convert_to_helm changeset.json [output.yaml]")
         sys.exit(1)
 
     ch_path = Path(sys.argv[1])
@@ -0,0 +1,303 @@
+"""
+Re-validate một ChangeSet sau khi sửa (JSON Patch) mà không chạy lại mọi check.
+
+Kết quả của các check theo từng change (schema của item, service tồn tại,
+permission theo role, dependency, service bị ảnh hưởng) được cache theo hash
+nội dung của change. Khi reviewer sửa một change trong ChangeSet lớn, chỉ change
+đó được check lại; các policy mức ChangeSet (schema phần ngoài `changes`, quota,
+risk/confidence) luôn chạy lại. Kết quả ghép lại giống hệt validate_changeset.
+"""
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from .catalogue_index import CatalogueIndex
+from .json_patch import apply_patch
+from .metrics import VALIDATIONS_TOTAL, stage
+from .validator import (
+    check_dependencies,
+    check_permissions,
+    check_services_exist,
+    enforce_risk_confidence,
+    get_validator,
+    validate_changeset,
+)
+
+# keyword ở gốc schema mà việc tách "phần ngoài changes" / "từng item" vẫn giữ
+# nguyên kết quả; gặp keyword khác ($ref, allOf, ...) thì validate schema cả document
+_SPLITTABLE_ROOT = frozenset({
+    "$schema", "$id", "title", "description", "type", "required", "properties",
+    "additionalProperties",
+})
+
+
+def change_hash(change):
+    """Hash ổn định của một change (giữ thứ tự key: message lỗi schema có repr của instance)."""
+    canonical = json.dumps(change, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def split_schema(schema):
+    """
+    ChangeSet schema → (schema không có `changes.items`, schema của một item),
+    hoặc None nếu schema không tách được an toàn.
+    """
+    if not isinstance(schema, dict) or set(schema) - _SPLITTABLE_ROOT:
+        return None
+    changes = (schema.get("properties") or {}).get("changes")
+    if not isinstance(changes, dict) or not isinstance(changes.get("items"), dict):
+        return None
+    outer_changes = {k: v for k, v in changes.items() if k != "items"}
+    outer = dict(schema)
+    outer["properties"] = dict(schema["properties"], changes=outer_changes)
+    return outer, changes["items"]
+
+
+def _schema_errors(validator, instance, prefix=()):
+    return [(prefix + tuple(e.path), e.message) for e in validator.iter_errors(instance)]
+
+
+def _shape_errors(changes):
+    """Lỗi dạng schema cho change không phải object hoặc thiếu action/service."""
+    errors = []
+    for i, ch in enumerate(changes):
+        if not isinstance(ch, dict):
+            errors.append((("changes", i), f"{ch!r} is not of type 'object'"))
+            continue
+        errors.extend(
+            (("changes", i), f"'{key}' is a required property") for key in ("action", "service") if key not in ch
+        )
+    return errors
+
+
+def _format_schema_errors(errors):
+    # sort ổn định theo path, giống validate_schema_instance
+    errors = sorted(errors, key=lambda e: e[0])
+    return [f"{'/'.join(map(str, path))}: {message}" for path, message in errors]
+
+# ------------------------------
+# Verdict của một change
+# ------------------------------
+class ChangeVerdict:
+    """Kết quả check của một change, tính lười theo từng bước (giống thứ tự short-circuit)."""
+
+    __slots__ = ("change", "_schema", "_services", "_dependencies", "_impact", "_permissions")
+
+    def __init__(self, change):
+        # bản sao riêng: caller có thể sửa dict gốc sau khi validate
+        self.change = copy.deepcopy(change)
+        self._schema = None
+        self._services = None
+        self._dependencies = None
+        self._impact = None
+        self._permissions = {}
+
+    def schema_errors(self, item_validator):
+        """list (path tương đối trong item, message)."""
+        if self._schema is None:
+            self._schema = _schema_errors(item_validator, self.change)
+        return self._schema
+
+    def service_errors(self, catalogue):
+        if self._services is None:
+            self._services = check_services_exist({"changes": [self.change]}, catalogue)
+        return self._services
+
+    def permission_errors(self, role):
+        errs = self._permissions.get(role)
+        if errs is None:
+            errs = self._permissions[role] = check_permissions({"changes": [self.change]}, role)
+        return errs
+
+    def dependencies(self, catalogue):
+        """(requires_human, warnings, impact mask)."""
+        if self._dependencies is None:
+            self._dependencies = check_dependencies({"changes": [self.change]}, catalogue)
+            self._impact = catalogue.graph.impact_mask(self.change)
+        return self._dependencies + (self._impact,)
+
+# ------------------------------
+# Delta validator
+# ------------------------------
+class DeltaValidator:
+    """
+    validate_changeset có cache theo từng change, gắn với một catalogue + schema.
+
+    - validate(changeset) → (result, reused): result giống validate_changeset,
+      reused là số change lấy verdict từ cache
+    - revalidate(previous, patch) → (changeset mới, result, reused)
+
+    Thread-safe; giữ tối đa max_entries verdict (LRU).
+    """
+
+    def __init__(self, catalogue, schema, ledger=None, max_entries=10000):
+        self.catalogue = CatalogueIndex.from_catalogue(catalogue)
+        self.schema = schema
+        self.ledger = ledger
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._verdicts = OrderedDict()
+
+        get_validator(schema)  # schema lỗi → báo ngay khi dựng
+        split = split_schema(schema)
+        if split is None:
+            self._outer_validator = self._item_validator = None
+        else:
+            self._outer_validator = get_validator(split[0])
+            self._item_validator = get_validator(split[1])
+
+    def __len__(self):
+        return len(self._verdicts)
+
+    def clear(self):
+        with self._lock:
+            self._verdicts.clear()
+
+    def _verdict(self, change):
+        key = change_hash(change)
+        with self._lock:
+            verdict = self._verdicts.get(key)
+            if verdict is not None:
+                self._verdicts.move_to_end(key)
+                return verdict, True
+        verdict = ChangeVerdict(change)
+        with self._lock:
+            verdict = self._verdicts.setdefault(key, verdict)
+            while len(self._verdicts) > self.max_entries:
+                self._verdicts.popitem(last=False)
+        return verdict, False
+
+    def validate(self, changeset):
+        if not isinstance(changeset, dict):
+            return validate_changeset(changeset, self.catalogue, self.schema, self.ledger), 0
+        result, reused = self._validate(changeset)
+        VALIDATIONS_TOTAL.inc(status=result["status"])
+        return result, reused
+
+    def revalidate(self, previous, patch):
+        """Áp JSON Patch lên ChangeSet trước đó rồi validate; raise JsonPatchError nếu patch lỗi."""
+        changeset = apply_patch(previous, patch)
+        result, reused = self.validate(changeset)
+        return changeset, result, reused
+
+    def _validate(self, changeset):
+        catalogue = self.catalogue
+        result = {
+            "status": "pending",
+            "errors": [],
+            "warnings": [],
+        }
+        changes = changeset.get("changes")
+        if not isinstance(changes, list):
+            changes = []
+        verdicts = []
+        reused = 0
+        for ch in changes:
+            verdict, hit = self._verdict(ch)
+            verdicts.append(verdict)
+            reused += hit
+
+        # 1) Schema: phần ngoài changes + từng item (cache)
+        with stage("validate", "schema"):
+            if self._outer_validator is None:
+                errors = _schema_errors(get_validator(self.schema), changeset)
+            else:
+                errors = _schema_errors(self._outer_validator, changeset)
+                for i, verdict in enumerate(verdicts):
+                    errors.extend(
+                        (("changes", i) + path, message)
+                        for path, message in verdict.schema_errors(self._item_validator)
+                    )
+            if not errors:
+                # schema không ràng buộc item (vd. allOf ở root): các bước sau cần item là object có action/service
+                errors = _shape_errors(changes)
+        if errors:
+            result["status"] = "rejected"
+            result["errors"].extend(_format_schema_errors(errors))
+            return result, reused
+
+        # 2) Service existence
+        with stage("validate", "services"):
+            svc_errs = [e for v in verdicts for e in v.service_errors(catalogue)]
+        if svc_errs:
+            result["status"] = "rejected"
+            result["errors"].extend(svc_errs)
+            return result, reused
+
+        # 3) Role permission
+        ctx = changeset.get("request_context")
+        role = ctx.get("role", "user") if isinstance(ctx, dict) else "user"
+        with stage("validate", "permissions"):
+            perm_errs = [e for v in verdicts for e in v.permission_errors(role)]
+        if perm_errs:
+            result["status"] = "rejected"
+            result["errors"].extend(perm_errs)
+            return result, reused
+
+        # 3b) Cluster quota: tổng hợp trên cả ChangeSet, luôn chạy lại
+        if self.ledger is not None:
+            with stage("validate", "quota"):
+                quota_errs = self.ledger.check_changeset(changeset)
+            if quota_errs:
+                result["status"] = "rejected"
+                result["errors"].extend(quota_errs)
+                return result, reused
+
+        # 4) Dependency + service bị ảnh hưởng
+        with stage("validate", "dependencies"):
+            dep_requires_human = False
+            mask = 0
+            for v in verdicts:
+                requires_human, warnings, impact = v.dependencies(catalogue)
+                dep_requires_human = dep_requires_human or requires_human
+                result["warnings"].extend(warnings)
+                mask |= impact
+            result["impacted_services"] = catalogue.graph.names(mask)
+
+        # 5) Risk & confidence
+        with stage("validate", "risk"):
+            status_decision, rc_msgs = enforce_risk_confidence(changeset)
+        result["warnings"].extend(rc_msgs)
+
+        if status_decision == "requires_human" or dep_requires_human:
+            result["status"] = "requires_human"
+        else:
+            result["status"] = "validated"
+        return result, reused
+
+# ------------------------------
+# ChangeSet đã validate, tra theo id (cho API delta)
+# ------------------------------
+class ChangesetHistory:
+    """LRU id → ChangeSet đã validate; bản sao sâu để caller sửa thoải mái."""
+
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+
+    def put(self, changeset, copy_data=True):
+        """copy_data=False: caller nhường luôn object (không sửa nó sau đó) → không deepcopy."""
+        cid = changeset.get("id") if isinstance(changeset, dict) else None
+        if not isinstance(cid, str):
+            return
+        if copy_data:
+            changeset = copy.deepcopy(changeset)
+        with self._lock:
+            self._items[cid] = changeset
+            self._items.move_to_end(cid)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def get(self, cid):
+        with self._lock:
+            changeset = self._items.get(cid)
+            if changeset is None:
+                return None
+            self._items.move_to_end(cid)
+        return copy.deepcopy(changeset)
+
+    def __len__(self):
+        return len(self._items)
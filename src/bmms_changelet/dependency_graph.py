@@ -0,0 +1,200 @@
+from .catalogue_index import CatalogueIndex
+
+
+def _strongly_connected(n, edges):
+    """
+    Tarjan (không đệ quy). edges[i]: list node mà i phụ thuộc.
+    Trả về các SCC theo thứ tự phụ thuộc trước (SCC được emit sau mọi SCC mà nó trỏ tới).
+    """
+    index_of = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    stack = []
+    components = []
+    counter = 0
+
+    for root in range(n):
+        if index_of[root] != -1:
+            continue
+        work = [(root, 0)]
+        while work:
+            v, pos = work.pop()
+            if pos == 0:
+                index_of[v] = low[v] = counter
+                counter += 1
+                stack.append(v)
+                on_stack[v] = True
+            recurse = False
+            for j in range(pos, len(edges[v])):
+                w = edges[v][j]
+                if index_of[w] == -1:
+                    work.append((v, j + 1))
+                    work.append((w, 0))
+                    recurse = True
+                    break
+                if on_stack[w]:
+                    low[v] = min(low[v], index_of[w])
+            if recurse:
+                continue
+            if low[v] == index_of[v]:
+                comp = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    comp.append(w)
+                    if w == v:
+                        break
+                components.append(comp)
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[v])
+    return components
+
+
+class DependencyGraph:
+    """
+    Đồ thị phụ thuộc dựng một lần từ catalogue.
+
+    Service được đánh số theo thứ tự enable (phụ thuộc trước), mỗi tập service
+    là một bitset (int). Bao đóng bắc cầu được tính sẵn, nên hỏi
+    "service này kéo theo / ảnh hưởng tới những service nào" chỉ là một phép tra.
+    """
+
+    def __init__(self, catalogue):
+        index = CatalogueIndex.from_catalogue(catalogue)
+        ids = [s["id"] for s in index]
+        pos = {sid: i for i, sid in enumerate(ids)}
+        n = len(ids)
+
+        self.missing = []  # (service, dependency không có trong catalogue)
+        edges = [[] for _ in range(n)]
+        for i, sid in enumerate(ids):
+            for dep in index.dependencies(sid):
+                svc = index.get(dep)
+                if svc is None:
+                    self.missing.append((sid, dep))
+                else:
+                    edges[i].append(pos[svc["id"]])
+
+        components = _strongly_connected(n, edges)
+
+        # đánh số lại theo thứ tự topo (phụ thuộc trước) để bit thấp = enable trước
+        order = [v for comp in components for v in sorted(comp)]
+        rank = {v: r for r, v in enumerate(order)}
+        self.ids = tuple(ids[v] for v in order)
+        self._bit = {sid: 1 << r for r, sid in enumerate(self.ids)}
+        self._index = index
+
+        self.cycles = []
+        comp_of = [0] * n
+        comp_mask = []
+        for c, comp in enumerate(components):
+            mask = 0
+            for v in comp:
+                comp_of[v] = c
+                mask |= 1 << rank[v]
+            comp_mask.append(mask)
+            if len(comp) > 1 or comp[0] in edges[comp[0]]:
+                self.cycles.append([ids[v] for v in sorted(comp, key=rank.get)])
+
+        # requires: bao đóng các service phụ thuộc (không gồm chính nó trừ khi có vòng)
+        comp_requires = [0] * len(components)
+        for c, comp in enumerate(components):
+            mask = 0
+            for v in comp:
+                for w in edges[v]:
+                    d = comp_of[w]
+                    mask |= comp_mask[d] | (comp_requires[d] if d != c else 0)
+            comp_requires[c] = mask
+
+        # dependents: ngược lại, đi từ SCC cuối về đầu
+        reverse = [[] for _ in range(len(components))]
+        for v in range(n):
+            for w in edges[v]:
+                if comp_of[v] != comp_of[w]:
+                    reverse[comp_of[w]].append(comp_of[v])
+        comp_dependents = [0] * len(components)
+        for c in range(len(components) - 1, -1, -1):
+            mask = comp_mask[c] if comp_requires[c] & comp_mask[c] else 0
+            for d in reverse[c]:
+                mask |= comp_mask[d] | comp_dependents[d]
+            comp_dependents[c] = mask
+
+        self._requires = {}
+        self._dependents = {}
+        for v in range(n):
+            sid = ids[v]
+            self._requires[sid] = comp_requires[comp_of[v]]
+            self._dependents[sid] = comp_dependents[comp_of[v]]
+        # service → vòng (SCC) chứa nó, tra O(1)
+        self._cycle_of = {sid: cycle for cycle in self.cycles for sid in cycle}
+
+    # ---- bitset helpers ----
+    def _id(self, service_name):
+        svc = self._index.get(service_name)
+        return None if svc is None else svc["id"]
+
+    def mask(self, services):
+        m = 0
+        for name in services:
+            sid = self._id(name)
+            if sid is not None:
+                m |= self._bit[sid]
+        return m
+
+    def names(self, mask):
+        """Bitset → list id service theo thứ tự enable."""
+        out = []
+        while mask:
+            low = mask & -mask
+            out.append(self.ids[low.bit_length() - 1])
+            mask ^= low
+        return out
+
+    # ---- queries ----
+    def requires_mask(self, service_name):
+        sid = self._id(service_name)
+        return 0 if sid is None else self._requires[sid]
+
+    def dependents_mask(self, service_name):
+        sid = self._id(service_name)
+        return 0 if sid is None else self._dependents[sid]
+
+    def requires(self, service_name):
+        """Các service mà service_name phụ thuộc (bắc cầu)."""
+        return self.names(self.requires_mask(service_name))
+
+    def dependents(self, service_name):
+        """Các service phụ thuộc (bắc cầu) vào service_name."""
+        return self.names(self.dependents_mask(service_name))
+
+    def in_cycle(self, service_name):
+        return self._id(service_name) in self._cycle_of
+
+    def cycle_of(self, service_name):
+        return self._cycle_of.get(self._id(service_name))
+
+    def impact_mask(self, change):
+        """
+        Service bị ảnh hưởng bởi một change: chính nó + các service phụ thuộc vào nó;
+        change "enable" còn kéo theo các service nó cần.
+        """
+        sid = self._id(change.get("service"))
+        if sid is None:
+            return 0
+        mask = self._bit[sid] | self._dependents[sid]
+        if change.get("action") == "enable":
+            mask |= self._requires[sid]
+        return mask
+
+    def impacted_services(self, changeset):
+        mask = 0
+        for ch in changeset.get("changes", []):
+            mask |= self.impact_mask(ch)
+        return self.names(mask)
+
+    def enable_order(self, services=None):
+        """Thứ tự enable (phụ thuộc trước); services=None → toàn bộ catalogue."""
+        if services is None:
+            return list(self.ids)
+        return self.names(self.mask(services))
@@ -0,0 +1,85 @@
+"""
+Sinh id ChangeSet: đơn điệu, sắp xếp được theo thời gian, không trùng.
+
+Dạng ULID: 48 bit thời gian (ms) + 80 bit ngẫu nhiên, mã hóa Crockford
+base32 (26 ký tự, chữ hoa + số) → "chg-auto-01JAB3...", khớp pattern
+`^chg-[A-Za-z0-9\\-]+$` của schema.
+
+- Trong cùng một ms, phần ngẫu nhiên được tăng thêm 1 thay vì bốc lại
+  → id sinh sau luôn lớn hơn (kể cả khi đồng hồ hệ thống lùi).
+- Thread-safe; sau fork process con bốc lại phần ngẫu nhiên nên không
+  sinh trùng dãy id với process cha. Giữa các process, thứ tự chỉ đúng
+  tới mức ms; trùng id cần hai lần bốc 80 bit ngẫu nhiên gần nhau.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_DECODE = {c: i for i, c in enumerate(CROCKFORD)}
+_RANDOM_BITS = 80
+_LENGTH = 26
+
+DEFAULT_PREFIX = "chg-auto-"
+
+
+def _encode(value):
+    chars = []
+    for _ in range(_LENGTH):
+        chars.append(CROCKFORD[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def _random():
+    return int.from_bytes(os.urandom(_RANDOM_BITS // 8), "big")
+
+
+class IdGenerator:
+    def __init__(self, prefix=DEFAULT_PREFIX):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._rand = 0
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # lock có thể đang bị thread khác giữ lúc fork; state của cha không dùng lại
+        self._lock = threading.Lock()
+        self._last_ms = -1
+
+    def new(self):
+        now_ms = time.time_ns() // 1_000_000
+        with self._lock:
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._rand = _random()
+            else:
+                self._rand += 1
+                if self._rand >> _RANDOM_BITS:
+                    # hết 2^80 id trong một ms (hoặc đồng hồ lùi lâu) → mượn ms kế tiếp
+                    self._last_ms += 1
+                    self._rand = _random()
+            value = (self._last_ms << _RANDOM_BITS) | self._rand
+        return self.prefix + _encode(value)
+
+
+def id_datetime(changeset_id, prefix=DEFAULT_PREFIX):
+    """Thời điểm (UTC, độ chính xác ms) ghi trong id; None nếu không phải id do IdGenerator sinh."""
+    if not isinstance(changeset_id, str) or not changeset_id.startswith(prefix):
+        return None
+    body = changeset_id[len(prefix):]
+    if len(body) != _LENGTH or any(c not in _DECODE for c in body):
+        return None
+    value = 0
+    for c in body:
+        value = (value << 5) | _DECODE[c]
+    return datetime.fromtimestamp((value >> _RANDOM_BITS) / 1000, tz=timezone.utc)
+
+
+_DEFAULT = IdGenerator()
+
+
+def new_changeset_id():
+    return _DEFAULT.new()
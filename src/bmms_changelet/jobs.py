@@ -0,0 +1,323 @@
+"""
+Hàng đợi job trong process cho batch validate / convert / pipeline lớn.
+
+Client submit cả batch, nhận job id rồi poll (hoặc stream) tiến độ và kết quả,
+không phải giữ một HTTP request mở suốt thời gian xử lý. Không cần broker:
+
+- workers thread lấy job từ hàng đợi (tối đa max_queued job đang chờ, đầy →
+  QueueFull), chạy từng chunk item và ghi kết quả dần vào job
+- processes > 0: chunk được chạy trong ProcessPoolExecutor cục bộ (mỗi process
+  giữ một ConfigStore riêng, nạp lại khi config version của job khác; config trên
+  đĩa đã đổi sang version khác nữa → job FAILED với ConfigChanged)
+- cancel(): job đang chờ bị hủy ngay, job đang chạy dừng sau chunk hiện tại
+- job đã kết thúc bị xóa sau result_ttl giây (worker dọn định kỳ, kể cả khi
+  server không nhận request nào)
+"""
+import multiprocessing
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from .batch import validate_item
+from .config_store import ConfigStore
+from .convert_to_helm import convert
+from .pipeline import process_raw
+from .validator import validate_schema_instance
+
+JOB_KINDS = ("validate", "convert", "pipeline")
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = frozenset({SUCCEEDED, FAILED, CANCELLED})
+
+
+class QueueFull(Exception):
+    """Hàng đợi đã đủ max_queued job đang chờ."""
+
+
+class ConfigChanged(Exception):
+    """Config trên đĩa đã khác config version của job (process con không còn dựng lại được)."""
+
+# ------------------------------
+# Xử lý một item / một chunk
+# ------------------------------
+def run_item(kind, index, item, config):
+    """config: ConfigSnapshot (catalogue, schema, mapping). Một item lỗi không làm hỏng cả job."""
+    if kind == "validate":
+        return validate_item(index, item, config.catalogue, config.schema)
+    try:
+        if kind == "convert":
+            ok, errors = validate_schema_instance(item, config.schema)
+            if not ok:
+                return {"index": index, "errors": errors}
+            return {"index": index, "values": convert(item, config.mapping)}
+        return {"index": index, **process_raw(item, config.catalogue, config.schema, config.mapping)}
+    except Exception as exc:
+        return {"index": index, "error": f"{type(exc).__name__}: {exc}"}
+
+
+def run_chunk(kind, chunk, config):
+    return [run_item(kind, index, item, config) for index, item in chunk]
+
+
+_PROCESS_STORE = None
+
+
+def _init_process(paths):
+    global _PROCESS_STORE
+    # paths: {"catalogue": ..., "schema": ..., "mapping": ...} như ConfigStore.paths
+    _PROCESS_STORE = ConfigStore(**{f"{name}_path": path for name, path in paths.items()})
+
+
+def _run_chunk_in_process(kind, chunk, version):
+    if _PROCESS_STORE.version != version:
+        _PROCESS_STORE.reload()
+        # reload() nạp config đang có trên đĩa: nếu config đã đổi tiếp thì không validate
+        # job bằng một config khác với config_version của nó
+        if _PROCESS_STORE.version != version:
+            raise ConfigChanged(
+                f"config changed during job: expected {version}, worker has {_PROCESS_STORE.version}"
+            )
+    return run_chunk(kind, chunk, _PROCESS_STORE.current())
+
+
+def _mp_context():
+    # process Django đã có nhiều thread (config watcher, job worker): fork lúc này có thể
+    # deadlock (lock bị giữ lúc fork) → khởi động process con bằng forkserver / spawn
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _chunked(items, size):
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+# ------------------------------
+# Job
+# ------------------------------
+class Job:
+    def __init__(self, kind, items, config):
+        self.id = f"job-{uuid.uuid4().hex}"
+        self.kind = kind
+        self.total = len(items)
+        self.status = QUEUED
+        self.error = None
+        self.results = []
+        self.config_version = config.version
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._items = items
+        self._config = config
+        self._cancel = threading.Event()
+        self._cond = threading.Condition()
+
+    def summary(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "total": self.total,
+            "done": len(self.results),
+            "error": self.error,
+            "config_version": self.config_version,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    def _add_results(self, results):
+        with self._cond:
+            self.results.extend(results)
+            self._cond.notify_all()
+
+    def _finish(self, status, error=None):
+        with self._cond:
+            self.status = status
+            self.error = error
+            self.finished_at = time.time()
+            self._items = self._config = None
+            self._cond.notify_all()
+
+    def wait(self, seen=0, timeout=None):
+        """Chờ tới khi có kết quả mới sau vị trí `seen` hoặc job kết thúc → (kết quả mới, status)."""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: len(self.results) > seen or self.status in FINISHED, timeout
+            )
+            return self.results[seen:], self.status
+
+    def iter_results(self, poll_interval=1.0):
+        """Yield từng kết quả khi nó xong, tới khi job kết thúc."""
+        seen = 0
+        while True:
+            new, status = self.wait(seen, poll_interval)
+            yield from new
+            seen += len(new)
+            if status in FINISHED and not new:
+                return
+
+# ------------------------------
+# Queue
+# ------------------------------
+class JobQueue:
+    def __init__(self, workers=2, processes=0, max_queued=32, result_ttl=900, chunk_size=64,
+                 config_paths=None, purge_interval=60):
+        self.workers = workers
+        self.processes = processes
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        # worker rảnh thức dậy sau mỗi purge_interval giây để xóa job hết hạn
+        self.purge_interval = purge_interval
+        self.chunk_size = chunk_size
+        self.config_paths = {k: str(v) for k, v in (config_paths or {}).items()}
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._queue = deque()
+        self._jobs = OrderedDict()
+        self._threads = []
+        self._pool = None
+        self._closed = False
+
+    # ---- API ----
+    def submit(self, kind, items, config):
+        """items: list item (ChangeSet, hoặc raw LLM output với kind="pipeline")."""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind!r} (expected one of {', '.join(JOB_KINDS)})")
+        job = Job(kind, list(items), config)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("JobQueue is shut down")
+            self._purge()
+            if len(self._queue) >= self.max_queued:
+                raise QueueFull(f"Job queue is full ({self.max_queued} jobs waiting)")
+            self._jobs[job.id] = job
+            self._queue.append(job)
+            self._start_workers()
+            self._ready.notify()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Trả về job (None nếu không có / đã hết hạn)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job._cancel.set()
+            if job.status == QUEUED:
+                self._queue.remove(job)
+                job._finish(CANCELLED)
+        return job
+
+    def stats(self):
+        with self._lock:
+            self._purge()
+            counts = {status: 0 for status in (QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED)}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            self._closed = True
+            for job in self._queue:
+                job._cancel.set()
+                job._finish(CANCELLED)
+            self._queue.clear()
+            self._ready.notify_all()
+            threads, self._threads = self._threads, []
+        if wait:
+            for thread in threads:
+                thread.join()
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+    # ---- internals ----
+    def _purge(self):
+        # job đã kết thúc quá result_ttl giây → xóa cả kết quả
+        deadline = time.time() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < deadline
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _start_workers(self):
+        if self._threads:
+            return
+        if self.processes:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.processes, mp_context=_mp_context(),
+                initializer=_init_process, initargs=(self.config_paths,),
+            )
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"bmms-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            with self._lock:
+                while not self._ready.wait_for(
+                    lambda: self._queue or self._closed, self.purge_interval
+                ):
+                    self._purge()
+                if self._closed:
+                    return
+                job = self._queue.popleft()
+                job.status = RUNNING
+                job.started_at = time.time()
+            self._run(job)
+
+    def _run(self, job):
+        try:
+            for chunk in _chunked(enumerate(job._items), self.chunk_size):
+                if job._cancel.is_set():
+                    job._finish(CANCELLED)
+                    return
+                if self._pool is not None:
+                    future = self._pool.submit(_run_chunk_in_process, job.kind, chunk, job.config_version)
+                    results = future.result()
+                else:
+                    results = run_chunk(job.kind, chunk, job._config)
+                job._add_results(results)
+        except Exception as exc:
+            job._finish(FAILED, f"{type(exc).__name__}: {exc}")
+            return
+        job._finish(SUCCEEDED)
+
+
+def build_job_queue(options, config_paths=None):
+    """
+    options (dict, thường từ settings.BMMS_JOBS): ENABLED, WORKERS, PROCESSES,
+    MAX_QUEUED, RESULT_TTL, CHUNK_SIZE, PURGE_INTERVAL. Trả về None nếu tắt.
+    """
+    options = options or {}
+    if not options.get("ENABLED", False):
+        return None
+    return JobQueue(
+        workers=options.get("WORKERS", 2),
+        processes=options.get("PROCESSES", 0),
+        max_queued=options.get("MAX_QUEUED", 32),
+        result_ttl=options.get("RESULT_TTL", 900),
+        chunk_size=options.get("CHUNK_SIZE", 64),
+        config_paths=config_paths,
+        purge_interval=options.get("PURGE_INTERVAL", 60),
+    )
@@ -0,0 +1,122 @@
+"""
+JSON Patch (RFC 6902) tối giản: add / remove / replace / move / copy / test,
+đường dẫn theo JSON Pointer (RFC 6901). Đủ cho việc sửa ChangeSet.
+"""
+import copy
+
+_MISSING = object()
+
+
+class JsonPatchError(ValueError):
+    """Patch sai cú pháp hoặc không áp được lên document."""
+
+
+def parse_pointer(pointer):
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    if pointer == "":
+        return []
+    return [part.replace("~1", "/").replace("~0", "~") for part in pointer[1:].split("/")]
+
+
+def _index(container, token, allow_end=False):
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index: {token!r}")
+    i = int(token)
+    if i > len(container) or (i == len(container) and not allow_end):
+        raise JsonPatchError(f"Array index out of range: {token}")
+    return i
+
+
+def _parent(doc, parts):
+    node = doc
+    for token in parts[:-1]:
+        if isinstance(node, list):
+            node = node[_index(node, token)]
+        elif isinstance(node, dict) and token in node:
+            node = node[token]
+        else:
+            raise JsonPatchError(f"Path not found: /{'/'.join(parts)}")
+    return node
+
+
+def _get(doc, parts):
+    if not parts:
+        return doc
+    parent = _parent(doc, parts)
+    token = parts[-1]
+    if isinstance(parent, list):
+        return parent[_index(parent, token)]
+    if isinstance(parent, dict) and token in parent:
+        return parent[token]
+    raise JsonPatchError(f"Path not found: /{'/'.join(parts)}")
+
+
+def _add(doc, parts, value):
+    if not parts:
+        return value
+    parent = _parent(doc, parts)
+    token = parts[-1]
+    if isinstance(parent, list):
+        parent.insert(_index(parent, token, allow_end=True), value)
+    elif isinstance(parent, dict):
+        parent[token] = value
+    else:
+        raise JsonPatchError(f"Cannot add to a scalar at /{'/'.join(parts)}")
+    return doc
+
+
+def _remove(doc, parts):
+    if not parts:
+        raise JsonPatchError("Cannot remove the whole document")
+    parent = _parent(doc, parts)
+    token = parts[-1]
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, token))
+    if isinstance(parent, dict) and token in parent:
+        return parent.pop(token)
+    raise JsonPatchError(f"Path not found: /{'/'.join(parts)}")
+
+
+def apply_patch(doc, patch):
+    """Trả về bản sao của doc sau khi áp patch; doc gốc không đổi."""
+    if not isinstance(patch, list):
+        raise JsonPatchError("Patch must be a JSON array of operations")
+    doc = copy.deepcopy(doc)
+    for n, op in enumerate(patch):
+        if not isinstance(op, dict) or "op" not in op or "path" not in op:
+            raise JsonPatchError(f"Operation {n}: 'op' and 'path' are required")
+        kind = op["op"]
+        parts = parse_pointer(op["path"])
+        value = op.get("value", _MISSING)
+        if kind in ("add", "replace", "test") and value is _MISSING:
+            raise JsonPatchError(f"Operation {n}: '{kind}' requires 'value'")
+
+        if kind == "add":
+            doc = _add(doc, parts, copy.deepcopy(value))
+        elif kind == "remove":
+            _remove(doc, parts)
+        elif kind == "replace":
+            _get(doc, parts)
+            if parts:
+                _remove(doc, parts)
+            doc = _add(doc, parts, copy.deepcopy(value))
+        elif kind in ("move", "copy"):
+            if "from" not in op:
+                raise JsonPatchError(f"Operation {n}: '{kind}' requires 'from'")
+            source = parse_pointer(op["from"])
+            if kind == "move":
+                if parts[:len(source)] == source and parts != source:
+                    raise JsonPatchError(f"Operation {n}: cannot move a value into itself")
+                value = _remove(doc, source) if source else doc
+            else:
+                value = copy.deepcopy(_get(doc, source))
+            doc = _add(doc, parts, value)
+        elif kind == "test":
+            if _get(doc, parts) != value:
+                raise JsonPatchError(f"Operation {n}: test failed at {op['path']}")
+        else:
+            raise JsonPatchError(f"Operation {n}: unknown op {kind!r}")
+    return doc
@@ -0,0 +1,215 @@
+import bisect
+import functools
+import threading
+import time
+
+# ------------------------------
+# Bật/tắt toàn cục. Khi tắt, timer trả về một context no-op dùng chung,
+# chi phí chỉ còn một lần gọi hàm + một lần kiểm tra cờ.
+# ------------------------------
+_ENABLED = False
+
+
+def set_enabled(enabled):
+    global _ENABLED
+    _ENABLED = bool(enabled)
+
+
+def is_enabled():
+    return _ENABLED
+
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        if not _ENABLED:
+            return
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(n, "") for n in self.labelnames), 0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [counts per bucket + inf, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, **labels):
+        if not _ENABLED:
+            return
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += seconds
+
+    def time(self, **labels):
+        if not _ENABLED:
+            return _NOOP
+        return _Timer(self, labels)
+
+    def count(self, **labels):
+        series = self._series.get(tuple(labels.get(n, "") for n in self.labelnames))
+        return 0 if series is None else sum(series[0])
+
+    def render(self):
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1])) for k, v in self._series.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+# ------------------------------
+# Registry + Prometheus text format
+# ------------------------------
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def register_collector(self, collect):
+        """
+        collect() -> iterable (name, kind, help, [(labels dict, value)]).
+        Dùng cho số liệu đọc lúc scrape (vd. thống kê result cache).
+        """
+        self._collectors.append(collect)
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            for name, kind, help_text, samples in collect():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Metrics của core pipeline
+STAGE_SECONDS = REGISTRY.histogram(
+    "bmms_stage_seconds",
+    "Thời gian từng bước của normalize/validate/convert.",
+    ("op", "stage"),
+)
+VALIDATIONS_TOTAL = REGISTRY.counter(
+    "bmms_validations_total",
+    "Số ChangeSet đã validate, theo kết quả.",
+    ("status",),
+)
+
+
+def stage(op, name):
+    """`with stage("validate", "schema"): ...` — no-op khi metrics tắt."""
+    if not _ENABLED:
+        return _NOOP
+    return _Timer(STAGE_SECONDS, {"op": op, "stage": name})
+
+
+def timed(op, name):
+    """Decorator đo toàn bộ một hàm core dưới nhãn (op, stage)."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _ENABLED:
+                return func(*args, **kwargs)
+            with _Timer(STAGE_SECONDS, {"op": op, "stage": name}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,178 @@
+"""
+ChangeSet dạng object gọn (`__slots__`) thay cho dict lồng nhau.
+
+Dùng khi cần giữ rất nhiều ChangeSet trong bộ nhớ (batch / job lớn):
+mỗi Change là một object slots thay vì một dict, tên service / action được
+intern nên các change cùng service dùng chung một string.
+
+- from_dict(): không copy — config, impacted_services, giá trị lạ... vẫn là
+  chính object trong JSON đã parse; chỉ dict bọc ngoài được thay bằng object.
+- to_dict(): trả lại đúng dạng dict của schema (bằng == với input, kể cả field
+  không có trong schema và field bị thiếu); object con được dùng chung, không
+  deepcopy.
+- Đọc được như dict (`get`, `[]`, `in`, duyệt key, `len`) nên các hàm kiểm tra
+  trong validator, dependency_graph, quota, và cả JSON schema (validator coi
+  object này là "object") dùng được trực tiếp, không dựng lại dict.
+  normalize(typed=True), validate_changeset() và convert() nhận / trả ChangeSet này.
+
+Input sai cấu trúc (vd. request_context là string) được giữ nguyên giá trị
+gốc để validate vẫn báo đúng lỗi schema.
+"""
+import sys
+
+
+class _Missing:
+    __slots__ = ()
+
+    def __repr__(self):
+        return "MISSING"
+
+    def __bool__(self):
+        return False
+
+
+# field không có trong input (khác với field có giá trị None)
+MISSING = _Missing()
+
+# ------------------------------
+# Base
+# ------------------------------
+class Record:
+    """Base của các type dưới đây: FIELDS là các field của schema, còn lại nằm trong `extra`."""
+
+    __slots__ = ("extra",)
+    FIELDS = ()
+    INTERNED = ()
+
+    def __init__(self, **fields):
+        self._load(fields)
+
+    @classmethod
+    def from_dict(cls, data):
+        obj = cls.__new__(cls)
+        obj._load(data)
+        return obj
+
+    def _load(self, data):
+        found = 0
+        for name in self.FIELDS:
+            value = data.get(name, MISSING)
+            if value is not MISSING:
+                found += 1
+                if name in self.INTERNED and type(value) is str:
+                    value = sys.intern(value)
+            setattr(self, name, value)
+        # field ngoài schema: giữ lại để to_dict() không mất dữ liệu
+        self.extra = {k: v for k, v in data.items() if k not in self._FIELD_SET} if found != len(data) else None
+        self._load_nested()
+
+    def _load_nested(self):
+        pass
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+
+    def get(self, key, default=None):
+        if key in self._FIELD_SET:
+            value = getattr(self, key)
+            return default if value is MISSING else value
+        if self.extra is not None:
+            return self.extra.get(key, default)
+        return default
+
+    def __getitem__(self, key):
+        if key in self._FIELD_SET:
+            value = getattr(self, key)
+            if value is not MISSING:
+                return value
+        elif self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in self._FIELD_SET:
+            return getattr(self, key) is not MISSING
+        return self.extra is not None and key in self.extra
+
+    def __iter__(self):
+        for name in self.FIELDS:
+            if getattr(self, name) is not MISSING:
+                yield name
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        count = sum(1 for name in self.FIELDS if getattr(self, name) is not MISSING)
+        return count + (len(self.extra) if self.extra else 0)
+
+    def to_dict(self):
+        out = {}
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is not MISSING:
+                out[name] = value.to_dict() if isinstance(value, Record) else value
+        if self.extra:
+            out.update(self.extra)
+        return out
+
+    def __eq__(self, other):
+        if type(other) is type(self):
+            return (
+                all(getattr(self, name) == getattr(other, name) for name in self.FIELDS)
+                and (self.extra or None) == (other.extra or None)
+            )
+        if isinstance(other, dict):
+            # so từng field với dict của schema, không dựng to_dict()
+            return len(self) == len(other) and all(
+                key in other and self[key] == other[key] for key in self
+            )
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(
+            f"{name}={getattr(self, name)!r}" for name in self.FIELDS if getattr(self, name) is not MISSING
+        )
+        return f"{type(self).__name__}({fields})"
+
+# ------------------------------
+# Types
+# ------------------------------
+class RequestContext(Record):
+    FIELDS = ("tenant_id", "requested_by", "role")
+    INTERNED = ("tenant_id", "role")
+    __slots__ = FIELDS
+
+
+class Metadata(Record):
+    FIELDS = ("intent_type", "confidence", "risk", "source", "validator_status", "notes")
+    INTERNED = ("intent_type", "risk", "source", "validator_status")
+    __slots__ = FIELDS
+
+
+class Change(Record):
+    FIELDS = ("action", "service", "version", "config", "reason")
+    INTERNED = ("action", "service")
+    __slots__ = FIELDS
+
+
+class ChangeSet(Record):
+    FIELDS = ("id", "intent", "timestamp", "request_context", "changes", "impacted_services", "metadata")
+    INTERNED = ("intent",)
+    __slots__ = FIELDS
+
+    def _load_nested(self):
+        if isinstance(self.request_context, dict):
+            self.request_context = RequestContext.from_dict(self.request_context)
+        if isinstance(self.metadata, dict):
+            self.metadata = Metadata.from_dict(self.metadata)
+        if isinstance(self.changes, list):
+            self.changes = [Change.from_dict(ch) if isinstance(ch, dict) else ch for ch in self.changes]
+
+    def to_dict(self):
+        out = super().to_dict()
+        if isinstance(self.changes, list):
+            out["changes"] = [ch.to_dict() if isinstance(ch, Record) else ch for ch in self.changes]
+        return out
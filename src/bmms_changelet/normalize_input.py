@@ -1,37 +1,111 @@
+import hashlib
 import json
 import sys
 from pathlib import Path
 from datetime import datetime, timezone
 
-# Map tên dịch vụ mà LLM hay sinh ra → tên chuẩn trong service_catalogue.yaml
-SERVICE_ALIAS = {
-    "product_catalog": "catalogue",
-    "customer_service": "customer",
-    "payment_service": "payment",
-    "billing_service": "billing",
-    "order_service": "order",
-    "inventory_service": "inventory",
-    "subscription_service": "subscription",
-    "promotion_service": "promotion"
-}
-
-def normalize(input_json):
+from .catalogue_index import CatalogueIndex
+from .ids import new_changeset_id
+from .metrics import timed
+from .model import ChangeSet
+from .result_cache import MemoryBackend, SQLiteBackend
+from .service_resolver import SERVICE_ALIAS  # noqa: F401 (giữ tên cũ cho code đang import)
+from .validator import load_catalogue_index
+
+_DEFAULT_INDEX = None
+
+
+def _default_index():
+    global _DEFAULT_INDEX
+    if _DEFAULT_INDEX is None:
+        try:
+            _DEFAULT_INDEX = load_catalogue_index()
+        except FileNotFoundError:
+            _DEFAULT_INDEX = CatalogueIndex({"services": []})
+    return _DEFAULT_INDEX
+
+# ------------------------------
+# Chống trùng khi cùng một raw payload được gửi lại (retry)
+# ------------------------------
+class DedupeWindow:
+    """
+    Nhớ ChangeSet đã sinh cho mỗi raw payload trong `ttl` giây: gửi lại đúng
+    payload đó → trả về ChangeSet cũ (cùng id) thay vì sinh ChangeSet mới.
+    backend: MemoryBackend (mặc định, trong process) hoặc SQLiteBackend của
+    result_cache (dùng chung giữa các worker).
+    """
+
+    def __init__(self, ttl=60, max_bytes=8 * 1024 * 1024, backend=None):
+        self.backend = backend or MemoryBackend(max_bytes=max_bytes, ttl=ttl)
+
+    @staticmethod
+    def key(input_json):
+        canonical = json.dumps(input_json, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+        return "normalize:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        data = self.backend.get(key)
+        return None if data is None else json.loads(data)
+
+    def put(self, key, changeset):
+        self.backend.set(key, json.dumps(changeset, ensure_ascii=False).encode("utf-8"))
+
+
+def build_dedupe_window(options):
+    """
+    options (dict, thường từ settings.BMMS_NORMALIZE_DEDUPE):
+        ENABLED, TTL, BACKEND ("memory" | "sqlite"), MAX_BYTES, PATH (chỉ cho sqlite)
+    """
+    options = options or {}
+    if not options.get("ENABLED", False):
+        return None
+    ttl = options.get("TTL", 60)
+    max_bytes = options.get("MAX_BYTES", 8 * 1024 * 1024)
+    backend = options.get("BACKEND", "memory")
+    if backend == "memory":
+        return DedupeWindow(ttl=ttl, max_bytes=max_bytes)
+    if backend == "sqlite":
+        return DedupeWindow(backend=SQLiteBackend(options["PATH"], max_bytes=max_bytes, ttl=ttl))
+    raise ValueError(f"Unknown dedupe backend: {backend}")
+
+
+@timed("normalize", "total")
+def normalize(input_json, catalogue=None, dedupe=None, typed=False):
     """
     Convert từ LLM JSON (proposal_text + changeset.features)
     → ChangeSet chuẩn theo schema.
+    catalogue: dict / CatalogueIndex dùng để resolve tên service
+    (mặc định: schema/service_catalogue.yaml).
+    dedupe: DedupeWindow (tùy chọn); payload đã gặp trong cửa sổ → trả ChangeSet cũ.
+    typed: True → trả model.ChangeSet thay vì dict.
     """
+    if dedupe is not None:
+        dedupe_key = dedupe.key(input_json)
+        previous = dedupe.get(dedupe_key)
+        if previous is not None:
+            return ChangeSet.from_dict(previous) if typed else previous
+
     # Base fields
     proposal_text = input_json.get("proposal_text", "")
     changeset_raw = input_json.get("changeset", {})
     metadata = input_json.get("metadata", {})
 
-    # Sinh id + timestamp (timezone-aware, tránh cảnh báo deprecated)
-    changeset_id = "chg-auto-" + datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    # Sinh id (đơn điệu, không trùng kể cả trong cùng một giây) + timestamp (timezone-aware)
+    changeset_id = new_changeset_id()
     timestamp = datetime.now(timezone.utc).isoformat()
 
-    # Lấy model/service và chuẩn hóa bằng alias
+    # Lấy model/service và resolve về id trong catalogue (alias, chuẩn hóa, gần đúng)
+    index = _default_index() if catalogue is None else CatalogueIndex.from_catalogue(catalogue)
     service_raw = changeset_raw.get("model", "unknown_service")
-    service = SERVICE_ALIAS.get(service_raw, service_raw)
+    service, match_score = index.resolver.resolve(service_raw)
+    if service is None:
+        # không khớp được → giữ nguyên, check_services_exist sẽ báo lỗi
+        service, match_score = service_raw, 1.0
+
+    # tên service đoán gần đúng → giảm confidence theo điểm khớp
+    confidence = metadata.get("confidence", 0.8)
+    if match_score < 1.0 and isinstance(confidence, (int, float)):
+        confidence = round(confidence * match_score, 3)
 
     # Build config từ features
     config = {}
@@ -74,18 +148,20 @@ def normalize(input_json):
         "impacted_services": changeset_raw.get("impacted_services", []),
         "metadata": {
             "intent_type": intent,
-            "confidence": metadata.get("confidence", 0.8),
+            "confidence": confidence,
             "risk": metadata.get("risk", "low"),
             "source": "llm",
             "validator_status": "pending",
             "notes": proposal_text
         }
     }
-    return normalized
+    if dedupe is not None:
+        dedupe.put(dedupe_key, normalized)
+    return ChangeSet.from_dict(normalized) if typed else normalized
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
-        print("Usage: python normalize_input.py raw.json normalized.json")
+        print("Usage: python -m bmms_changelet.normalize_input raw.json normalized.json")
         sys.exit(1)
 
     raw_path = Path(sys.argv[1])
@@ -0,0 +1,125 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from .config_snapshot import SNAPSHOT_PATH, load_config_files
+from .normalize_input import normalize
+from .validator import validate_changeset, CATALOG_PATH, SCHEMA_PATH
+from .convert_to_helm import convert, MAPPING_PATH
+
+# ------------------------------
+# Một bước pipeline: raw LLM output → ChangeSet → verdict → Helm values
+# ------------------------------
+def process_raw(raw, catalogue, schema, mapping, dedupe=None):
+    """
+    Chạy normalize → validate → convert trên một raw LLM output.
+    Bỏ qua convert nếu ChangeSet bị rejected.
+    dedupe: DedupeWindow cho bước normalize (tùy chọn).
+    """
+    changeset = normalize(raw, catalogue, dedupe=dedupe)
+    validation = validate_changeset(changeset, catalogue, schema)
+    if not changeset.get("impacted_services") and "impacted_services" in validation:
+        changeset["impacted_services"] = validation["impacted_services"]
+    values = None
+    if validation["status"] != "rejected":
+        values = convert(changeset, mapping)
+    return {"changeset": changeset, "validation": validation, "values": values}
+
+
+def load_config(catalogue_path=CATALOG_PATH, schema_path=SCHEMA_PATH, mapping_path=MAPPING_PATH,
+                snapshot_path=SNAPSHOT_PATH):
+    """(CatalogueIndex, schema, CompiledMapping), ưu tiên config.snapshot nếu còn mới."""
+    catalogue, schema, mapping, _ = load_config_files(
+        snapshot_path,
+        catalogue_path=catalogue_path,
+        schema_path=schema_path,
+        mapping_path=mapping_path,
+    )
+    return catalogue, schema, mapping
+
+# ------------------------------
+# Worker (mỗi process load config đúng một lần)
+# ------------------------------
+_WORKER_CONFIG = None
+
+
+def _init_worker(catalogue_path, schema_path, mapping_path):
+    global _WORKER_CONFIG
+    _WORKER_CONFIG = load_config(catalogue_path, schema_path, mapping_path)
+
+
+def _process_line(index, line, config):
+    try:
+        raw = json.loads(line)
+    except json.JSONDecodeError as exc:
+        return {"index": index, "error": f"Invalid JSON: {exc.msg} (column {exc.colno})"}
+    if not isinstance(raw, dict):
+        return {"index": index, "error": "Expected a JSON object"}
+    try:
+        return {"index": index, **process_raw(raw, *config)}
+    except Exception as exc:  # một dòng lỗi không làm dừng cả pipeline
+        return {"index": index, "error": f"{type(exc).__name__}: {exc}"}
+
+
+def _process_chunk(chunk):
+    # serialize ngay trong worker để process chính chỉ việc ghi ra
+    return [
+        json.dumps(_process_line(index, line, _WORKER_CONFIG), ensure_ascii=False)
+        for index, line in chunk
+    ]
+
+# ------------------------------
+# Runner
+# ------------------------------
+def iter_lines(lines):
+    """Đánh index cho các dòng không rỗng của JSONL."""
+    index = 0
+    for line in lines:
+        if line.strip():
+            yield index, line
+            index += 1
+
+
+def _chunked(items, size):
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_pipeline(lines, workers=None, chunk_size=64, max_pending=None,
+                 catalogue_path=CATALOG_PATH, schema_path=SCHEMA_PATH, mapping_path=MAPPING_PATH):
+    """
+    Chạy pipeline trên iterable các dòng JSONL, yield các dòng JSON kết quả
+    theo đúng thứ tự input.
+
+    workers=0: chạy trong process hiện tại. Số chunk đang xử lý bị giới hạn
+    bởi max_pending nên input được đọc dần, bộ nhớ không tăng theo kích thước file.
+    """
+    indexed = iter_lines(lines)
+
+    if workers == 0:
+        config = load_config(catalogue_path, schema_path, mapping_path)
+        for index, line in indexed:
+            yield json.dumps(_process_line(index, line, config), ensure_ascii=False)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    if max_pending is None:
+        max_pending = 2 * workers
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(str(catalogue_path), str(schema_path), str(mapping_path)),
+    ) as pool:
+        pending = deque()
+        for chunk in _chunked(indexed, chunk_size):
+            pending.append(pool.submit(_process_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
@@ -0,0 +1,156 @@
+import re
+from array import array
+
+from .catalogue_index import CatalogueIndex
+from .validator import CLUSTER_QUOTA
+
+# ------------------------------
+# Parse Kubernetes resource quantities
+# ------------------------------
+_QUANTITY = re.compile(r"^\s*([0-9]+(?:\.[0-9]+)?)\s*([A-Za-z]*)\s*$")
+
+_MEMORY_UNITS = {
+    "": 1, "k": 10**3, "M": 10**6, "G": 10**9, "T": 10**12,
+    "Ki": 2**10, "Mi": 2**20, "Gi": 2**30, "Ti": 2**40,
+}
+_MIB = 2**20
+
+# config key dùng để khai báo số replica trong change "scale"
+REPLICA_KEYS = ("replicas", "instance_count")
+
+
+def _split(quantity):
+    m = _QUANTITY.match(str(quantity))
+    if not m:
+        raise ValueError(f"Invalid resource quantity: {quantity!r}")
+    return float(m.group(1)), m.group(2)
+
+
+def parse_cpu(quantity):
+    """'200m' -> 200, '1' -> 1000, '0.5' -> 500 (millicores)."""
+    value, unit = _split(quantity)
+    if unit == "m":
+        return int(round(value))
+    if unit == "":
+        return int(round(value * 1000))
+    raise ValueError(f"Invalid CPU unit: {quantity!r}")
+
+
+def parse_memory(quantity):
+    """'512Mi' -> 512, '1Gi' -> 1024, '500M' -> 477 (MiB, làm tròn lên)."""
+    value, unit = _split(quantity)
+    if unit not in _MEMORY_UNITS:
+        raise ValueError(f"Invalid memory unit: {quantity!r}")
+    nbytes = value * _MEMORY_UNITS[unit]
+    return int(-(-nbytes // _MIB))
+
+# ------------------------------
+# Ledger
+# ------------------------------
+class ResourceLedger:
+    """
+    Theo dõi CPU/memory đã dùng của cluster so với quota.
+
+    Request của mỗi service được parse một lần thành mảng số nguyên
+    (cpu_m, memory_mib theo replica), số replica hiện tại cũng là một mảng.
+    Kiểm tra một changeset chỉ tốn O(số change): usage hiện tại được tính
+    sẵn, mỗi change đóng góp (replica mới - replica cũ) * request.
+    """
+
+    def __init__(self, catalogue, quota=CLUSTER_QUOTA, replicas=None):
+        index = CatalogueIndex.from_catalogue(catalogue)
+        replicas = replicas or {}
+        self.index = index
+        self.quota_cpu_m = int(quota["cpu_m"])
+        self.quota_memory_mib = int(quota["memory_mib"])
+        self.service_ids = [s["id"] for s in index]
+        self._pos = {sid: i for i, sid in enumerate(self.service_ids)}
+        self.cpu_m = array("q")
+        self.memory_mib = array("q")
+        for s in index:
+            res = s.get("resources") or {}
+            self.cpu_m.append(parse_cpu(res.get("cpu", 0)))
+            self.memory_mib.append(parse_memory(res.get("memory", 0)))
+        self.replicas = array("q", (int(replicas.get(sid, 1)) for sid in self.service_ids))
+        self._recompute_usage()
+
+    def _recompute_usage(self):
+        self.used_cpu_m = sum(c * r for c, r in zip(self.cpu_m, self.replicas))
+        self.used_memory_mib = sum(m * r for m, r in zip(self.memory_mib, self.replicas))
+
+    def _position(self, service_name):
+        svc = self.index.get(service_name)
+        return None if svc is None else self._pos[svc["id"]]
+
+    def set_replicas(self, service_name, count):
+        i = self._position(service_name)
+        if i is None:
+            raise KeyError(service_name)
+        old = self.replicas[i]
+        self.replicas[i] = count
+        self.used_cpu_m += (count - old) * self.cpu_m[i]
+        self.used_memory_mib += (count - old) * self.memory_mib[i]
+
+    def replica_targets(self, changeset):
+        """
+        Số replica đích {position: replicas} mà changeset yêu cầu, và lỗi input.
+        scale → config.replicas / config.instance_count; enable → ≥ 1; disable/delete → 0.
+        """
+        targets = {}
+        errs = []
+        for ch in changeset.get("changes", []):
+            i = self._position(ch.get("service"))
+            if i is None:
+                continue
+            action = ch.get("action")
+            if action == "scale":
+                config = ch.get("config") or {}
+                count = next((config[k] for k in REPLICA_KEYS if k in config), None)
+                if count is None:
+                    continue
+                if isinstance(count, bool) or not isinstance(count, int) or count < 0:
+                    errs.append(f"Invalid replica count for '{ch['service']}': {count!r}")
+                    continue
+                targets[i] = count
+            elif action == "enable":
+                targets[i] = max(targets.get(i, self.replicas[i]), 1)
+            elif action in ("disable", "delete"):
+                targets[i] = 0
+        return targets, errs
+
+    def projected_usage(self, targets):
+        cpu = self.used_cpu_m
+        mem = self.used_memory_mib
+        for i, count in targets.items():
+            delta = count - self.replicas[i]
+            cpu += delta * self.cpu_m[i]
+            mem += delta * self.memory_mib[i]
+        return cpu, mem
+
+    def evaluate(self, changeset):
+        targets, errs = self.replica_targets(changeset)
+        cpu, mem = self.projected_usage(targets)
+        if cpu > self.quota_cpu_m:
+            errs.append(f"Cluster CPU quota exceeded: {cpu}m requested > {self.quota_cpu_m}m")
+        if mem > self.quota_memory_mib:
+            errs.append(
+                f"Cluster memory quota exceeded: {mem}Mi requested > {self.quota_memory_mib}Mi"
+            )
+        return {"fits": not errs, "cpu_m": cpu, "memory_mib": mem, "errors": errs}
+
+    def check_changeset(self, changeset):
+        """Trả về list lỗi; rỗng nếu changeset nằm trong quota."""
+        return self.evaluate(changeset)["errors"]
+
+    def check_batch(self, changesets):
+        """
+        Đánh giá độc lập nhiều changeset ứng viên so với trạng thái hiện tại
+        (capacity planning) trong một lượt. Không thay đổi ledger.
+        """
+        return [self.evaluate(changeset) for changeset in changesets]
+
+    def commit(self, changeset):
+        """Ghi nhận số replica mới sau khi changeset được apply."""
+        targets, _ = self.replica_targets(changeset)
+        for i, count in targets.items():
+            self.set_replicas(self.service_ids[i], count)
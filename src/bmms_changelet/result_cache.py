@@ -0,0 +1,228 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .validator import get_validator
+
+# Các field thay đổi giữa các lần LLM retry nhưng không ảnh hưởng kết quả
+# validate/convert (miễn là chúng hợp lệ theo schema)
+VOLATILE_FIELDS = ("id", "timestamp")
+
+
+def _dumps(value):
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def changeset_fingerprint(changeset, schema, exclude=VOLATILE_FIELDS):
+    """
+    Hash chuẩn hóa của changeset, bỏ qua các field volatile.
+
+    Trả về None (không cache) nếu changeset không phải dict, hoặc field volatile
+    thiếu/sai schema: khi đó thông báo lỗi phụ thuộc giá trị cụ thể của field.
+    """
+    if not isinstance(changeset, dict):
+        return None
+    props = schema.get("properties", {})
+    for field in exclude:
+        if field not in changeset:
+            return None
+        if field in props and not get_validator(props[field]).is_valid(changeset[field]):
+            return None
+    rest = {k: v for k, v in changeset.items() if k not in exclude}
+    return hashlib.sha256(_dumps(rest).encode("utf-8")).hexdigest()
+
+# ------------------------------
+# Backends (lưu value dạng JSON bytes: kích thước chính xác, trả bản sao)
+# ------------------------------
+class MemoryBackend:
+    """LRU + TTL trong process, giới hạn tổng số byte."""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, ttl=300):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            expires, data = entry
+            if expires < time.monotonic():
+                del self._items[key]
+                self._bytes -= len(data)
+                return None
+            self._items.move_to_end(key)
+            return data
+
+    def set(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+            self._items[key] = (time.monotonic() + self.ttl, data)
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SQLiteBackend:
+    """
+    Cache dùng chung giữa các worker trên cùng máy, lưu trong một file sqlite.
+    Mỗi thread một connection; evict theo thời gian truy cập khi vượt max_bytes.
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, ttl=300):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS result_cache ("
+            " key TEXT PRIMARY KEY, expires REAL, accessed REAL, size INTEGER, value BLOB)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS result_cache_accessed ON result_cache(accessed)")
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, expires FROM result_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] < now:
+            conn.execute("DELETE FROM result_cache WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE result_cache SET accessed = ? WHERE key = ?", (now, key))
+        return bytes(row[0])
+
+    def set(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO result_cache (key, expires, accessed, size, value)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (key, now + self.ttl, now, len(data), data),
+        )
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM result_cache").fetchone()[0]
+        if total > self.max_bytes:
+            conn.execute("DELETE FROM result_cache WHERE expires < ?", (now,))
+            # xóa các entry lâu không dùng nhất cho tới khi về dưới ngân sách
+            conn.execute(
+                "DELETE FROM result_cache WHERE key IN ("
+                " SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY accessed DESC) AS running"
+                " FROM result_cache) WHERE running > ?)",
+                (self.max_bytes,),
+            )
+
+    def clear(self):
+        self._conn().execute("DELETE FROM result_cache")
+
+    @property
+    def size_bytes(self):
+        return self._conn().execute("SELECT COALESCE(SUM(size), 0) FROM result_cache").fetchone()[0]
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM result_cache").fetchone()[0]
+
+# ------------------------------
+# Result cache
+# ------------------------------
+class ResultCache:
+    """
+    Cache kết quả validate/convert theo (kind, config version, fingerprint).
+    Đếm hit/miss/bypass để export metrics.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def _count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def get_or_compute(self, kind, changeset, schema, version, compute):
+        """Trả về (value, hit). compute() chỉ chạy khi miss; value phải serialize được JSON."""
+        fingerprint = changeset_fingerprint(changeset, schema)
+        if fingerprint is None:
+            self._count("bypassed")
+            return compute(), False
+
+        key = f"{kind}:{version}:{fingerprint}"
+        data = self.backend.get(key)
+        if data is not None:
+            self._count("hits")
+            return json.loads(data), True
+
+        self._count("misses")
+        value = compute()
+        self.backend.set(key, _dumps(value).encode("utf-8"))
+        return value, False
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "entries": len(self.backend),
+            "size_bytes": self.backend.size_bytes,
+        }
+
+    def clear(self):
+        self.backend.clear()
+
+
+def build_result_cache(options):
+    """
+    options (dict, thường từ settings.BMMS_RESULT_CACHE):
+        BACKEND: "memory" | "sqlite" | None (tắt cache)
+        MAX_BYTES, TTL, PATH (chỉ cho sqlite)
+    """
+    backend = (options or {}).get("BACKEND", "memory")
+    if not backend:
+        return None
+    max_bytes = options.get("MAX_BYTES", 32 * 1024 * 1024)
+    ttl = options.get("TTL", 300)
+    if backend == "memory":
+        return ResultCache(MemoryBackend(max_bytes=max_bytes, ttl=ttl))
+    if backend == "sqlite":
+        return ResultCache(SQLiteBackend(options["PATH"], max_bytes=max_bytes, ttl=ttl))
+    raise ValueError(f"Unknown result cache backend: {backend}")
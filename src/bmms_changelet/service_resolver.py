@@ -0,0 +1,150 @@
+import heapq
+import re
+
+# Map tên dịch vụ mà LLM hay sinh ra → tên chuẩn trong service_catalogue.yaml
+SERVICE_ALIAS = {
+    "product_catalog": "catalogue",
+    "customer_service": "customer",
+    "payment_service": "payment",
+    "billing_service": "billing",
+    "order_service": "order",
+    "inventory_service": "inventory",
+    "subscription_service": "subscription",
+    "promotion_service": "promotion"
+}
+
+# ------------------------------
+# Chuẩn hóa tên: "Payment Service" / "order-svc" / "Orders" → "payment" / "order" / "order"
+# ------------------------------
+_GENERIC = frozenset({"service", "svc", "srv", "api", "microservice", "ms", "app"})
+_CAMEL = re.compile(r"([a-z0-9])([A-Z])")
+_SPLIT = re.compile(r"[^a-z0-9]+")
+_VERSION = re.compile(r"^v[0-9]+$")
+
+EXACT_SCORE = 1.0       # id / name / alias khớp nguyên văn
+CANONICAL_SCORE = 0.95  # khớp sau khi chuẩn hóa (hoa thường, hậu tố -svc, số nhiều, ...)
+FUZZY_MAX_SCORE = 0.9   # khớp gần đúng (n-gram + edit distance)
+
+
+def _singular(token):
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def canonical_name(text):
+    text = _CAMEL.sub(r"\1 \2", str(text)).lower()
+    tokens = []
+    for token in _SPLIT.split(text):
+        if not token or _VERSION.match(token):
+            continue
+        token = _singular(token)
+        if token not in _GENERIC:
+            tokens.append(token)
+    return "_".join(tokens)
+
+
+def _trigrams(key):
+    padded = f" {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_similarity(a, b):
+    """1 - Levenshtein(a, b) / max(len)."""
+    if a == b:
+        return 1.0
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return 1.0 - previous[-1] / len(a)
+
+# ------------------------------
+# Resolver
+# ------------------------------
+class ServiceResolver:
+    """
+    Map tên service do LLM sinh ra về id trong catalogue, kèm điểm tin cậy.
+
+    Dựng một lần từ `id`, `name`, `display_name`, `basePath` của catalogue và
+    bảng alias. Tra cứu theo thứ tự: khớp nguyên văn → khớp sau chuẩn hóa →
+    gần đúng qua index trigram (chỉ chấm edit distance cho vài ứng viên đầu).
+    """
+
+    def __init__(self, catalogue, aliases=SERVICE_ALIAS, min_score=0.5, candidates=5):
+        self.min_score = min_score
+        self.candidates = candidates
+        self._exact = {}
+        self._canonical = {}
+
+        services = catalogue.get("services", []) if isinstance(catalogue, dict) else list(catalogue)
+        known = set()
+        for s in services:
+            known.add(s["id"])
+            known.add(s["name"])
+            for raw in (s["id"], s["name"]):
+                self._exact.setdefault(raw, s["id"])
+            for raw in (s["id"], s["name"], s.get("display_name"), s.get("basePath")):
+                if raw:
+                    key = canonical_name(raw)
+                    if key:
+                        self._canonical.setdefault(key, s["id"])
+        by_name = {s["name"]: s["id"] for s in services}
+        by_name.update({s["id"]: s["id"] for s in services})
+        for alias, target in (aliases or {}).items():
+            # alias trỏ tới service không có trong catalogue → bỏ qua
+            if target not in known:
+                continue
+            self._exact.setdefault(alias, by_name[target])
+            key = canonical_name(alias)
+            if key:
+                self._canonical.setdefault(key, by_name[target])
+
+        self._keys = list(self._canonical)
+        self._grams = [_trigrams(k) for k in self._keys]
+        self._postings = {}
+        for i, grams in enumerate(self._grams):
+            for g in grams:
+                self._postings.setdefault(g, []).append(i)
+
+    def resolve(self, name):
+        """
+        Trả về (service_id, score); (None, score tốt nhất) nếu không có ứng viên
+        nào đạt min_score.
+        """
+        if not isinstance(name, str):
+            return None, 0.0
+        sid = self._exact.get(name)
+        if sid is not None:
+            return sid, EXACT_SCORE
+        key = canonical_name(name)
+        if not key:
+            return None, 0.0
+        sid = self._canonical.get(key)
+        if sid is not None:
+            return sid, CANONICAL_SCORE
+
+        grams = _trigrams(key)
+        shared = {}
+        for g in grams:
+            for i in self._postings.get(g, ()):
+                shared[i] = shared.get(i, 0) + 1
+        if not shared:
+            return None, 0.0
+        dice = {i: 2.0 * c / (len(grams) + len(self._grams[i])) for i, c in shared.items()}
+        top = heapq.nlargest(self.candidates, dice, key=dice.get)
+        best, best_score = None, 0.0
+        for i in top:
+            score = FUZZY_MAX_SCORE * (dice[i] + _edit_similarity(key, self._keys[i])) / 2
+            if score > best_score:
+                best, best_score = i, score
+        best_score = round(best_score, 3)
+        if best_score < self.min_score:
+            return None, best_score
+        return self._canonical[self._keys[best]], best_score
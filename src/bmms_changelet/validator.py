@@ -1,8 +1,15 @@
 import json
+import hashlib
+import threading
 import yaml
 import sys
+from collections import OrderedDict
 from pathlib import Path
-from jsonschema import Draft7Validator
+from jsonschema import Draft7Validator, validators
+
+from .catalogue_index import CatalogueIndex
+from .metrics import VALIDATIONS_TOTAL, stage
+from .model import ChangeSet, Record
 
 # ------------------------------
 # Định nghĩa path tuyệt đối từ repo root
@@ -14,15 +21,26 @@ SCHEMA_PATH = BASE_DIR / "schema" / "changeset.schema.json"
 # ------------------------------
 # Loaders
 # ------------------------------
+# libyaml (C) nhanh hơn nhiều so với loader thuần Python; cùng kết quả với safe_load
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+def load_yaml(stream):
+    return yaml.load(stream, Loader=YAML_LOADER)
+
 def load_catalogue(path=CATALOG_PATH):
     with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+        return load_yaml(f)
 
 def load_schema(path=SCHEMA_PATH):
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
+def load_catalogue_index(path=CATALOG_PATH):
+    return CatalogueIndex(load_catalogue(path))
+
 def find_service(catalogue, service_name):
+    if isinstance(catalogue, CatalogueIndex):
+        return catalogue.get(service_name)
     for s in catalogue.get("services", []):
         if s["id"] == service_name or s["name"] == service_name:
             return s
@@ -42,21 +60,105 @@ ROLE_PERMISSIONS = {
     "user": ["request"],
 }
 
+# ------------------------------
+# Compiled schema validator registry
+# ------------------------------
+class ValidatorRegistry:
+    """
+    Cache Draft7Validator đã compile theo hash nội dung của schema.
+    Thread-safe, giới hạn số schema giữ trong bộ nhớ (LRU).
+
+    Schema dict được coi là bất biến sau khi đăng ký: lần gọi sau với
+    cùng object sẽ dùng lại hash đã tính, không hash lại.
+    """
+
+    def __init__(self, max_size=16, cls=Draft7Validator):
+        self.max_size = max_size
+        self.cls = cls
+        self._lock = threading.Lock()
+        self._by_hash = OrderedDict()
+        self._by_id = {}
+
+    @staticmethod
+    def schema_hash(schema):
+        canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, schema):
+        # fast path: cùng object schema -> không cần hash lại
+        entry = self._by_id.get(id(schema))
+        if entry is not None and entry[0] is schema:
+            return entry[2]
+
+        digest = self.schema_hash(schema)
+        with self._lock:
+            validator = self._by_hash.get(digest)
+            if validator is None:
+                self.cls.check_schema(schema)
+                validator = self.cls(schema)
+                self._by_hash[digest] = validator
+                while len(self._by_hash) > self.max_size:
+                    self._by_hash.popitem(last=False)
+            else:
+                self._by_hash.move_to_end(digest)
+            # giữ tham chiếu tới schema để id() không bị tái sử dụng
+            self._by_id[id(schema)] = (schema, digest, validator)
+            if len(self._by_id) > self.max_size:
+                self._by_id = {id(schema): self._by_id[id(schema)]}
+        return validator
+
+    def clear(self):
+        with self._lock:
+            self._by_hash.clear()
+            self._by_id = {}
+
+    def __len__(self):
+        return len(self._by_hash)
+
+
+VALIDATORS = ValidatorRegistry()
+
+# Draft7 coi model.ChangeSet / Change / ... là "object" → validate thẳng object typed
+TypedDraft7Validator = validators.extend(
+    Draft7Validator,
+    type_checker=Draft7Validator.TYPE_CHECKER.redefine(
+        "object", lambda checker, instance: isinstance(instance, (dict, Record))
+    ),
+)
+TYPED_VALIDATORS = ValidatorRegistry(cls=TypedDraft7Validator)
+
+
+def get_validator(schema):
+    return VALIDATORS.get(schema)
+
 # ------------------------------
 # Validation helpers
 # ------------------------------
-def validate_schema_instance(changeset, schema):
-    validator = Draft7Validator(schema)
+def validate_schema_instance(changeset, schema, first_error_only=False):
+    """
+    Validate changeset theo JSON schema.
+    first_error_only=True: dừng ở lỗi đầu tiên (chỉ cần pass/fail).
+    changeset: dict hoặc model.ChangeSet (validate trực tiếp, không đổi sang dict).
+    """
+    registry = TYPED_VALIDATORS if isinstance(changeset, ChangeSet) else VALIDATORS
+    validator = registry.get(schema)
+    if first_error_only:
+        error = next(validator.iter_errors(changeset), None)
+        if error is None:
+            return True, []
+        return False, [f"{'/'.join(map(str, error.path))}: {error.message}"]
+
     errors = sorted(validator.iter_errors(changeset), key=lambda e: e.path)
     if errors:
         return False, [f"{'/'.join(map(str, e.path))}: {e.message}" for e in errors]
     return True, []
 
 def check_services_exist(changeset, catalogue):
+    index = CatalogueIndex.from_catalogue(catalogue)
     errs = []
     for ch in changeset.get("changes", []):
         svc = ch["service"]
-        if not find_service(catalogue, svc):
+        if svc not in index:
             errs.append(f"Service not found in catalogue: {svc}")
     return errs
 
@@ -70,18 +172,33 @@ def check_permissions(changeset, role):
     return errs
 
 def check_dependencies(changeset, catalogue):
+    index = CatalogueIndex.from_catalogue(catalogue)
+    graph = index.graph
     errs = []
     requires_human = False
     for ch in changeset.get("changes", []):
         if ch["action"] == "enable":
-            svc = find_service(catalogue, ch["service"])
-            if svc:
-                deps = svc.get("dependencies", [])
-                for d in deps:
+            if ch["service"] in index:
+                direct = index.dependencies(ch["service"])
+                for d in direct:
                     errs.append(
                         f"Dependency check: {ch['service']} depends on {d} (runtime check needed)."
                     )
                     requires_human = True
+                indirect = [
+                    d for d in graph.requires(ch["service"])
+                    if d not in direct and d != index.get(ch["service"])["id"]
+                ]
+                if indirect:
+                    errs.append(
+                        f"Dependency check: {ch['service']} transitively depends on {', '.join(indirect)}."
+                    )
+                cycle = graph.cycle_of(ch["service"])
+                if cycle:
+                    errs.append(
+                        f"Dependency cycle: {' -> '.join(cycle + cycle[:1])}."
+                    )
+                    requires_human = True
     return requires_human, errs
 
 def enforce_risk_confidence(changeset):
@@ -102,7 +219,19 @@ def enforce_risk_confidence(changeset):
 # ------------------------------
 # Main validator
 # ------------------------------
-def validate_changeset(changeset, catalogue, schema):
+def validate_changeset(changeset, catalogue, schema, ledger=None):
+    """
+    catalogue: dict từ service_catalogue.yaml hoặc CatalogueIndex đã dựng sẵn.
+    Truyền CatalogueIndex để tránh dựng lại index ở mỗi lần gọi.
+    ledger: quota.ResourceLedger (tùy chọn) để kiểm tra CLUSTER_QUOTA.
+    changeset: dict hoặc model.ChangeSet.
+    """
+    result = _validate_changeset(changeset, catalogue, schema, ledger)
+    VALIDATIONS_TOTAL.inc(status=result["status"])
+    return result
+
+def _validate_changeset(changeset, catalogue, schema, ledger):
+    catalogue = CatalogueIndex.from_catalogue(catalogue)
     result = {
         "status": "pending",
         "errors": [],
@@ -110,14 +239,16 @@ def validate_changeset(changeset, catalogue, schema):
     }
 
     # 1) Schema validation
-    ok, schema_errors = validate_schema_instance(changeset, schema)
+    with stage("validate", "schema"):
+        ok, schema_errors = validate_schema_instance(changeset, schema)
     if not ok:
         result["status"] = "rejected"
         result["errors"].extend(schema_errors)
         return result
 
     # 2) Service existence check
-    svc_errs = check_services_exist(changeset, catalogue)
+    with stage("validate", "services"):
+        svc_errs = check_services_exist(changeset, catalogue)
     if svc_errs:
         result["status"] = "rejected"
         result["errors"].extend(svc_errs)
@@ -126,19 +257,33 @@ def validate_changeset(changeset, catalogue, schema):
     # 3) Role permission check
     ctx = changeset.get("request_context", {})
     role = ctx.get("role", "user")
-    perm_errs = check_permissions(changeset, role)
+    with stage("validate", "permissions"):
+        perm_errs = check_permissions(changeset, role)
     if perm_errs:
         result["status"] = "rejected"
         result["errors"].extend(perm_errs)
         return result
 
-    # 4) Dependency check
-    dep_requires_human, dep_errs = check_dependencies(changeset, catalogue)
-    if dep_errs:
-        result["warnings"].extend(dep_errs)
+    # 3b) Cluster quota check
+    if ledger is not None:
+        with stage("validate", "quota"):
+            quota_errs = ledger.check_changeset(changeset)
+        if quota_errs:
+            result["status"] = "rejected"
+            result["errors"].extend(quota_errs)
+            return result
+
+    # 4) Dependency check + service bị ảnh hưởng (bắc cầu, theo thứ tự enable).
+    #    Chỉ kết quả không bị rejected mới có key impacted_services.
+    with stage("validate", "dependencies"):
+        dep_requires_human, dep_errs = check_dependencies(changeset, catalogue)
+        if dep_errs:
+            result["warnings"].extend(dep_errs)
+        result["impacted_services"] = catalogue.graph.impacted_services(changeset)
 
     # 5) Risk & confidence policy
-    status_decision, rc_msgs = enforce_risk_confidence(changeset)
+    with stage("validate", "risk"):
+        status_decision, rc_msgs = enforce_risk_confidence(changeset)
     result["warnings"].extend(rc_msgs)
 
     # Final status
@@ -154,7 +299,7 @@ def validate_changeset(changeset, catalogue, schema):
 # ------------------------------
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python validator.py path/to/changeset.json")
+        print("Usage: python -m bmms_changelet.validator path/to/changeset.json")
         sys.exit(1)
 
     ch_path = Path(sys.argv[1])
@@ -165,7 +310,7 @@ if __name__ == "__main__":
     with open(ch_path, "r", encoding="utf-8") as f:
         changeset = json.load(f)
 
-    catalogue = load_catalogue()
+    catalogue = load_catalogue_index()
     schema = load_schema()
 
     res = validate_changeset(changeset, catalogue, schema)
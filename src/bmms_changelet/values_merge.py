@@ -0,0 +1,130 @@
+import copy
+
+import yaml
+
+from .convert_to_helm import compile_mapping, default_mapping
+from .validator import load_yaml
+
+_MISSING = object()
+
+
+def _dotted(path):
+    return ".".join(map(str, path))
+
+
+def _new_diff():
+    return {"set": {}, "unset": {}}
+
+
+def _finish(step_id, diff):
+    return {"step": step_id, "set": diff["set"], "unset": list(diff["unset"])}
+
+
+class MergeStep:
+    __slots__ = ("step_id", "undo")
+
+    def __init__(self, step_id, undo):
+        self.step_id = step_id
+        # list (path tuple, giá trị cũ hoặc _MISSING), theo thứ tự thao tác
+        self.undo = undo
+
+
+class ValuesMerger:
+    """
+    Áp lần lượt các ChangeSet lên một cây Helm values (vd. charts/demo/values.yaml)
+    với ngữ nghĩa deep-merge, giữ undo log cho từng bước để rollback.
+
+    Mỗi apply()/rollback() chỉ đụng tới các path mà ChangeSet đó map tới và
+    trả về diff gọn {"set": {path: value}, "unset": [path]}; không dựng lại
+    hay dump lại cả cây.
+    """
+
+    def __init__(self, base=None, mapping=None):
+        self.values = copy.deepcopy(base) if base is not None else {}
+        self.mapping = compile_mapping(mapping) if mapping is not None else default_mapping()
+        self.steps = []
+
+    @classmethod
+    def from_file(cls, base_path, mapping=None):
+        with open(base_path, "r", encoding="utf-8") as f:
+            base = load_yaml(f) or {}
+        merger = cls(mapping=mapping)
+        merger.values = base  # vừa load xong, không cần deepcopy
+        return merger
+
+    # ---- primitives (ghi undo log) ----
+    def _set(self, path, value, undo, diff):
+        node = self.values
+        for i, part in enumerate(path[:-1]):
+            child = node.get(part, _MISSING)
+            if not isinstance(child, dict):
+                undo.append((path[:i + 1], child))
+                child = node[part] = {}
+            node = child
+        leaf = path[-1]
+        old = node.get(leaf, _MISSING)
+        if isinstance(value, dict) and isinstance(old, dict):
+            for key, sub in value.items():
+                self._set(path + (key,), sub, undo, diff)
+            return
+        if old is not _MISSING and old == value:
+            return
+        undo.append((path, old))
+        node[leaf] = copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+        diff["set"][_dotted(path)] = value
+        diff["unset"].pop(_dotted(path), None)
+
+    def _restore(self, path, old, diff):
+        node = self.values
+        for part in path[:-1]:
+            node = node[part]
+        key = _dotted(path)
+        if old is _MISSING:
+            node.pop(path[-1], None)
+            diff["unset"][key] = None
+            diff["set"].pop(key, None)
+        else:
+            node[path[-1]] = old
+            diff["set"][key] = old
+            diff["unset"].pop(key, None)
+
+    # ---- public API ----
+    def apply(self, changeset, step_id=None):
+        """Áp một ChangeSet. Trả về diff của bước này."""
+        if step_id is None:
+            step_id = changeset.get("id") or len(self.steps)
+        paths = self.mapping.paths
+        undo = []
+        diff = _new_diff()
+        for ch in changeset.get("changes", []):
+            feature_map = paths.get(ch["service"])
+            if not feature_map:
+                continue
+            for key, value in (ch.get("config") or {}).items():
+                target = feature_map.get(key)
+                if target is not None:
+                    _, parents, leaf = target
+                    self._set(parents + (leaf,), value, undo, diff)
+        self.steps.append(MergeStep(step_id, undo))
+        return _finish(step_id, diff)
+
+    def rollback(self, step_id=None):
+        """
+        Hoàn tác bước cuối, hoặc mọi bước tính từ step_id (kể cả nó) trở về sau.
+        Trả về diff của thao tác hoàn tác.
+        """
+        if not self.steps:
+            raise IndexError("No step to roll back")
+        if step_id is not None and all(s.step_id != step_id for s in self.steps):
+            raise KeyError(step_id)
+        diff = _new_diff()
+        while self.steps:
+            step = self.steps.pop()
+            for path, old in reversed(step.undo):
+                self._restore(path, old, diff)
+            if step_id is None or step.step_id == step_id:
+                break
+        return _finish(step_id, diff)
+
+    def dump(self, stream=None):
+        return yaml.safe_dump(self.values, stream, sort_keys=False, allow_unicode=True)
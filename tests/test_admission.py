@@ -0,0 +1,91 @@
+import time
+
+from bmms_changelet.admission import (
+    AdmissionController,
+    MemoryAdmissionStore,
+    SQLiteAdmissionStore,
+    build_admission_controller,
+)
+
+
+def test_token_bucket_limits_rate_per_tenant():
+    controller = AdmissionController(rate=1, burst=2, concurrency=0)
+    for _ in range(2):
+        ticket, reason, _ = controller.acquire("t1")
+        assert ticket is not None and reason is None
+        controller.release("t1", ticket)
+    ticket, reason, retry_after = controller.acquire("t1")
+    assert ticket is None and reason == "rate" and retry_after == 1
+    # tenant khác có bucket riêng
+    assert controller.acquire("t2")[0] is not None
+
+
+def test_concurrency_cap_and_release():
+    controller = AdmissionController(rate=0, concurrency=2)
+    tickets = [controller.acquire("t1")[0] for _ in range(2)]
+    assert controller.inflight() == {"t1": 2}
+    assert controller.acquire("t1")[1] == "concurrency"
+    controller.release("t1", tickets[0])
+    assert controller.acquire("t1")[0] is not None
+
+
+def test_tenant_overrides():
+    controller = AdmissionController(rate=0, concurrency=1, tenants={"big": {"CONCURRENCY": 3}})
+    assert controller.limits("big") == (0, 200, 3)
+    assert all(controller.acquire("big")[0] for _ in range(3))
+    assert controller.acquire("small")[0] is not None
+    assert controller.acquire("small")[0] is None
+
+
+def test_sqlite_store_is_shared_and_leases_expire(tmp_path):
+    path = tmp_path / "admission.sqlite3"
+    a = AdmissionController(SQLiteAdmissionStore(path, lease=0.2), rate=0, concurrency=1)
+    b = AdmissionController(SQLiteAdmissionStore(path, lease=0.2), rate=0, concurrency=1)
+    ticket, _, _ = a.acquire("t1")
+    assert ticket is not None
+    assert b.acquire("t1")[1] == "concurrency"
+    assert b.inflight() == {"t1": 1}
+    a.release("t1", ticket)
+    ticket = b.acquire("t1")[0]
+    assert ticket is not None
+    # worker giữ chỗ rồi chết (không release) → hết lease thì chỗ được trả lại
+    time.sleep(0.25)
+    assert a.acquire("t1")[0] is not None
+
+
+def test_sqlite_store_shares_token_bucket(tmp_path):
+    path = tmp_path / "admission.sqlite3"
+    a = AdmissionController(SQLiteAdmissionStore(path), rate=1, burst=1, concurrency=0)
+    b = AdmissionController(SQLiteAdmissionStore(path), rate=1, burst=1, concurrency=0)
+    assert a.acquire("t1")[0] is not None
+    assert b.acquire("t1")[1] == "rate"
+
+
+def test_build_admission_controller():
+    assert build_admission_controller({}) is None
+    controller = build_admission_controller({"ENABLED": True, "RATE": 5, "BURST": 10, "CONCURRENCY": 2})
+    assert isinstance(controller.store, MemoryAdmissionStore)
+    assert controller.limits("any") == (5, 10, 2)
+
+
+def test_memory_store_evicts_least_recently_used_buckets():
+    controller = AdmissionController(MemoryAdmissionStore(max_tenants=2), rate=1, burst=1, concurrency=0)
+    controller.acquire("t1")
+    controller.acquire("t2")
+    controller.acquire("t1")  # bị từ chối nhưng t1 thành mới dùng nhất
+    controller.acquire("t3")
+    assert list(controller.store._buckets) == ["t1", "t3"]
+
+
+def test_sqlite_sweep_drops_idle_buckets(tmp_path):
+    store = SQLiteAdmissionStore(tmp_path / "admission.sqlite3", idle=60)
+    controller = AdmissionController(store, rate=1, burst=1, concurrency=0)
+    controller.acquire("t1")
+    store.sweep(time.time() + 120)
+    assert store._conn().execute("SELECT COUNT(*) FROM admission_bucket").fetchone()[0] == 0
+
+
+def test_metric_labels_only_for_configured_tenants():
+    controller = AdmissionController(tenants={"big": {"RATE": 500}})
+    assert controller.label("big") == "big"
+    assert controller.label("anything-a-client-sends") == "other"
@@ -0,0 +1,71 @@
+import io
+import json
+
+from bmms_changelet.batch import ItemError, iter_json_items, iter_validate
+from bmms_changelet.validator import load_catalogue_index, load_schema
+
+
+def parse(data, chunk_size=4):
+    items = iter_json_items(io.BytesIO(data.encode("utf-8")), chunk_size=chunk_size)
+    return [(i, x.message if isinstance(x, ItemError) else x) for i, x in items]
+
+
+def test_iter_json_items_array_and_ndjson():
+    assert parse('[{"a": 1}, 12345, "é"]') == [(0, {"a": 1}), (1, 12345), (2, "é")]
+    items = parse('{"a": 1}\n\nnot json\n{"b": 2}')
+    assert items[0] == (0, {"a": 1})
+    assert items[1][0] == 1 and items[1][1].startswith("Invalid JSON")
+    assert items[2] == (2, {"b": 2})
+
+
+def test_iter_validate_keeps_index():
+    with open("tests/changesets/test1.json", encoding="utf-8") as f:
+        good = json.load(f)
+    items = [(0, good), (1, ItemError("Invalid JSON")), (2, {"id": "chg-x"})]
+    results = list(iter_validate(items, load_catalogue_index(), load_schema()))
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert [r["status"] for r in results] == ["validated", "rejected", "rejected"]
+    assert results[2]["id"] == "chg-x"
+
+
+class CountingStream(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.read_bytes = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.read_bytes += len(chunk)
+        return chunk
+
+
+def test_malformed_item_stops_without_reading_rest():
+    good = json.dumps({"id": "chg-x", "pad": "x" * 100})
+    data = ("[" + good + ', {"a": ]' + ", " + ", ".join([good] * 2000) + "]").encode("utf-8")
+    stream = CountingStream(data)
+    items = list(iter_json_items(stream, chunk_size=256))
+    assert items[0][1]["id"] == "chg-x"
+    assert isinstance(items[1][1], ItemError) and len(items) == 2
+    assert stream.read_bytes < 1024
+
+
+def test_items_split_across_chunks_and_size_cap():
+    value = {"s": "é\\u00e9" * 50, "t": True, "n": None, "f": -1.5e3}
+    data = json.dumps([value, value])
+    assert [x for _, x in parse(data, chunk_size=3)] == [value, value]
+
+    big = json.dumps([{"s": "x" * 500}, 1]).encode("utf-8")
+    items = list(iter_json_items(io.BytesIO(big), chunk_size=16, max_item_size=100))
+    assert len(items) == 1 and "exceeds 100" in items[0][1].message
+    items = list(iter_json_items(io.BytesIO(b'{"a": 1}\n' + b"x" * 500), chunk_size=16, max_item_size=100))
+    assert items[0] == (0, {"a": 1}) and "exceeds 100" in items[1][1].message
+
+
+def test_same_items_at_every_chunk_size():
+    with open("tests/changesets/test1.json", encoding="utf-8") as f:
+        good = json.load(f)
+    values = [good, {"f": 0.9, "g": -1.25, "h": 1e-7, "i": -0.0, "t": True}, 12345, -3.5e10, None]
+    data = json.dumps(values)
+    expected = [(i, v) for i, v in enumerate(values)]
+    for size in range(1, len(data) + 1):
+        assert parse(data, chunk_size=size) == expected, size
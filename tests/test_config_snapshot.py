@@ -0,0 +1,78 @@
+import shutil
+
+import pytest
+
+from bmms_changelet.config_snapshot import MAGIC, _LENGTH, build_snapshot, load_config_files, load_snapshot, source_paths
+from bmms_changelet.config_store import ConfigStore
+
+
+def copy_sources(tmp_path):
+    for name in ("service_catalogue.yaml", "changeset.schema.json", "mapping.yaml"):
+        shutil.copy(f"schema/{name}", tmp_path / name)
+    return {
+        "catalogue_path": tmp_path / "service_catalogue.yaml",
+        "schema_path": tmp_path / "changeset.schema.json",
+        "mapping_path": tmp_path / "mapping.yaml",
+    }
+
+
+def test_snapshot_matches_yaml_and_goes_stale(tmp_path):
+    paths = copy_sources(tmp_path)
+    snap = tmp_path / "config.snapshot"
+    assert load_snapshot(snap, paths=source_paths(**paths)) is None
+
+    build_snapshot(snap, **paths)
+    index, schema, mapping, info = load_config_files(snap, **paths)
+    assert info["source"] == "snapshot"
+    y_index, y_schema, y_mapping, y_info = load_config_files(None, **paths)
+    assert y_info["source"] == "yaml"
+    assert index.catalogue == y_index.catalogue
+    assert schema == y_schema
+    assert mapping.paths == y_mapping.paths
+
+    # chỉ đổi mtime → vẫn dùng được (so sha256)
+    catalogue_path = paths["catalogue_path"]
+    catalogue_path.write_text(catalogue_path.read_text(encoding="utf-8"), encoding="utf-8")
+    assert load_config_files(snap, **paths)[3]["source"] == "snapshot"
+
+    catalogue_path.write_text("services:\n  - {name: solo, id: solo}\n", encoding="utf-8")
+    index, _, _, info = load_config_files(snap, **paths)
+    assert info["source"] == "yaml"
+    assert "solo" in index
+
+
+def test_corrupt_snapshot_falls_back(tmp_path):
+    paths = copy_sources(tmp_path)
+    snap = tmp_path / "config.snapshot"
+    snap.write_bytes(b"garbage")
+    assert load_config_files(snap, **paths)[3]["source"] == "yaml"
+
+
+@pytest.mark.parametrize("payload", [
+    b"cbmms_changelet.renamed_module\nCompiledMapping\n.",  # ModuleNotFoundError
+    b"cbmms_changelet.convert_to_helm\nRenamedMapping\n.",  # AttributeError
+    b"\x80\x05\x95garbage",  # UnpicklingError
+])
+def test_unpicklable_snapshot_falls_back_and_is_rewritten(tmp_path, payload):
+    paths = copy_sources(tmp_path)
+    snap = tmp_path / "config.snapshot"
+    build_snapshot(snap, **paths)
+    data = snap.read_bytes()
+    (length,) = _LENGTH.unpack_from(data, len(MAGIC))
+    snap.write_bytes(data[:len(MAGIC) + _LENGTH.size + length] + payload)
+
+    store = ConfigStore(*paths.values(), snapshot_path=snap)
+    assert store.last_load["source"] == "yaml"
+    assert "order" in store.current().catalogue
+    # snapshot đã được ghi lại từ nguồn → lần sau load được
+    assert load_snapshot(snap, paths=source_paths(**paths)) is not None
+    assert load_config_files(snap, **paths)[3]["source"] == "snapshot"
+
+
+def test_config_store_uses_snapshot(tmp_path):
+    paths = copy_sources(tmp_path)
+    snap = tmp_path / "config.snapshot"
+    build_snapshot(snap, **paths)
+    store = ConfigStore(*paths.values(), snapshot_path=snap)
+    assert store.last_load["source"] == "snapshot"
+    assert "order" in store.current().catalogue
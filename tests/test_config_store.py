@@ -0,0 +1,40 @@
+import shutil
+
+from bmms_changelet.config_store import ConfigStore
+
+
+def make_store(tmp_path):
+    for name in ("service_catalogue.yaml", "changeset.schema.json", "mapping.yaml"):
+        shutil.copy(f"schema/{name}", tmp_path / name)
+    return ConfigStore(
+        tmp_path / "service_catalogue.yaml",
+        tmp_path / "changeset.schema.json",
+        tmp_path / "mapping.yaml",
+    )
+
+
+def test_reload_swaps_snapshot_only_when_content_changes(tmp_path):
+    store = make_store(tmp_path)
+    old = store.current()
+    assert "order" in old.catalogue
+
+    catalogue_path = tmp_path / "service_catalogue.yaml"
+    catalogue_path.write_text(catalogue_path.read_text(encoding="utf-8"), encoding="utf-8")
+    assert store.reload() is False
+    assert store.current() is old
+
+    catalogue_path.write_text("services:\n  - {name: solo, id: solo}\n", encoding="utf-8")
+    assert store.reload() is True
+    new = store.current()
+    assert new.version != old.version
+    assert "solo" in new.catalogue and "order" not in new.catalogue
+    # snapshot cũ vẫn nguyên vẹn cho request đang chạy
+    assert "order" in old.catalogue
+
+
+def test_broken_file_keeps_previous_snapshot(tmp_path):
+    store = make_store(tmp_path)
+    old = store.current()
+    (tmp_path / "changeset.schema.json").write_text("{broken", encoding="utf-8")
+    assert store.reload() is False
+    assert store.current() is old
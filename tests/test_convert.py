@@ -0,0 +1,47 @@
+import pytest
+
+from bmms_changelet.convert_to_helm import (
+    MappingConflictError,
+    compile_mapping,
+    convert,
+    load_mapping,
+    unflatten_dict,
+)
+
+
+def test_convert_builds_nested_values_with_compiled_mapping():
+    mapping = load_mapping("schema/mapping.yaml")
+    changeset = {
+        "changes": [
+            {"action": "scale", "service": "order", "config": {"instance_count": 3, "unknown": 1}},
+            {"action": "update", "service": "billing", "config": {"payment_model": "postpaid"}},
+            {"action": "scale", "service": "order", "config": {"instance_count": 5}},
+            {"action": "update", "service": "no_mapping", "config": {"x": 1}},
+        ]
+    }
+    expected = unflatten_dict({"order.replicas": 5, "billing.payment_model": "postpaid"})
+    assert convert(changeset, compile_mapping(mapping)) == expected
+    assert convert(changeset, mapping) == expected
+
+
+def test_compile_mapping_rejects_overlapping_paths():
+    with pytest.raises(MappingConflictError, match="overlapping"):
+        compile_mapping({"mappings": {"order": {"a": "order.timeout", "b": "order.timeout.seconds"}}})
+    with pytest.raises(MappingConflictError, match="same path"):
+        compile_mapping({"mappings": {"order": {"a": "order.x"}, "billing": {"b": "order.x"}}})
+    compile_mapping({"mappings": {"order": {"a": "order.timeout", "b": "order.timeouts"}}})
+
+
+def test_compilation_is_memoized(tmp_path):
+    from bmms_changelet.convert_to_helm import default_mapping
+
+    mapping = load_mapping("schema/mapping.yaml")
+    assert compile_mapping(mapping) is compile_mapping(mapping)
+    assert compile_mapping(dict(mapping)) is not compile_mapping(mapping)
+
+    path = tmp_path / "mapping.yaml"
+    path.write_text("mappings:\n  order:\n    instance_count: order.replicas\n", encoding="utf-8")
+    first = default_mapping(path)
+    assert default_mapping(path) is first
+    path.write_text("mappings:\n  order:\n    instance_count: order.replicaCount\n", encoding="utf-8")
+    assert default_mapping(path).paths["order"]["instance_count"][2] == "replicaCount"
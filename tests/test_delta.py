@@ -0,0 +1,146 @@
+import copy
+
+import pytest
+
+from bmms_changelet.delta import ChangesetHistory, DeltaValidator, split_schema
+from bmms_changelet.json_patch import JsonPatchError, apply_patch
+from bmms_changelet.validator import load_catalogue_index, load_schema, validate_changeset
+
+INDEX = load_catalogue_index("schema/service_catalogue.yaml")
+SCHEMA = load_schema("schema/changeset.schema.json")
+
+
+def make_changeset(changes, role="admin", risk="low", confidence=0.95):
+    return {
+        "id": "chg-delta-1",
+        "intent": "bulk_update",
+        "timestamp": "2025-09-14T12:00:00Z",
+        "request_context": {"tenant_id": "tenant-demo", "requested_by": "linh", "role": role},
+        "changes": changes,
+        "metadata": {"confidence": confidence, "risk": risk},
+    }
+
+
+BASE = make_changeset([
+    {"action": "scale", "service": "order", "config": {"replicas": 3}},
+    {"action": "enable", "service": "order"},
+    {"action": "update", "service": "payment", "config": {"retries": 2}},
+    {"action": "enable", "service": "billing"},
+])
+
+VARIANTS = [
+    BASE,
+    make_changeset(BASE["changes"], risk="high"),
+    make_changeset(BASE["changes"], role="ops"),
+    make_changeset(BASE["changes"], role="user"),
+    make_changeset(BASE["changes"][:1] + [{"action": "scale", "service": "nope"}]),
+    make_changeset(BASE["changes"] + [{"action": "explode", "service": 3}, {"service": "order"}]),
+    make_changeset([]),
+    dict(make_changeset(BASE["changes"]), id="bad id", extra=True),
+    dict(make_changeset(BASE["changes"]), changes="oops"),
+    make_changeset([{"action": "scale", "service": {"b": 1, "a": 2}}]),
+    [],
+]
+
+
+@pytest.mark.parametrize("changeset", VARIANTS)
+def test_delta_matches_full_validation(changeset):
+    delta = DeltaValidator(INDEX, SCHEMA)
+    expected = validate_changeset(changeset, INDEX, SCHEMA)
+    # lần đầu (cache rỗng) và lần hai (dùng verdict đã cache) đều phải giống
+    assert delta.validate(changeset)[0] == expected
+    assert delta.validate(copy.deepcopy(changeset))[0] == expected
+
+
+def test_revalidate_only_rechecks_patched_changes():
+    delta = DeltaValidator(INDEX, SCHEMA)
+    result, reused = delta.validate(BASE)
+    assert reused == 0 and result["status"] == "requires_human"
+
+    patch = [{"op": "replace", "path": "/changes/1/action", "value": "update"}]
+    changeset, result, reused = delta.revalidate(BASE, patch)
+    assert reused == 3
+    assert changeset["changes"][1]["action"] == "update"
+    assert BASE["changes"][1]["action"] == "enable"
+    assert result == validate_changeset(changeset, INDEX, SCHEMA)
+
+
+def test_verdicts_are_isolated_from_caller_mutation():
+    delta = DeltaValidator(INDEX, SCHEMA)
+    changeset = copy.deepcopy(BASE)
+    delta.validate(changeset)
+    changeset["changes"][0]["service"] = "nope"
+    assert delta.validate(changeset)[0] == validate_changeset(changeset, INDEX, SCHEMA)
+
+
+def test_unsplittable_schema_falls_back_to_whole_document():
+    schema = dict(SCHEMA, allOf=[{"required": ["request_context"]}])
+    assert split_schema(schema) is None
+    changeset = dict(BASE)
+    del changeset["request_context"]
+    delta = DeltaValidator(INDEX, schema)
+    assert delta.validate(changeset)[0] == validate_changeset(changeset, INDEX, schema)
+
+
+def test_untyped_root_schema_does_not_crash():
+    schema = {"allOf": [{"required": ["changes"]}]}
+    assert split_schema(schema) is None
+    delta = DeltaValidator(INDEX, schema)
+
+    result = delta.validate(dict(BASE, request_context="ops"))[0]
+    # request_context không phải object → role mặc định "user"
+    assert result["errors"][0].startswith("Role 'user' cannot perform action 'scale'")
+
+    result = delta.validate(make_changeset(["oops", {"action": "scale"}]))[0]
+    assert result["status"] == "rejected"
+    assert result["errors"] == [
+        "changes/0: 'oops' is not of type 'object'",
+        "changes/1: 'service' is a required property",
+    ]
+
+
+def test_verdict_cache_is_bounded():
+    delta = DeltaValidator(INDEX, SCHEMA, max_entries=2)
+    delta.validate(BASE)
+    assert len(delta) == 2
+
+
+def test_json_patch_operations():
+    doc = {"a": {"b": [1, 2]}, "c/d": 1, "e~f": 2}
+    patched = apply_patch(doc, [
+        {"op": "add", "path": "/a/b/-", "value": 3},
+        {"op": "add", "path": "/a/b/0", "value": 0},
+        {"op": "remove", "path": "/c~1d"},
+        {"op": "replace", "path": "/e~0f", "value": 5},
+        {"op": "copy", "from": "/a/b", "path": "/copied"},
+        {"op": "move", "from": "/a/b/3", "path": "/moved"},
+        {"op": "test", "path": "/moved", "value": 3},
+    ])
+    assert patched == {"a": {"b": [0, 1, 2]}, "e~f": 5, "copied": [0, 1, 2, 3], "moved": 3}
+    assert doc == {"a": {"b": [1, 2]}, "c/d": 1, "e~f": 2}
+
+
+@pytest.mark.parametrize("patch", [
+    {"op": "add"},
+    [{"op": "remove", "path": "/missing"}],
+    [{"op": "replace", "path": "/a/5", "value": 1}],
+    [{"op": "add", "path": "a", "value": 1}],
+    [{"op": "test", "path": "/a", "value": 2}],
+    [{"op": "move", "from": "/a", "path": "/a/x"}],
+    [{"op": "frobnicate", "path": "/a"}],
+])
+def test_json_patch_errors(patch):
+    with pytest.raises(JsonPatchError):
+        apply_patch({"a": {"x": 1}}, patch)
+
+
+def test_history_returns_copies_and_evicts():
+    history = ChangesetHistory(max_size=1)
+    history.put(BASE)
+    got = history.get(BASE["id"])
+    got["changes"].clear()
+    assert history.get(BASE["id"]) == BASE
+    history.put(dict(BASE, id="chg-other"))
+    assert history.get(BASE["id"]) is None
+    history.put(["not", "a", "changeset"])
+    assert len(history) == 1
@@ -0,0 +1,46 @@
+from bmms_changelet.dependency_graph import DependencyGraph
+from bmms_changelet.validator import load_catalogue_index, load_schema, validate_changeset
+
+
+def catalogue(*edges):
+    deps = {}
+    for a, b in edges:
+        deps.setdefault(a, []).append(b)
+        deps.setdefault(b, [])
+    return {"services": [{"id": s, "name": s, "dependencies": d} for s, d in deps.items()]}
+
+
+def test_closures_topological_order_and_cycles():
+    graph = DependencyGraph(catalogue(("app", "api"), ("api", "db"), ("db", "disk"), ("x", "y"), ("y", "x")))
+    order = graph.enable_order()
+    assert order.index("disk") < order.index("db") < order.index("api") < order.index("app")
+    assert graph.requires("app") == ["disk", "db", "api"]
+    assert graph.dependents("db") == ["api", "app"]
+    assert graph.cycles == [sorted(["x", "y"], key=order.index)]
+    assert graph.in_cycle("x") and not graph.in_cycle("db")
+    assert graph.cycle_of("y") is graph.cycles[0] and graph.cycle_of("db") is None
+    assert graph.cycle_of("unknown") is None
+    assert set(graph.requires("x")) == {"x", "y"}
+
+
+def test_catalogue_cycle_and_impacted_services_in_validation():
+    index = load_catalogue_index()
+    assert index.graph.cycles == [["billing", "payment"]]
+    changeset = {
+        "id": "chg-dep",
+        "intent": "enable_subscription",
+        "timestamp": "2025-09-14T12:00:00Z",
+        "request_context": {"tenant_id": "t", "requested_by": "ops", "role": "admin"},
+        "changes": [{"action": "enable", "service": "subscription"}],
+        "metadata": {"confidence": 0.95, "risk": "low"},
+    }
+    res = validate_changeset(changeset, index, load_schema())
+    assert res["status"] == "requires_human"
+    assert res["impacted_services"] == ["customer", "billing", "payment", "subscription"]
+    assert any("transitively depends on payment" in w for w in res["warnings"])
+
+
+def test_rejected_results_have_no_impacted_services():
+    res = validate_changeset({"id": "bad"}, load_catalogue_index(), load_schema())
+    assert res["status"] == "rejected"
+    assert "impacted_services" not in res
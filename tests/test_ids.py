@@ -0,0 +1,52 @@
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from bmms_changelet.ids import IdGenerator, id_datetime, new_changeset_id
+
+ID_PATTERN = re.compile(r"^chg-[A-Za-z0-9\-]+$")
+
+
+def test_ids_match_schema_and_encode_time():
+    cid = new_changeset_id()
+    assert ID_PATTERN.match(cid)
+    assert abs(id_datetime(cid) - datetime.now(timezone.utc)) < timedelta(seconds=5)
+    assert id_datetime("chg-auto-20250917175200") is None
+
+
+def test_ids_are_monotonic_within_the_same_millisecond():
+    gen = IdGenerator()
+    ids = [gen.new() for _ in range(10000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+
+def test_ids_are_unique_across_threads():
+    gen = IdGenerator()
+    out = [[] for _ in range(8)]
+
+    def work(bucket):
+        for _ in range(2000):
+            bucket.append(gen.new())
+
+    threads = [threading.Thread(target=work, args=(bucket,)) for bucket in out]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    all_ids = [cid for bucket in out for cid in bucket]
+    assert len(set(all_ids)) == len(all_ids)
+    assert all(bucket == sorted(bucket) for bucket in out)
+
+
+def _burst(n):
+    return [new_changeset_id() for _ in range(n)]
+
+
+def test_ids_are_unique_across_forked_processes():
+    new_changeset_id()  # state của process cha có trước khi fork
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        batches = list(pool.map(_burst, [2000] * 4))
+    all_ids = [cid for batch in batches for cid in batch] + _burst(2000)
+    assert len(set(all_ids)) == len(all_ids)
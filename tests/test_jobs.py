@@ -0,0 +1,120 @@
+import json
+import time
+
+import pytest
+
+from bmms_changelet.batch import validate_item
+from bmms_changelet.config_store import ConfigStore
+from bmms_changelet import jobs
+from bmms_changelet.jobs import CANCELLED, SUCCEEDED, ConfigChanged, JobQueue, QueueFull
+
+CONFIG = ConfigStore()
+
+
+def load_changeset(name="tests/changesets/test1.json"):
+    with open(name, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def items(n):
+    out = []
+    for i in range(n):
+        changeset = load_changeset()
+        changeset["id"] = f"chg-job-{i}"
+        if i % 3 == 0:
+            changeset["changes"][0]["service"] = "nope"
+        out.append(changeset)
+    return out
+
+
+def test_validate_job_streams_results_in_order():
+    queue = JobQueue(workers=1, chunk_size=4)
+    batch = items(10)
+    job = queue.submit("validate", batch, CONFIG.current())
+    results = list(job.iter_results(poll_interval=0.05))
+    cfg = CONFIG.current()
+    assert results == [validate_item(i, ch, cfg.catalogue, cfg.schema) for i, ch in enumerate(batch)]
+    assert job.status == SUCCEEDED
+    assert queue.get(job.id).summary()["done"] == 10
+    queue.shutdown()
+
+
+def test_convert_and_pipeline_jobs():
+    queue = JobQueue(workers=2)
+    convert_job = queue.submit("convert", [load_changeset(), {"id": "bad"}], CONFIG.current())
+    raw = json.loads(open("tests/llm_output/test1_raw.json", encoding="utf-8").read())
+    pipeline_job = queue.submit("pipeline", [raw, "not an object"], CONFIG.current())
+    converted = list(convert_job.iter_results(poll_interval=0.05))
+    assert "values" in converted[0] and "errors" in converted[1]
+    piped = list(pipeline_job.iter_results(poll_interval=0.05))
+    assert piped[0]["validation"]["status"] in ("validated", "requires_human")
+    assert "error" in piped[1]
+    queue.shutdown()
+
+
+def test_bounded_queue_and_cancel():
+    queue = JobQueue(workers=0, max_queued=1)
+    job = queue.submit("validate", items(2), CONFIG.current())
+    with pytest.raises(QueueFull):
+        queue.submit("validate", items(2), CONFIG.current())
+    assert queue.cancel(job.id).status == CANCELLED
+    assert queue.stats()["cancelled"] == 1
+    queue.submit("validate", items(2), CONFIG.current())
+    assert queue.cancel("job-missing") is None
+    with pytest.raises(ValueError):
+        queue.submit("explode", [], CONFIG.current())
+
+
+def test_running_job_stops_between_chunks():
+    queue = JobQueue(workers=0, chunk_size=1)
+    job = queue.submit("validate", items(5), CONFIG.current())
+    job._cancel.set()
+    queue._run(job)
+    assert job.status == CANCELLED and job.results == []
+
+
+def test_finished_jobs_expire():
+    queue = JobQueue(workers=1, result_ttl=0)
+    job = queue.submit("validate", items(1), CONFIG.current())
+    list(job.iter_results(poll_interval=0.05))
+    time.sleep(0.01)
+    assert queue.get(job.id) is None
+    queue.shutdown()
+
+
+def test_process_pool_matches_in_process():
+    queue = JobQueue(workers=1, processes=1, chunk_size=2, config_paths=CONFIG.paths)
+    batch = items(5)
+    job = queue.submit("validate", batch, CONFIG.current())
+    results = list(job.iter_results(poll_interval=0.05))
+    cfg = CONFIG.current()
+    assert results == [validate_item(i, ch, cfg.catalogue, cfg.schema) for i, ch in enumerate(batch)]
+    assert queue._pool._mp_context.get_start_method() != "fork"
+    queue.shutdown()
+
+
+def test_process_chunk_rejects_config_it_cannot_rebuild(monkeypatch):
+    monkeypatch.setattr(jobs, "_PROCESS_STORE", None)
+    jobs._init_process(CONFIG.paths)
+    chunk = list(enumerate(items(2)))
+    cfg = CONFIG.current()
+    assert jobs._run_chunk_in_process("validate", chunk, CONFIG.version) == [
+        validate_item(i, ch, cfg.catalogue, cfg.schema) for i, ch in chunk
+    ]
+    # config của job không còn trên đĩa (đã đổi hai lần) → lỗi thay vì validate bằng config khác
+    with pytest.raises(ConfigChanged, match="expected old-version"):
+        jobs._run_chunk_in_process("validate", chunk, "old-version")
+
+
+def test_idle_workers_purge_expired_jobs():
+    queue = JobQueue(workers=1, result_ttl=0.05, purge_interval=0.05)
+    try:
+        job = queue.submit("validate", items(2), CONFIG.current())
+        list(job.iter_results(poll_interval=0.05))
+        assert job.status == SUCCEEDED
+        deadline = time.time() + 5
+        while queue._jobs and time.time() < deadline:
+            time.sleep(0.05)
+        assert not queue._jobs
+    finally:
+        queue.shutdown()
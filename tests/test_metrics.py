@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from bmms_changelet import metrics
+from bmms_changelet.metrics import Registry, set_enabled, stage
+from bmms_changelet.validator import load_catalogue_index, load_schema, validate_changeset
+
+
+@pytest.fixture
+def enabled():
+    set_enabled(True)
+    yield
+    set_enabled(False)
+
+
+def test_disabled_is_noop():
+    reg = Registry()
+    hist = reg.histogram("t_seconds", "test", ("op",))
+    counter = reg.counter("t_total", "test", ("status",))
+    with hist.time(op="x"):
+        pass
+    counter.inc(status="ok")
+    assert hist.count(op="x") == 0
+    assert counter.value(status="ok") == 0
+    assert stage("validate", "schema") is metrics._NOOP
+
+
+def test_prometheus_text(enabled):
+    reg = Registry()
+    hist = reg.histogram("t_seconds", "test", ("op",), buckets=(0.1, 1.0))
+    counter = reg.counter("t_total", "test", ("status",))
+    hist.observe(0.05, op="a")
+    hist.observe(0.5, op="a")
+    hist.observe(5, op="a")
+    counter.inc(status='we"ird')
+    text = reg.render()
+    assert "# TYPE t_seconds histogram" in text
+    assert 't_seconds_bucket{op="a",le="0.1"} 1' in text
+    assert 't_seconds_bucket{op="a",le="1.0"} 2' in text
+    assert 't_seconds_bucket{op="a",le="+Inf"} 3' in text
+    assert 't_seconds_count{op="a"} 3' in text
+    assert 't_total{status="we\\"ird"} 1' in text
+
+
+def test_validate_records_stages(enabled):
+    with open("tests/changesets/test1.json", encoding="utf-8") as f:
+        changeset = json.load(f)
+    before = metrics.STAGE_SECONDS.count(op="validate", stage="schema")
+    res = validate_changeset(changeset, load_catalogue_index(), load_schema())
+    assert metrics.STAGE_SECONDS.count(op="validate", stage="schema") == before + 1
+    assert metrics.STAGE_SECONDS.count(op="validate", stage="risk") >= 1
+    assert metrics.VALIDATIONS_TOTAL.value(status=res["status"]) >= 1
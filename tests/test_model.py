@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from bmms_changelet.convert_to_helm import compile_mapping, convert, load_mapping
+from bmms_changelet.model import MISSING, Change, ChangeSet, Metadata, RequestContext
+from bmms_changelet.normalize_input import normalize
+from bmms_changelet.validator import load_catalogue_index, load_schema, validate_changeset
+
+INDEX = load_catalogue_index("schema/service_catalogue.yaml")
+SCHEMA = load_schema("schema/changeset.schema.json")
+MAPPING = compile_mapping(load_mapping())
+
+
+def load_changeset(name):
+    with open(f"tests/changesets/{name}", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("name", ["test1.json", "test2.json"])
+def test_round_trip_is_lossless(name):
+    data = load_changeset(name)
+    typed = ChangeSet.from_dict(data)
+    assert isinstance(typed.changes[0], Change)
+    assert isinstance(typed.request_context, RequestContext)
+    assert isinstance(typed.metadata, Metadata)
+    assert typed.to_dict() == data
+    assert json.loads(json.dumps(typed.to_dict())) == data
+
+
+def test_unknown_missing_and_malformed_fields_survive():
+    data = {
+        "id": "chg-x",
+        "changes": [{"action": "update", "service": "billing", "owner": "ops"}, "not-a-change"],
+        "request_context": "tenant-demo",
+        "metadata": {"risk": "low", "confidence": None},
+    }
+    typed = ChangeSet.from_dict(data)
+    assert typed.intent is MISSING and "intent" not in typed
+    assert typed.changes[0].extra == {"owner": "ops"}
+    assert typed.changes[0]["owner"] == "ops"
+    assert typed.metadata["confidence"] is None
+    assert typed.to_dict() == data
+
+
+def test_construction_shares_values_and_interns_names():
+    data = load_changeset("test1.json")
+    typed = ChangeSet.from_dict(data)
+    assert typed.changes[0].config is data["changes"][0]["config"]
+    service = "".join(["bill", "ing"])
+    assert Change(action="update", service=service).service is Change.from_dict({"service": "billing"}).service
+
+
+@pytest.mark.parametrize("name", ["test1.json", "test2.json"])
+def test_core_functions_accept_typed_changesets(name):
+    data = load_changeset(name)
+    typed = ChangeSet.from_dict(data)
+    assert validate_changeset(typed, INDEX, SCHEMA) == validate_changeset(data, INDEX, SCHEMA)
+    assert convert(typed, MAPPING) == convert(data, MAPPING)
+
+
+def test_typed_schema_errors_match_dict():
+    data = load_changeset("test1.json")
+    data["changes"][0]["action"] = "explode"
+    data["request_context"] = "nope"
+    assert validate_changeset(ChangeSet.from_dict(data), INDEX, SCHEMA) == validate_changeset(data, INDEX, SCHEMA)
+
+
+def test_normalize_typed():
+    with open("tests/llm_output/test1_raw.json", "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    typed = normalize(raw, INDEX, typed=True)
+    assert isinstance(typed, ChangeSet)
+    plain = typed.to_dict()
+    assert plain["changes"][0]["service"] == typed.changes[0].service
+    assert validate_changeset(typed, INDEX, SCHEMA) == validate_changeset(plain, INDEX, SCHEMA)
+
+
+def test_typed_validation_and_equality_do_not_rebuild_dicts(monkeypatch):
+    data = load_changeset("test1.json")
+    typed = ChangeSet.from_dict(data)
+    expected = validate_changeset(data, INDEX, SCHEMA)
+
+    def fail(self):
+        raise AssertionError("to_dict() called")
+
+    monkeypatch.setattr(ChangeSet, "to_dict", fail)
+    monkeypatch.setattr(Change, "to_dict", fail)
+    assert validate_changeset(typed, INDEX, SCHEMA) == expected
+    assert typed == data and typed == ChangeSet.from_dict(load_changeset("test1.json"))
+    assert typed != ChangeSet.from_dict(load_changeset("test2.json"))
+    assert typed.changes[0] != {**data["changes"][0], "extra": 1}
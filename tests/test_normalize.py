@@ -1,5 +1,5 @@
 import json
-from src.bmms_changelet.normalize_input import normalize
+from bmms_changelet.normalize_input import normalize
 
 def test_alias_product_catalog_to_catalogue():
     raw_input = {
@@ -28,3 +28,21 @@ def test_alias_product_catalog_to_catalogue():
     assert "id" in normalized
     assert "timestamp" in normalized
     assert normalized["metadata"]["confidence"] == 0.9
+
+
+def test_same_second_proposals_get_distinct_ids():
+    raw_input = {"changeset": {"model": "order"}, "metadata": {"intent": "scale_order"}}
+    ids = {normalize(raw_input)["id"] for _ in range(50)}
+    assert len(ids) == 50
+
+
+def test_dedupe_window_returns_existing_changeset():
+    from bmms_changelet.normalize_input import DedupeWindow
+
+    dedupe = DedupeWindow(ttl=60)
+    raw_input = {"changeset": {"model": "order"}, "metadata": {"intent": "scale_order"}}
+    first = normalize(raw_input, dedupe=dedupe)
+    again = normalize(dict(raw_input), dedupe=dedupe)
+    assert again == first
+    other = normalize({**raw_input, "proposal_text": "khác"}, dedupe=dedupe)
+    assert other["id"] != first["id"]
@@ -0,0 +1,31 @@
+import json
+
+from bmms_changelet.pipeline import run_pipeline
+
+
+def make_lines(n):
+    with open("tests/llm_output/test1_raw.json", encoding="utf-8") as f:
+        raw = json.load(f)
+    lines = []
+    for i in range(n):
+        raw["metadata"]["confidence"] = 0.9 if i % 2 else 0.5
+        lines.append(json.dumps(raw) + "\n")
+    return lines
+
+
+def test_pipeline_in_process_keeps_order_and_reports_bad_lines():
+    lines = make_lines(3) + ["\n", "not json\n"]
+    results = [json.loads(line) for line in run_pipeline(lines, workers=0)]
+    assert [r["index"] for r in results] == [0, 1, 2, 3]
+    assert results[0]["validation"]["status"] == "requires_human"
+    assert results[1]["validation"]["status"] == "validated"
+    assert results[1]["values"] == {"catalogue": {"product_group": "A", "subscription_type": "monthly"}}
+    assert "error" in results[3]
+
+
+def test_pipeline_process_pool_matches_in_process():
+    lines = make_lines(20)
+    sequential = [json.loads(line)["validation"] for line in run_pipeline(lines, workers=0)]
+    parallel = [json.loads(line) for line in run_pipeline(lines, workers=2, chunk_size=3)]
+    assert [r["index"] for r in parallel] == list(range(20))
+    assert [r["validation"] for r in parallel] == sequential
@@ -0,0 +1,49 @@
+import pytest
+
+from bmms_changelet.quota import ResourceLedger, parse_cpu, parse_memory
+from bmms_changelet.validator import load_catalogue_index, load_schema, validate_changeset
+
+
+def scale(service, replicas):
+    return {
+        "id": "chg-quota",
+        "intent": "scale",
+        "timestamp": "2025-09-14T12:00:00Z",
+        "request_context": {"tenant_id": "t", "requested_by": "ops", "role": "ops"},
+        "changes": [{"action": "scale", "service": service, "config": {"replicas": replicas}}],
+        "metadata": {"confidence": 0.95, "risk": "low"},
+    }
+
+
+def test_parse_quantities():
+    assert parse_cpu("200m") == 200
+    assert parse_cpu("1.5") == 1500
+    assert parse_memory("512Mi") == 512
+    assert parse_memory("1Gi") == 1024
+    assert parse_memory("500M") == 477
+    with pytest.raises(ValueError):
+        parse_cpu("2Gi")
+
+
+def test_ledger_checks_scale_against_quota():
+    ledger = ResourceLedger(load_catalogue_index(), {"cpu_m": 10000, "memory_mib": 65536})
+    # 8 service, 1 replica mỗi service: 2400m CPU
+    assert ledger.used_cpu_m == 2400
+    assert ledger.check_changeset(scale("order", 10)) == []
+    errors = ledger.check_changeset(scale("order", 20))
+    assert errors and "CPU quota exceeded" in errors[0]
+
+    results = ledger.check_batch([scale("order", 10), scale("order", 20), scale("order", -1)])
+    assert [r["fits"] for r in results] == [True, False, False]
+    assert results[1]["cpu_m"] == 2400 + 19 * 500
+
+    ledger.commit(scale("order", 10))
+    assert ledger.used_cpu_m == 2400 + 9 * 500
+
+
+def test_validate_changeset_rejects_over_quota():
+    catalogue = load_catalogue_index()
+    ledger = ResourceLedger(catalogue, {"cpu_m": 4000, "memory_mib": 65536})
+    res = validate_changeset(scale("order", 10), catalogue, load_schema(), ledger=ledger)
+    assert res["status"] == "rejected"
+    assert "CPU quota exceeded" in res["errors"][0]
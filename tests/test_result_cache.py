@@ -0,0 +1,61 @@
+import json
+
+from bmms_changelet.result_cache import MemoryBackend, ResultCache, SQLiteBackend
+from bmms_changelet.validator import load_catalogue_index, load_schema, validate_changeset
+
+
+def load_changeset():
+    with open("tests/changesets/test1.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_cache_ignores_volatile_fields_but_not_config_version():
+    schema = load_schema()
+    catalogue = load_catalogue_index()
+    cache = ResultCache()
+    calls = []
+
+    def compute(cs):
+        calls.append(cs["id"])
+        return validate_changeset(cs, catalogue, schema)
+
+    first = load_changeset()
+    retry = dict(first, id="chg-retry-1", timestamp="2025-09-18T00:00:00Z")
+    res1, hit1 = cache.get_or_compute("validate", first, schema, "v1", lambda: compute(first))
+    res2, hit2 = cache.get_or_compute("validate", retry, schema, "v1", lambda: compute(retry))
+    _, hit3 = cache.get_or_compute("validate", retry, schema, "v2", lambda: compute(retry))
+    assert (hit1, hit2, hit3) == (False, True, False)
+    assert res1 == res2
+    assert calls == [first["id"], retry["id"]]
+    assert cache.stats()["hits"] == 1
+
+
+def test_invalid_volatile_field_bypasses_cache():
+    schema = load_schema()
+    cache = ResultCache()
+    bad = dict(load_changeset(), id="not a valid id")
+    cache.get_or_compute("validate", bad, schema, "v1", lambda: {"status": "rejected"})
+    _, hit = cache.get_or_compute("validate", bad, schema, "v1", lambda: {"status": "rejected"})
+    assert not hit
+    assert cache.stats()["bypassed"] == 2
+
+
+def test_memory_backend_respects_byte_budget():
+    backend = MemoryBackend(max_bytes=10, ttl=60)
+    backend.set("a", b"12345")
+    backend.set("b", b"12345")
+    backend.get("a")  # a mới được dùng → b bị evict trước
+    backend.set("c", b"123")
+    assert backend.get("b") is None
+    assert backend.get("a") == b"12345" and backend.get("c") == b"123"
+    assert backend.size_bytes <= 10
+
+
+def test_sqlite_backend_shared_between_instances(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    SQLiteBackend(path).set("k", b"value")
+    other = SQLiteBackend(path, max_bytes=8)
+    assert other.get("k") == b"value"
+    other.set("k2", b"value2")
+    assert other.size_bytes <= 8
+    assert other.get("k2") == b"value2"
@@ -0,0 +1,43 @@
+from bmms_changelet.normalize_input import normalize
+from bmms_changelet.service_resolver import ServiceResolver, canonical_name
+from bmms_changelet.validator import load_catalogue_index
+
+
+def test_canonical_name():
+    assert canonical_name("Payment Service") == "payment"
+    assert canonical_name("order-svc") == "order"
+    assert canonical_name("OrderService") == "order"
+    assert canonical_name("/billing-svc/api/v1") == "billing"
+    assert canonical_name("subscriptions") == "subscription"
+
+
+def test_resolve_variants():
+    resolver = load_catalogue_index().resolver
+    assert resolver.resolve("order") == ("order", 1.0)
+    assert resolver.resolve("product_catalog") == ("catalogue", 1.0)
+    assert resolver.resolve("orders") == ("order", 0.95)
+    assert resolver.resolve("Payment Service") == ("payment", 0.95)
+    sid, score = resolver.resolve("paymnt")
+    assert sid == "payment" and 0.5 <= score < 0.95
+    assert resolver.resolve("weather")[0] is None
+    assert resolver.resolve(None) == (None, 0.0)
+
+
+def test_alias_to_unknown_service_is_ignored():
+    resolver = ServiceResolver({"services": [{"id": "a", "name": "a"}]}, aliases={"x": "missing"})
+    assert resolver.resolve("x")[0] is None
+
+
+def test_fuzzy_match_lowers_confidence():
+    raw = {
+        "changeset": {"model": "paymnt", "features": []},
+        "metadata": {"intent": "update_config", "confidence": 0.9},
+    }
+    normalized = normalize(raw, load_catalogue_index())
+    assert normalized["changes"][0]["service"] == "payment"
+    assert normalized["metadata"]["confidence"] < 0.9
+
+    raw["changeset"]["model"] = "weather"
+    normalized = normalize(raw)
+    assert normalized["changes"][0]["service"] == "weather"
+    assert normalized["metadata"]["confidence"] == 0.9
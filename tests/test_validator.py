@@ -15,3 +15,55 @@ def test_scale_order_valid():
     }
     res = validate_changeset(changeset, catalogue, schema)
     assert res['status'] == 'validated'
+
+
+def test_schema_validator_is_cached_by_content():
+    from bmms_changelet.validator import ValidatorRegistry
+
+    registry = ValidatorRegistry()
+    schema = load_schema("schema/changeset.schema.json")
+    same_content = load_schema("schema/changeset.schema.json")
+    assert registry.get(schema) is registry.get(same_content)
+    assert len(registry) == 1
+
+
+def test_first_error_only_returns_single_error():
+    from bmms_changelet.validator import validate_schema_instance
+
+    schema = load_schema("schema/changeset.schema.json")
+    bad = {"id": "bad id", "changes": []}
+    ok, errors = validate_schema_instance(bad, schema)
+    assert not ok and len(errors) > 1
+    ok, errors = validate_schema_instance(bad, schema, first_error_only=True)
+    assert not ok and len(errors) == 1
+
+
+def test_catalogue_index_lookup_matches_find_service():
+    from bmms_changelet.catalogue_index import CatalogueIndex
+    from bmms_changelet.validator import find_service
+
+    catalogue = load_catalogue("schema/service_catalogue.yaml")
+    index = CatalogueIndex(catalogue)
+    for svc in catalogue["services"]:
+        assert find_service(index, svc["id"]) is find_service(catalogue, svc["id"])
+    assert index.get("unknown") is None
+    assert "stock" in index.allowed_features("inventory")
+    assert index.dependencies("order") == ("customer", "inventory", "billing")
+
+
+def test_validate_changeset_accepts_catalogue_index():
+    from bmms_changelet.catalogue_index import CatalogueIndex
+
+    index = CatalogueIndex(load_catalogue("schema/service_catalogue.yaml"))
+    schema = load_schema("schema/changeset.schema.json")
+    changeset = {
+        "id": "chg-0002",
+        "intent": "enable_billing",
+        "timestamp": "2025-09-14T12:00:00Z",
+        "request_context": {"tenant_id": "tenant-demo", "requested_by": "linh", "role": "admin"},
+        "changes": [{"action": "enable", "service": "billing"}, {"action": "scale", "service": "nope"}],
+        "metadata": {"confidence": 0.95, "risk": "low"},
+    }
+    res = validate_changeset(changeset, index, schema)
+    assert res["status"] == "rejected"
+    assert res["errors"] == ["Service not found in catalogue: nope"]
@@ -0,0 +1,41 @@
+import copy
+
+from bmms_changelet.values_merge import ValuesMerger
+
+MAPPING = {
+    "mappings": {
+        "order": {"instance_count": "order.replicas", "limits": "order.resources.limits"},
+        "billing": {"payment_model": "billing.payment_model"},
+    }
+}
+BASE = {"order": {"replicas": 1, "resources": {"limits": {"cpu": "500m"}}}, "image": {"tag": ""}}
+
+
+def change(service, **config):
+    return {"changes": [{"action": "update", "service": service, "config": config}]}
+
+
+def test_apply_deep_merges_and_emits_changed_paths_only():
+    merger = ValuesMerger(BASE, MAPPING)
+    diff = merger.apply(change("order", instance_count=3, limits={"memory": "1Gi"}), step_id="s1")
+    assert diff == {"step": "s1", "set": {"order.replicas": 3, "order.resources.limits.memory": "1Gi"}, "unset": []}
+    assert merger.values["order"]["resources"]["limits"] == {"cpu": "500m", "memory": "1Gi"}
+    assert merger.apply(change("order", instance_count=3), step_id="s2")["set"] == {}
+    assert BASE["order"]["replicas"] == 1  # base không bị sửa
+
+
+def test_rollback_restores_previous_tree():
+    merger = ValuesMerger(BASE, MAPPING)
+    snapshots = [copy.deepcopy(merger.values)]
+    merger.apply(change("order", instance_count=3), step_id="s1")
+    snapshots.append(copy.deepcopy(merger.values))
+    merger.apply(change("billing", payment_model="prepaid"), step_id="s2")
+    merger.apply(change("order", instance_count=7, limits={"cpu": "1"}), step_id="s3")
+
+    diff = merger.rollback()
+    assert diff["set"] == {"order.replicas": 3, "order.resources.limits.cpu": "500m"}
+    diff = merger.rollback("s2")
+    assert diff["unset"] == ["billing.payment_model", "billing"]
+    assert merger.values == snapshots[1]
+    merger.rollback("s1")
+    assert merger.values == snapshots[0]